@@ -4,6 +4,7 @@ from os import path
 
 JOBLIB_MIN_VERSION = '0.13.0'
 NUMPY_MIN_VERSION = '1.15.3'
+SCIPY_MIN_VERSION = '1.1.0'
 SKLEARN_MIN_VERSION = '0.19.1'
 KERAS_MIN_VERSION = '2.2.4'
 GEOHASH2_MIN_VERSION = '1.1'
@@ -37,6 +38,7 @@ setup(
     install_requires=[
         'joblib>={0}'.format(JOBLIB_MIN_VERSION),
         'numpy>={0}'.format(NUMPY_MIN_VERSION),
+        'scipy>={0}'.format(SCIPY_MIN_VERSION),
         'scikit-learn>={0}'.format(SKLEARN_MIN_VERSION),
         'keras>={0}'.format(KERAS_MIN_VERSION),
         'geohash2>={0}'.format(GEOHASH2_MIN_VERSION),
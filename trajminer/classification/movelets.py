@@ -1,13 +1,26 @@
+from joblib import Parallel, delayed
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.utils import gen_even_slices
 import sys
 import numpy as np
 
 from .base import Classifier
+from ..utils.arrays import object_array
+from ..utils.distance import discrete, euclidean, haversine
 
 
 class Movelets(Classifier):
     """MOVELETS: exploring relevant subtrajectories for robust trajectory
     classification.
 
+    Every subtrajectory of the training trajectories is a candidate movelet,
+    whose quality is the information gain of the best split of training
+    trajectories by their distance to it (trajectories of the candidate's
+    class versus the others). The best non-overlapping candidates of each
+    trajectory are kept as movelets, trajectories are transformed into
+    vectors of distances to the movelets, and a classifier is trained on
+    these vectors.
+
     Parameters
     ----------
     dist_functions : array-like, shape (n_features)
@@ -17,6 +30,24 @@ class Movelets(Classifier):
         Specifies the maximum values to use for distance normalization. For
         the i-th feature, if norm_distances[i] <= 0, then the distance is not
         normalized.
+    min_length : int (default=1)
+        The minimum length of candidate movelets.
+    max_length : int (default=None)
+        The maximum length of candidate movelets. If ``None``, then
+        candidates may be as long as their trajectories.
+    classifier : object (default=None)
+        A scikit-learn classifier trained on the movelet distances. If
+        ``None``, then a :class:`sklearn.ensemble.RandomForestClassifier`
+        with 100 trees is used.
+    max_memory : int (default=1024)
+        The memory budget (in MiB) of each job for the running sums of
+        distances. Candidates starting at consecutive points of a trajectory
+        are evaluated in chunks that fit the budget (at least one start point
+        per chunk).
+    n_jobs : int (default=1)
+        The number of parallel jobs. Candidates are evaluated in parallel by
+        source trajectory, and the training data is shared among processes
+        through memory mapping.
 
     References
     ----------
@@ -27,46 +58,326 @@ class Movelets(Classifier):
     <https://dl.acm.org/citation.cfm?doid=3167132.3167225>`__
     """
 
-    def __init__(self, dist_functions, norm_distances=None):
-        self.distances = dist_functions
+    def __init__(self, dist_functions, norm_distances=None, min_length=1,
+                 max_length=None, classifier=None, max_memory=1024,
+                 n_jobs=1):
+        self.dist_functions = dist_functions
+        self.norm_distances = norm_distances
+        self.min_length = min_length
+        self.max_length = max_length
+        self.max_memory = max_memory
+        self.n_jobs = n_jobs
+
+        if norm_distances is None:
+            self._norms = np.zeros(len(dist_functions))
+        else:
+            self._norms = np.asarray(norm_distances, dtype=float)
+
+        if classifier is None:
+            classifier = RandomForestClassifier(n_estimators=100,
+                                                n_jobs=n_jobs)
 
-        if norm_distances is not None:
-            for i in range(0, len(dist_functions)):
-                if norm_distances[i] > 0:
-                    self.distances[i] = \
-                        lambda x, y: self.distances[i] / norm_distances[i]
+        self.classifier = classifier
 
     def fit(self, X, y):
-        for i, traj in enumerate(X):
-            break
+        y = np.asarray(y)
+        self._vocabularies = {}
+        columns, offsets = _encode(X, self.dist_functions, self._vocabularies)
+        max_length = self.max_length if self.max_length is not None \
+            else np.inf
+
+        func = delayed(_discover_movelets)
+        ret = Parallel(n_jobs=self.n_jobs, verbose=0)(
+            func(columns, offsets, y, s, self.dist_functions, self._norms,
+                 self.min_length, max_length, self.max_memory)
+            for s in gen_even_slices(len(X), self.n_jobs))
+        found = [m for job in ret for m in job]
+
+        self.movelets = [X[i][start:start + length]
+                         for i, start, length, _ in found]
+        self.qualities = np.array([quality for _, _, _, quality in found])
+        self._movelet_columns = [
+            [c[offsets[i] + start:offsets[i] + start + length]
+             for c in columns] for i, start, length, _ in found]
+
+        self.classifier.fit(self.transform(X), y)
+        return self
+
+    def transform(self, X):
+        """Transforms trajectories into their distances to the movelets found
+        by `fit`.
+
+        Parameters
+        ----------
+        X : array-like, shape (n_samples, max_length, n_features)
+            Input data.
+
+        Returns
+        -------
+        distances : array, shape (n_samples, n_movelets)
+            The distance of each trajectory to the best alignment of each
+            movelet.
+        """
+        columns, offsets = _encode(X, self.dist_functions, self._vocabularies)
+
+        func = delayed(_movelet_distances)
+        ret = Parallel(n_jobs=self.n_jobs, verbose=0)(
+            func(columns, offsets, self._movelet_columns[s],
+                 self.dist_functions, self._norms)
+            for s in gen_even_slices(len(self._movelet_columns),
+                                     self.n_jobs))
+        return np.hstack([np.zeros((len(X), 0))] + ret)
 
     def predict(self, X):
-        pass
+        return self.classifier.predict(self.transform(X))
 
     def score(self, X, y):
-        pass
+        return self.classifier.score(self.transform(X), y)
 
     def _best_alignment(self, subtraj, traj):
         if len(subtraj) > len(traj):
             return sys.float_info.max
 
-        comp = len(traj) - len(subtraj)
-        minDist = sys.float_info.max
-        position = -1
+        d = _point_distances(_columns(subtraj, len(self.dist_functions)),
+                             _columns(traj, len(self.dist_functions)),
+                             self.dist_functions, self._norms)
+        distances, positions = _alignments(_diagonal_sums(d), len(subtraj))
+        position = [positions[0], positions[0] + len(subtraj)]
+        return distances[0], position
+
+
+def _discover_movelets(columns, offsets, labels, s, dist_functions, norms,
+                       min_length, max_length, max_memory):
+    movelets = []
+    max_rows = max(1, max_memory * 2 ** 20 // (24 * offsets[-1]))
+
+    for i in range(s.start, s.stop):
+        source = _trajectory(columns, offsets, i)
+        n_points = offsets[i + 1] - offsets[i]
+        longest = int(min(max_length, n_points))
+        positive = labels == labels[i]
+        block = max(1, max_rows - longest + 1)
+        candidates = []
+
+        # Squared distances between the points of a chunk (plus the points
+        # that candidates starting in it may span) and all points
+        for start in range(0, n_points - min_length + 1, block):
+            stop = min(start + block + longest - 1, n_points)
+            chunk = [c[start:stop] for c in source]
+            sq = np.square(_point_distances(chunk, columns, dist_functions,
+                                            norms))
+
+            for length, d in _running_alignments(sq, offsets, longest,
+                                                 block):
+                if length >= min_length:
+                    quality = _information_gain(d, positive)
+                    candidates.extend(zip(quality, start + np.r_[0:len(d)],
+                                          [length] * len(d)))
+
+        # Candidates overlapping a better candidate of the same trajectory
+        # are redundant
+        covered = np.zeros(n_points, dtype=bool)
+
+        for quality, start, length in sorted(
+                candidates, key=lambda c: (-c[0], c[2], c[1])):
+            if quality <= 0:
+                break
+            if not covered[start:start + length].any():
+                covered[start:start + length] = True
+                movelets.append((i, start, length, quality))
+
+    return movelets
+
+
+def _movelet_distances(columns, offsets, movelet_columns, dist_functions,
+                       norms):
+    distances = np.zeros((len(offsets) - 1, len(movelet_columns)))
+
+    for m, movelet in enumerate(movelet_columns):
+        sq = np.square(_point_distances(movelet, columns, dist_functions,
+                                        norms))
+
+        for _, d in _running_alignments(sq, offsets, len(sq), 1):
+            distances[:, m] = d[0]
+
+    return distances
+
+
+def _running_alignments(sq, offsets, max_length, n_starts):
+    # Yields, for every length up to max_length, the distances between the
+    # subtrajectories of that length starting at the first n_starts rows of
+    # sq and their best alignments in each trajectory (whose points are the
+    # columns of sq, delimited by offsets). Subtrajectories of length L+1
+    # extend the running sums of squared point distances of length L at
+    # every (row, column) offset, so each length costs a single pass over sq
+    n_rows, n_total = sq.shape
+    lengths = np.diff(offsets)
+    ends = np.repeat(offsets[1:], lengths)
+    running = np.zeros_like(sq)
+
+    # Trajectories shorter than the subtrajectories are aligned inside them
+    # instead: inner holds the cost of aligning a whole trajectory starting
+    # at each row, and best its minimum over the subtrajectory offsets
+    inner = np.full((n_rows, len(lengths)), np.inf)
+    best = np.full((n_rows, len(lengths)), np.inf)
+
+    for length in range(1, min(max_length, n_rows) + 1):
+        n_valid = n_rows - length + 1
+        width = max(n_total - length + 1, 0)
+        running[:n_valid, :width] += sq[length - 1:, length - 1:]
+        fit = np.flatnonzero(lengths == length)
+        inner[:n_valid, fit] = running[:n_valid][:, offsets[fit]]
+        best[:, fit] = inner[:, fit]
+
+        k = min(n_starts, n_valid)
+        short = np.flatnonzero(lengths < length)
+        best[:k, short] = np.minimum(
+            best[:k, short],
+            inner[np.r_[0:k][:, None] + length - lengths[short], short])
+
+        within = np.r_[0:n_total] + length <= ends
+        d = np.minimum.reduceat(np.where(within, running[:k], np.inf),
+                                offsets[:-1], axis=1) / length
+        d[:, short] = best[:k, short] / lengths[short]
+        yield length, np.sqrt(np.maximum(d, 0))
+
+
+def _information_gain(distances, positive):
+    # Information gain of the best split of the trajectories (columns) by
+    # their distance to each candidate (rows)
+    n = distances.shape[1]
+
+    if n < 2:
+        return np.zeros(len(distances))
+
+    order = np.argsort(distances, axis=1, kind='mergesort')
+    distances = np.take_along_axis(distances, order, axis=1)
+    left = np.r_[1:n]
+    left_pos = np.cumsum(positive[order], axis=1)[:, :-1]
+    right_pos = positive.sum() - left_pos
+    gain = _entropy(positive.sum(), n) - \
+        (left * _entropy(left_pos, left) +
+         (n - left) * _entropy(right_pos, n - left)) / n
+
+    # Splits can only be made between different distances
+    gain[distances[:, 1:] <= distances[:, :-1]] = 0
+    return gain.max(axis=1)
+
+
+def _entropy(positives, total):
+    p = np.asarray(positives / total, dtype=float)
+    h = np.zeros_like(p)
+    mixed = (p > 0) & (p < 1)
+    h[mixed] = -(p[mixed] * np.log2(p[mixed]) +
+                 (1 - p[mixed]) * np.log2(1 - p[mixed]))
+    return h
+
+
+def _encode(X, dist_functions, vocabularies):
+    # Attribute values of all points are concatenated into one array per
+    # attribute (memory mappable when shared among processes). Values
+    # compared by the discrete distance are encoded as integers, with unseen
+    # values getting new codes
+    offsets = np.r_[0, np.cumsum([len(t) for t in X])].astype(int)
+    columns = _columns([p for t in X for p in t], len(dist_functions))
+
+    for k, dist in enumerate(dist_functions):
+        if dist is not discrete:
+            continue
+
+        vocabulary = vocabularies.get(k, {})
+        unseen = {}
+        codes = np.empty(len(columns[k]), dtype=int)
+
+        for i, value in enumerate(columns[k]):
+            code = vocabulary.get(value)
+
+            if code is None:
+                code = unseen.setdefault(value, len(vocabulary) + len(unseen))
+
+            codes[i] = code
+
+        if k not in vocabularies:
+            vocabularies[k] = unseen
+
+        columns[k] = codes
+
+    return columns, offsets
+
+
+def _trajectory(columns, offsets, i):
+    return [c[offsets[i]:offsets[i + 1]] for c in columns]
+
+
+def _columns(points, n_features):
+    return [_attribute_values(points, k) for k in range(n_features)]
+
+
+def _attribute_values(traj, k):
+    values = [p[k] for p in traj]
+
+    try:
+        return np.array(values, dtype=float)
+    except (TypeError, ValueError):
+        return object_array(values)
+
+
+def _attribute_distances(x, y, dist):
+    # Distances between every value of x and every value of y, vectorized for
+    # the distance functions of trajminer.utils.distance
+    if dist is discrete:
+        return (x[:, None] != y[None, :]).astype(float)
+
+    if x.dtype != object and y.dtype != object:
+        if dist is euclidean:
+            diff = x[:, None] - y[None, :]
+
+            if diff.ndim == 2:
+                return np.abs(diff)
+
+            return np.sqrt(np.square(diff).sum(axis=2))
+
+        if dist is haversine:
+            return haversine(x[:, None], y[None, :])
+
+    return np.array([[dist(u, v) for v in y] for u in x], dtype=float)
+
+
+def _point_distances(t1, t2, dist_functions, norms):
+    # Distance between every point of t1 and every point of t2 (given as
+    # lists of attribute values), i.e. the sum of the (normalized) distances
+    # between their attributes
+    d = np.zeros((len(t1[0]), len(t2[0])))
+
+    for k, dist in enumerate(dist_functions):
+        attribute = _attribute_distances(t1[k], t2[k], dist)
+
+        if norms[k] > 0:
+            attribute /= norms[k]
+
+        d += attribute
+
+    return d
+
+
+def _diagonal_sums(d):
+    # Cumulative sums of the squared point distances along the diagonals of
+    # d, so that the squared distance between the subtrajectory of length L
+    # starting at point i of t1 and the one starting at point j of t2 is
+    # sums[i + L, j + L] - sums[i, j]
+    sums = np.zeros((d.shape[0] + 1, d.shape[1] + 1))
 
-        for i in range(0, comp + 1):
-            curDist = 0
-            for j in range(0, len(subtraj)):
-                pointDist = 0
+    for i, row in enumerate(np.square(d)):
+        sums[i + 1, 1:] = sums[i, :-1] + row
 
-                for dist in self.distances:
-                    pointDist += dist(subtraj[j], traj[i + j])
-                curDist += pointDist * pointDist
+    return sums
 
-            if curDist < minDist:
-                minDist = curDist
-                position = i
 
-        minDist = np.sqrt(minDist / len(subtraj))
-        position = [position, position + len(subtraj)]
-        return minDist, position
+def _alignments(sums, length):
+    # Distance of every subtrajectory of t1 with the given length (indexed by
+    # its first point) to its best alignment in t2, and the first point of
+    # that alignment
+    costs = sums[length:, length:] - sums[:-length, :-length]
+    positions = costs.argmin(axis=1)
+    costs = costs[np.r_[0:len(costs)], positions]
+    return np.sqrt(np.maximum(costs, 0) / length), positions
@@ -1,13 +1,56 @@
+from joblib import Parallel, delayed
+from scipy.sparse import csr_matrix
+from sklearn.svm import SVC
+from sklearn.utils import gen_even_slices
+import numpy as np
+
 from .base import Classifier
+from ..utils.geohash import Geohash
 
 
 class TraClass(Classifier):
     """TraClass: Trajectory Classification Using Hierarchical Region-Based and
     Trajectory-Based Clustering.
 
+    Trajectories are partitioned into segments (pairs of consecutive points),
+    which are indexed by the geohash cell of their midpoint. Region-based
+    clustering goes down the geohash hierarchy from `min_precision` to
+    `max_precision`: dense cells where segments of a single class prevail
+    become discriminative regions, sparse cells are discarded and the
+    remaining (mixed) cells are split into their subcells. Segments left in
+    mixed cells at `max_precision` are then grouped by cell and direction into
+    trajectory clusters, which are kept if they are dense and pure as well.
+    Each trajectory is described by the number of its segments in each region
+    and cluster, and a classifier is trained on these features.
+
+    Since cells at every precision are prefixes of the cells at
+    `max_precision`, each segment is encoded only once and every level of the
+    hierarchy is computed in time linear in the number of segments.
+
     Parameters
     ----------
-    TO-DO
+    lat_lon : int (default=-1)
+        The index of the feature holding the ``[lat, lon]`` pair of
+        trajectory points.
+    min_precision : int (default=3)
+        The geohash precision of the coarsest regions.
+    max_precision : int (default=6)
+        The geohash precision of the finest regions and of the trajectory
+        clusters.
+    min_density : int (default=10)
+        The minimum number of segments in a region or trajectory cluster.
+    min_purity : float (default=0.8)
+        The minimum fraction of segments of the prevailing class in a region
+        or trajectory cluster.
+    n_directions : int (default=8)
+        The number of direction bins used for grouping segments into
+        trajectory clusters. Cells and direction bins are packed into 63
+        bits, so at most 8 bins can be used with ``max_precision=12``.
+    classifier : object (default=None)
+        A scikit-learn classifier trained on the region and cluster features.
+        If ``None``, then a :class:`sklearn.svm.SVC` is used.
+    n_jobs : int (default=1)
+        The number of parallel jobs.
 
     References
     ----------
@@ -17,14 +60,152 @@ class TraClass(Classifier):
     <https://dl.acm.org/citation.cfm?id=1453972>`__
     """
 
-    def __init__(self):
-        pass
+    def __init__(self, lat_lon=-1, min_precision=3, max_precision=6,
+                 min_density=10, min_purity=0.8, n_directions=8,
+                 classifier=None, n_jobs=1):
+        self.lat_lon = lat_lon
+        self.min_precision = min_precision
+        self.max_precision = max_precision
+        self.min_density = min_density
+        self.min_purity = min_purity
+        self.n_directions = n_directions
+        self.n_jobs = n_jobs
+
+        if min_precision > max_precision:
+            raise ValueError("'min_precision' cannot be greater than " +
+                             "'max_precision'!")
+
+        # Cluster keys pack the cell (5 bits per precision level) and the
+        # direction bin into a signed 64-bit integer
+        if 5 * max_precision + int(np.ceil(np.log2(n_directions))) > 63:
+            raise ValueError("'n_directions' is too large for " +
+                             "'max_precision': cells and directions must " +
+                             "fit in 63 bits!")
+
+        if classifier is None:
+            classifier = SVC(gamma='scale')
+
+        self.classifier = classifier
 
     def fit(self, X, y):
-        pass
+        self.classes, y = np.unique(y, return_inverse=True)
+        trajs, cells, directions = self._segments(X)
+        classes = y[trajs]
+        covered = np.zeros(len(cells), dtype=bool)
+        self.regions = {}
+
+        for precision in range(self.min_precision, self.max_precision + 1):
+            level = cells >> 5 * (self.max_precision - precision)
+            dense, pure = self._groups(level[~covered], classes[~covered])
+            self.regions[precision] = pure
+            covered |= np.isin(level, pure)
+
+            # Segments of sparse cells are not refined further
+            covered |= ~np.isin(level, dense)
+
+        keys = cells * self.n_directions + directions
+        _, self.clusters = self._groups(keys[~covered], classes[~covered])
+
+        self.classifier.fit(self._features(len(X), trajs, cells, directions),
+                            y)
+        return self
+
+    def transform(self, X):
+        """Transforms trajectories into their numbers of segments in each
+        region and trajectory cluster found by `fit`.
+
+        Parameters
+        ----------
+        X : array-like, shape (n_samples, max_length, n_features)
+            Input data.
+
+        Returns
+        -------
+        features : scipy.sparse.csr_matrix, shape (n_samples, n_regions + \
+                n_clusters)
+            The region and cluster features of each trajectory.
+        """
+        return self._features(len(X), *self._segments(X))
 
     def predict(self, X):
-        pass
+        return self.classes[self.classifier.predict(self.transform(X))]
 
     def score(self, X, y):
-        pass
+        return np.mean(self.predict(X) == np.asarray(y))
+
+    def _segments(self, X):
+        func = delayed(_segments)
+        ret = Parallel(n_jobs=self.n_jobs, verbose=0)(
+            func(X[s], s.start, self.lat_lon, self.max_precision,
+                 self.n_directions)
+            for s in gen_even_slices(len(X), self.n_jobs))
+        return tuple(np.concatenate([job[i] for job in ret])
+                     for i in range(3))
+
+    def _groups(self, keys, classes):
+        # Groups of segments (by key) with at least min_density segments, and
+        # the ones among them where a class prevails
+        n_classes = len(self.classes)
+        groups, inverse = np.unique(keys, return_inverse=True)
+        counts = np.bincount(inverse * n_classes + classes,
+                             minlength=len(groups) * n_classes) \
+            .reshape(len(groups), n_classes)
+        density = counts.sum(axis=1)
+        dense = density >= self.min_density
+        pure = dense & (counts.max(axis=1) >= self.min_purity * density)
+        return groups[dense], groups[pure]
+
+    def _features(self, n, trajs, cells, directions):
+        columns = []
+        offset = 0
+
+        for precision, regions in sorted(self.regions.items()):
+            level = cells >> 5 * (self.max_precision - precision)
+            columns.append(_feature_index(level, regions, offset))
+            offset += len(regions)
+
+        keys = cells * self.n_directions + directions
+        columns.append(_feature_index(keys, self.clusters, offset))
+        offset += len(self.clusters)
+
+        # Each segment counts towards its region or cluster at every level
+        rows = np.concatenate([trajs] * len(columns))
+        columns = np.concatenate(columns)
+        found = columns >= 0
+        return csr_matrix((np.ones(found.sum()),
+                           (rows[found], columns[found])), shape=(n, offset))
+
+
+def _feature_index(keys, groups, offset):
+    idxs = np.searchsorted(groups, keys)
+    idxs[idxs == len(groups)] = 0
+    found = (groups[idxs] == keys) if len(groups) > 0 \
+        else np.zeros(len(keys), dtype=bool)
+    return np.where(found, idxs + offset, -1)
+
+
+def _segments(X, first, lat_lon, precision, n_directions):
+    # Trajectory index, geohash cell (packed into an integer) of the midpoint
+    # and direction bin of every segment
+    geohash = Geohash()
+    trajs, cells, directions = [], [], []
+
+    for i, t in enumerate(X):
+        if len(t) < 2:
+            continue
+
+        points = np.array([p[lat_lon] for p in t], dtype=float)
+        mid = (points[1:] + points[:-1]) / 2
+        cells.append(geohash.encode_many(mid[:, 0], mid[:, 1], precision)
+                     .astype(np.int64))
+
+        delta = np.diff(points, axis=0)
+        angle = np.arctan2(delta[:, 0],
+                           delta[:, 1] * np.cos(np.radians(mid[:, 0])))
+        directions.append(np.floor((angle + np.pi) / (2 * np.pi) *
+                                   n_directions).astype(int) % n_directions)
+        trajs.append(np.full(len(mid), first + i))
+
+    empty = [np.zeros(0, dtype=np.int64)]
+    return (np.concatenate(trajs + empty), np.concatenate(cells + empty),
+            np.concatenate(directions + empty))
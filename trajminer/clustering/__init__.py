@@ -4,8 +4,12 @@ clustering algorithms work alongside with a trajectory similarity measure from
 """
 from .agglomerative import AgglomerativeClustering
 from .density import DBSCAN
+from .hdbscan import HDBSCAN
 from .kmedoids import KMedoids
+from .stream import StreamClustering
 
 __all__ = ['AgglomerativeClustering',
            'DBSCAN',
-           'KMedoids']
+           'HDBSCAN',
+           'KMedoids',
+           'StreamClustering']
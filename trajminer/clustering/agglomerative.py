@@ -1,4 +1,5 @@
-from sklearn.cluster import AgglomerativeClustering as skAgglomerative
+from scipy.cluster.hierarchy import fcluster
+from scipy.spatial.distance import squareform
 import numpy as np
 
 from .base import Clustering
@@ -8,34 +9,210 @@ from ..similarity.pairwise import pairwise_similarity
 class AgglomerativeClustering(Clustering):
     """Hierarchical Agglomerative Clustering.
 
+    The hierarchy is built with the nearest-neighbor chain algorithm, which
+    takes O(n^2) time and works in place over the condensed distance matrix
+    (or over a copy of it, see `copy`), requiring only O(n) additional
+    memory otherwise.
+
     Parameters
     ----------
     n_clusters : int
         The number of clusters to group trajectories into.
     linkage : str (default='ward')
-        The linkage method to use. Must be one of {'ward', complete',
-        'average'}.
+        The linkage method to use. Must be one of {'ward', 'complete',
+        'average', 'single'}.
     measure : SimilarityMeasure object or str (default='precomputed')
         The similarity measure to use for computing similarities (see
         :mod:`trajminer.similarity`) or the string 'precomputed'.
+    dtype : data-type (default=numpy.float64)
+        The data type of the distance matrix (e.g. ``numpy.float32`` for
+        halving memory usage).
+    copy : bool (default=True)
+        If `False`, then the condensed distance matrix (the computed one, or
+        the one given to `fit_predict` if it is a condensed array of type
+        `dtype`) is overwritten while building the hierarchy instead of being
+        copied, and `distances` is not kept.
     n_jobs : int (default=1)
         The number of parallel jobs.
+
+    Attributes
+    ----------
+    distances : array, shape (n_samples * (n_samples - 1) / 2)
+        The condensed distance matrix, or ``None`` if `copy=False`.
+    dendrogram : array, shape (n_samples - 1, 4)
+        The hierarchy, in the format of
+        :func:`scipy.cluster.hierarchy.linkage`.
+
+    References
+    ----------
+    `Müllner, D. (2011). Modern hierarchical, agglomerative clustering
+    algorithms. arXiv preprint arXiv:1109.2378.
+    <https://arxiv.org/abs/1109.2378>`__
     """
 
     def __init__(self, n_clusters, linkage='ward', measure='precomputed',
-                 n_jobs=1):
-        self.agglomerative = skAgglomerative(n_clusters=n_clusters,
-                                             affinity='precomputed')
+                 dtype=np.float64, copy=True, n_jobs=1):
         self.n_clusters = n_clusters
+        self.linkage = linkage
         self.measure = measure
+        self.dtype = dtype
+        self.copy = copy
         self.n_jobs = n_jobs
 
+        if linkage not in ('ward', 'complete', 'average', 'single'):
+            raise ValueError("'%s' is not a supported linkage" % linkage)
+
     def fit_predict(self, X):
+        """Fits and returns the predictions for the given test data.
+
+        Parameters
+        ----------
+        X : array-like, shape (n_samples, max_length, n_features)
+            Input data. If measure == 'precomputed', then X is a distance
+            matrix with shape (n_samples, n_samples) or its condensed form
+            (the upper triangle as a 1-D array, as returned by
+            :func:`scipy.spatial.distance.pdist`).
+
+        Returns
+        -------
+        predictions : array-like, shape (n_samples)
+            Assigned cluster for each input sample.
+        """
         if self.measure != 'precomputed':
-            self.distances = 1 - pairwise_similarity(X=X, measure=self.measure,
-                                                     n_jobs=self.n_jobs)
+            self._n_samples = len(X)
+            distances = pairwise_similarity(X=X, measure=self.measure,
+                                            condensed=True, dtype=self.dtype,
+                                            n_jobs=self.n_jobs)
+            np.subtract(1, distances, out=distances)
         else:
-            self.distances = np.array(X)
+            distances = np.asarray(X)
+
+            if distances.ndim == 2:
+                self._n_samples = len(distances)
+                distances = squareform(distances, checks=False)
+            else:
+                # An empty condensed matrix is the one of a single sample
+                self._n_samples = max(
+                    int(np.ceil(np.sqrt(2 * len(distances)))), 1)
 
-        self.labels = self.agglomerative.fit_predict(self.distances)
+            distances = distances.astype(self.dtype, copy=False)
+
+        # The hierarchy is built in place over the condensed matrix
+        self.distances = distances if self.copy else None
+
+        if self.copy:
+            distances = distances.copy()
+
+        self.dendrogram = _nn_chain(distances, self.linkage) \
+            if self._n_samples > 1 else np.zeros((0, 4))
+        self.labels = self.cut(n_clusters=self.n_clusters)
         return self.labels
+
+    def cut(self, n_clusters=None, height=None):
+        """Cuts the dendrogram built by `fit_predict` without recomputing it.
+
+        Parameters
+        ----------
+        n_clusters : int (default=None)
+            The number of clusters to cut the dendrogram into.
+        height : float (default=None)
+            The distance at which to cut the dendrogram. Only used if
+            `n_clusters` is ``None``.
+
+        Returns
+        -------
+        predictions : array-like, shape (n_samples)
+            Assigned cluster for each input sample.
+        """
+        if len(self.dendrogram) == 0:
+            return np.zeros(self._n_samples, dtype=int)
+
+        if n_clusters is not None:
+            labels = fcluster(self.dendrogram, n_clusters,
+                              criterion='maxclust')
+        else:
+            labels = fcluster(self.dendrogram, height, criterion='distance')
+
+        return labels - 1
+
+
+def _condensed_row(n, i):
+    # Positions of the distances between i and every object in the condensed
+    # matrix (the position of i itself is meaningless)
+    j = np.r_[0:n]
+    lo, hi = np.minimum(i, j), np.maximum(i, j)
+    return n * lo - lo * (lo + 1) // 2 + hi - lo - 1
+
+
+def _nn_chain(distances, linkage):
+    n = int(np.ceil(np.sqrt(2 * len(distances))))
+    sizes = np.ones(n)
+    active = np.ones(n, dtype=bool)
+    dendrogram = np.zeros((n - 1, 4))
+    chain = []
+
+    for k in range(n - 1):
+        if not chain:
+            chain.append(np.argmax(active))
+
+        while True:
+            x = chain[-1]
+            row_x = _condensed_row(n, x)
+            d_x = distances[row_x].astype(float)
+            d_x[~active] = np.inf
+            d_x[x] = np.inf
+            y = d_x.argmin()
+
+            # Ties are resolved in favor of the previous element of the chain
+            if len(chain) > 1 and d_x[chain[-2]] <= d_x[y]:
+                y = chain[-2]
+                break
+
+            chain.append(y)
+
+        chain = chain[:-2]
+        d_xy = d_x[y]
+        x, y = min(x, y), max(x, y)
+        row_x = _condensed_row(n, x)
+        d_x = distances[row_x].astype(float)
+        d_y = distances[_condensed_row(n, y)].astype(float)
+
+        if linkage == 'single':
+            merged = np.minimum(d_x, d_y)
+        elif linkage == 'complete':
+            merged = np.maximum(d_x, d_y)
+        elif linkage == 'average':
+            merged = (sizes[x] * d_x + sizes[y] * d_y) / (sizes[x] + sizes[y])
+        else:
+            merged = np.sqrt(np.maximum(0, ((sizes[x] + sizes) * d_x ** 2 +
+                                            (sizes[y] + sizes) * d_y ** 2 -
+                                            sizes * d_xy ** 2) /
+                                        (sizes[x] + sizes[y] + sizes)))
+
+        dendrogram[k] = [x, y, d_xy, sizes[x] + sizes[y]]
+        active[y] = False
+        sizes[x] += sizes[y]
+        update = active.copy()
+        update[x] = False
+        distances[row_x[update]] = merged[update]
+
+    # Merges are sorted by distance and relabeled as in scipy, where the
+    # cluster created by the k-th merge is labeled n + k
+    dendrogram = dendrogram[np.argsort(dendrogram[:, 2], kind='mergesort')]
+    parent = np.r_[0:2 * n - 1]
+
+    def find(i):
+        root = i
+        while parent[root] != root:
+            root = parent[root]
+        while parent[i] != root:
+            parent[i], i = root, parent[i]
+        return root
+
+    for k in range(n - 1):
+        a = find(int(dendrogram[k, 0]))
+        b = find(int(dendrogram[k, 1]))
+        dendrogram[k, :2] = min(a, b), max(a, b)
+        parent[a] = parent[b] = n + k
+
+    return dendrogram
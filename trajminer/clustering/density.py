@@ -1,7 +1,10 @@
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import connected_components
 from sklearn.cluster import DBSCAN as skDBSCAN
 import numpy as np
 
 from .base import Clustering
+from ..similarity.graph import radius_neighbors_graph
 from ..similarity.pairwise import pairwise_similarity
 
 
@@ -16,6 +19,21 @@ class DBSCAN(Clustering):
     min_samples : int (default=5)
         The minimum number of trajectories in a neighborhood for a trajectory
         to be considered as a core point, including the trajectory itself.
+    algorithm : str (default='matrix')
+        A string in {'matrix', 'region'}:
+
+            - If 'matrix', then the full distance matrix is computed.
+            - If 'region', then only the neighborhoods of trajectories are
+              computed (see
+              :func:`trajminer.similarity.radius_neighbors_graph`), which
+              requires memory linear in the number of trajectories and
+              neighbor pairs. If `measure='precomputed'`, then the input of
+              `fit_predict` must be a (sparse) neighborhood graph.
+    index : object (default=None)
+        An index fitted on the input data used for retrieving candidate
+        neighbors when `algorithm='region'` (e.g.
+        :class:`trajminer.similarity.GeohashLSH`). If ``None``, then all
+        pairs of trajectories are checked.
     measure : SimilarityMeasure object or str (default='precomputed')
         The similarity measure to use for computing similarities (see
         :mod:`trajminer.similarity`) or the string 'precomputed'.
@@ -30,16 +48,33 @@ class DBSCAN(Clustering):
     <https://www.aaai.org/Papers/KDD/1996/KDD96-037.pdf>`__
     """
 
-    def __init__(self, eps=0.5, min_samples=5, measure='precomputed',
-                 n_jobs=1):
+    def __init__(self, eps=0.5, min_samples=5, algorithm='matrix', index=None,
+                 measure='precomputed', n_jobs=1):
         self.dbscan = skDBSCAN(eps=eps, min_samples=min_samples,
                                metric='precomputed', n_jobs=n_jobs)
         self.eps = eps
         self.min_samples = min_samples
+        self.algorithm = algorithm
+        self.index = index
         self.measure = measure
         self.n_jobs = n_jobs
 
+        if algorithm not in ('matrix', 'region'):
+            raise ValueError("'%s' is not a supported algorithm" % algorithm)
+
     def fit_predict(self, X):
+        if self.algorithm == 'region':
+            if self.measure != 'precomputed':
+                self.distances = radius_neighbors_graph(
+                    X=X, radius=self.eps, measure=self.measure,
+                    index=self.index, n_jobs=self.n_jobs)
+            else:
+                self.distances = csr_matrix(X)
+
+            self.labels = _graph_dbscan(self.distances, self.eps,
+                                        self.min_samples)
+            return self.labels
+
         if self.measure != 'precomputed':
             self.distances = 1 - pairwise_similarity(X=X, measure=self.measure,
                                                      n_jobs=self.n_jobs)
@@ -48,3 +83,32 @@ class DBSCAN(Clustering):
 
         self.labels = self.dbscan.fit_predict(self.distances)
         return self.labels
+
+
+def _graph_dbscan(graph, eps, min_samples):
+    # Neighborhoods are the stored entries of the graph within eps (the
+    # trajectory itself is implicitly part of its neighborhood)
+    graph = csr_matrix(graph).tocoo()
+    n = graph.shape[0]
+    keep = (graph.data <= eps) & (graph.row != graph.col)
+    neighbors = csr_matrix((np.ones(keep.sum(), dtype=np.int8),
+                            (graph.row[keep], graph.col[keep])), shape=(n, n))
+
+    core = np.diff(neighbors.indptr) + 1 >= min_samples
+    labels = np.full(n, -1)
+
+    # Clusters are the connected components of core trajectories
+    core_idxs = np.flatnonzero(core)
+    _, components = connected_components(neighbors[core_idxs][:, core_idxs],
+                                         directed=False)
+    labels[core_idxs] = components
+
+    # Border trajectories join the cluster of their first core neighbor
+    for i in np.flatnonzero(~core):
+        row = neighbors.indices[neighbors.indptr[i]:neighbors.indptr[i + 1]]
+        row = row[core[row]]
+
+        if len(row) > 0:
+            labels[i] = labels[row.min()]
+
+    return labels
@@ -0,0 +1,300 @@
+from scipy.sparse import csr_matrix, issparse
+from scipy.sparse.csgraph import connected_components, minimum_spanning_tree
+import numpy as np
+
+from .base import Clustering
+from ..similarity.graph import kneighbors_graph, radius_neighbors_graph
+
+
+class HDBSCAN(Clustering):
+    """Hierarchical density-based clustering over a sparse neighborhood
+    graph.
+
+    A k-nearest-neighbor (or eps-radius) graph is built once with the given
+    similarity measure. The minimum spanning tree of the mutual reachability
+    distances over this graph encodes the clusterings of all density levels,
+    so :meth:`extract` can produce DBSCAN-like clusterings for any `eps` (or
+    HDBSCAN clusterings for any `min_cluster_size`) without computing
+    similarities again.
+
+    Parameters
+    ----------
+    min_samples : int (default=5)
+        The minimum number of trajectories in a neighborhood for a trajectory
+        to be considered as a core point, including the trajectory itself.
+    min_cluster_size : int (default=5)
+        The minimum number of trajectories of a cluster when clusters are
+        selected by stability (i.e. when `eps` is ``None``).
+    eps : float (default=None)
+        If given, then `fit_predict` returns the clustering at this density
+        level (as in :class:`trajminer.clustering.DBSCAN`). Otherwise, the
+        most stable clusters of the hierarchy are returned.
+    n_neighbors : int (default=None)
+        The number of neighbors of each trajectory in the k-nearest-neighbor
+        graph. If ``None``, then `min_samples` neighbors are used. Ignored if
+        `max_eps` is given.
+    max_eps : float (default=None)
+        If given, then an eps-radius graph with this radius is built instead
+        of a k-nearest-neighbor graph. Clusterings extracted for any
+        ``eps <= max_eps`` are then exactly the ones of DBSCAN.
+    index : object (default=None)
+        An index fitted on the input data used for retrieving candidate
+        neighbors (e.g. :class:`trajminer.similarity.GeohashLSH`). If
+        ``None``, then all pairs of trajectories are checked.
+    measure : SimilarityMeasure object or str (default='precomputed')
+        The similarity measure to use for computing similarities (see
+        :mod:`trajminer.similarity`) or the string 'precomputed'. If
+        'precomputed', then the input of `fit_predict` is either a distance
+        matrix or a sparse neighborhood graph.
+    n_jobs : int (default=1)
+        The number of parallel jobs.
+
+    References
+    ----------
+    `Campello, R. J., Moulavi, D., & Sander, J. (2013, April). Density-based
+    clustering based on hierarchical density estimates. In Pacific-Asia
+    conference on knowledge discovery and data mining (pp. 160-172).
+    Springer. <https://doi.org/10.1007/978-3-642-37456-2_14>`__
+    """
+
+    def __init__(self, min_samples=5, min_cluster_size=5, eps=None,
+                 n_neighbors=None, max_eps=None, index=None,
+                 measure='precomputed', n_jobs=1):
+        self.min_samples = min_samples
+        self.min_cluster_size = min_cluster_size
+        self.eps = eps
+        self.n_neighbors = n_neighbors
+        self.max_eps = max_eps
+        self.index = index
+        self.measure = measure
+        self.n_jobs = n_jobs
+
+        if min_cluster_size < 2:
+            raise ValueError("'min_cluster_size' must be at least 2!")
+
+    def fit_predict(self, X):
+        if self.measure != 'precomputed':
+            if self.max_eps is not None:
+                self.distances = radius_neighbors_graph(
+                    X=X, radius=self.max_eps, measure=self.measure,
+                    index=self.index, n_jobs=self.n_jobs)
+            else:
+                n_neighbors = self.n_neighbors if self.n_neighbors \
+                    else self.min_samples
+                self.distances = kneighbors_graph(
+                    X=X, n_neighbors=n_neighbors, measure=self.measure,
+                    index=self.index, n_jobs=self.n_jobs)
+        elif issparse(X):
+            self.distances = csr_matrix(X)
+        else:
+            X = np.asarray(X)
+            rows, cols = np.nonzero(~np.eye(len(X), dtype=bool))
+            self.distances = csr_matrix((X[rows, cols], (rows, cols)),
+                                        shape=X.shape)
+
+        self._build_tree()
+        self.labels = self.extract(eps=self.eps)
+        return self.labels
+
+    def extract(self, eps=None, min_cluster_size=None):
+        """Extracts a clustering from the hierarchy built by `fit_predict`.
+
+        Parameters
+        ----------
+        eps : float (default=None)
+            The density level of the clustering, i.e. the maximum distance
+            between two trajectories for them to be considered in the same
+            neighborhood. If ``None``, then the most stable clusters are
+            selected.
+        min_cluster_size : int (default=None)
+            The minimum number of trajectories of a cluster when `eps` is
+            ``None``. If ``None``, then the value given to the constructor is
+            used.
+
+        Returns
+        -------
+        predictions : array-like, shape (n_samples)
+            Assigned cluster for each input sample (``-1`` for noise).
+        """
+        if eps is not None:
+            return self._extract_level(eps)
+
+        if min_cluster_size is None:
+            min_cluster_size = self.min_cluster_size
+
+        return self._extract_stable(min_cluster_size)
+
+    def _build_tree(self):
+        graph = self.distances.tocoo()
+        n = graph.shape[0]
+        keep = graph.row != graph.col
+        rows, cols, dists = graph.row[keep], graph.col[keep], graph.data[keep]
+
+        # Core distances (the trajectory itself counts as a neighbor)
+        order = np.lexsort((dists, rows))
+        rows, cols, dists = rows[order], cols[order], dists[order]
+        starts = np.searchsorted(rows, np.r_[0:n])
+        counts = np.bincount(rows, minlength=n)
+        self.core_distances = np.full(n, np.inf)
+
+        if self.min_samples <= 1:
+            self.core_distances[:] = 0
+        else:
+            has_core = counts >= self.min_samples - 1
+            self.core_distances[has_core] = \
+                dists[starts[has_core] + self.min_samples - 2]
+
+        # Mutual reachability distances over the (symmetrized) graph edges,
+        # with edge keys in 64 bits since n * n overflows 32-bit indices
+        lo, hi = np.minimum(rows, cols), np.maximum(rows, cols)
+        _, first = np.unique(lo.astype(np.int64) * n + hi, return_index=True)
+        lo, hi, dists = lo[first], hi[first], dists[first]
+        weights = np.maximum(dists, np.maximum(self.core_distances[lo],
+                                               self.core_distances[hi]))
+        finite = np.isfinite(weights)
+
+        # Zero-weight edges would be dropped by the spanning tree
+        weights = np.maximum(weights[finite], np.finfo(float).eps)
+        mst = minimum_spanning_tree(
+            csr_matrix((weights, (lo[finite], hi[finite])), shape=(n, n)))
+        mst = mst.tocoo()
+        order = np.argsort(mst.data, kind='mergesort')
+        self.spanning_tree = np.column_stack((mst.row[order], mst.col[order],
+                                              mst.data[order]))
+
+    def _extract_level(self, eps):
+        n = len(self.core_distances)
+        core = self.core_distances <= eps
+        edges = self.spanning_tree[self.spanning_tree[:, 2] <= eps]
+        tree = csr_matrix((np.ones(len(edges)), (edges[:, 0].astype(int),
+                                                 edges[:, 1].astype(int))),
+                          shape=(n, n))
+        _, components = connected_components(tree, directed=False)
+
+        labels = np.full(n, -1)
+        _, labels[core] = np.unique(components[core], return_inverse=True)
+
+        # Border trajectories join the cluster of their first core neighbor
+        graph = self.distances.tocoo()
+        border = ~core[graph.row] & core[graph.col] & (graph.data <= eps) & \
+            (graph.row != graph.col)
+        rows, cols = graph.row[border], graph.col[border]
+        order = np.lexsort((cols, rows))
+        rows, first = np.unique(rows[order], return_index=True)
+        labels[rows] = labels[cols[order][first]]
+        return labels
+
+    def _extract_stable(self, min_cluster_size):
+        n = len(self.core_distances)
+        children, heights, sizes, roots = _single_linkage(n,
+                                                          self.spanning_tree)
+
+        # Condensed tree: clusters are born when a node splits into two
+        # children of at least min_cluster_size trajectories, and
+        # trajectories fall out of their cluster when they are split away in
+        # smaller groups. Cluster 0 is a virtual root.
+        parent, birth, stability = [-1], [0.], [0.]
+        point_cluster = np.full(n, -1)
+        stack = []
+
+        def new_cluster(c, lam):
+            parent.append(c)
+            birth.append(lam)
+            stability.append(0.)
+            return len(parent) - 1
+
+        def fall_out(node, c, lam):
+            leaves = [node]
+            while leaves:
+                node = leaves.pop()
+                if node < n:
+                    point_cluster[node] = c
+                else:
+                    leaves.extend(children[node - n])
+
+        if len(roots) == 1:
+            stack.append((roots[0], 0))
+        else:
+            for root in roots:
+                if root >= n and sizes[root - n] >= min_cluster_size:
+                    stack.append((root, new_cluster(0, 0.)))
+
+        while stack:
+            node, c = stack.pop()
+            if node < n:
+                continue
+
+            lam = 1 / heights[node - n]
+            a, b = children[node - n]
+            size_a = 1 if a < n else sizes[a - n]
+            size_b = 1 if b < n else sizes[b - n]
+
+            if size_a >= min_cluster_size and size_b >= min_cluster_size:
+                stability[c] += (lam - birth[c]) * (size_a + size_b)
+                stack.append((a, new_cluster(c, lam)))
+                stack.append((b, new_cluster(c, lam)))
+                continue
+
+            for child, size in ((a, size_a), (b, size_b)):
+                if size < min_cluster_size:
+                    fall_out(child, c, lam)
+                    stability[c] += (lam - birth[c]) * size
+                else:
+                    stack.append((child, c))
+
+        # Clusters are selected bottom-up (children are always created after
+        # their parents) when more stable than their selected descendants
+        n_clusters = len(parent)
+        selected = np.zeros(n_clusters, dtype=bool)
+        value = np.array(stability)
+        descendants = np.zeros(n_clusters)
+
+        for c in range(n_clusters - 1, 0, -1):
+            if value[c] >= descendants[c]:
+                selected[c] = True
+            else:
+                value[c] = descendants[c]
+            descendants[parent[c]] += value[c]
+
+        owner = np.full(n_clusters, -1)
+
+        for c in range(1, n_clusters):
+            if owner[parent[c]] != -1:
+                owner[c] = owner[parent[c]]
+            elif selected[c]:
+                owner[c] = c
+
+        owner[0] = -1
+        labels = np.where(point_cluster >= 0, owner[point_cluster], -1)
+        _, labels[labels >= 0] = np.unique(labels[labels >= 0],
+                                           return_inverse=True)
+        return labels
+
+
+def _single_linkage(n, spanning_tree):
+    # Merges of the spanning forest edges in increasing order of weight; the
+    # node created by the k-th merge is labeled n + k
+    parent = np.r_[0:2 * n - 1]
+    children, heights, sizes = [], [], []
+
+    def find(i):
+        root = i
+        while parent[root] != root:
+            root = parent[root]
+        while parent[i] != root:
+            parent[i], i = root, parent[i]
+        return root
+
+    for a, b, height in spanning_tree:
+        a, b = find(int(a)), find(int(b))
+        size_a = 1 if a < n else sizes[a - n]
+        size_b = 1 if b < n else sizes[b - n]
+        node = n + len(children)
+        parent[a] = parent[b] = node
+        children.append((a, b))
+        heights.append(height)
+        sizes.append(size_a + size_b)
+
+    n_nodes = n + len(children)
+    roots = [i for i in range(n_nodes) if parent[i] == i]
+    return children, heights, sizes, roots
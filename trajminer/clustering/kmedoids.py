@@ -1,10 +1,14 @@
-import random
+from joblib import Parallel, delayed
+from sklearn.utils import gen_even_slices
 import numpy as np
 
 from .base import Clustering
 from ..similarity.pairwise import pairwise_similarity
 
 
+_BLOCK_ELEMENTS = 2 ** 22
+
+
 class KMedoids(Clustering):
     """K-Medoids Clustering.
 
@@ -20,12 +24,44 @@ class KMedoids(Clustering):
     seed : int (default=None)
         The random seed to be used for centroid initialization. If ``None``,
         the default seed of NumPy will be used.
+    n_init : int (default=1)
+        The number of times the algorithm is run with different initial
+        medoids. Runs are executed in parallel over the same (read-only)
+        distance matrix and the result with the lowest total distance of
+        trajectories to their medoids is kept. If `init` is 'park' or
+        array-like, then the first run uses it and the remaining ones are
+        randomly initialized. Ignored if `method='clara'`.
     max_iter : int (default=300)
         The maximum number of iterations to run the algorithm, in case it has
         not yet converged.
+    method : str (default='alternate')
+        The algorithm used for optimizing the medoids. Must be one of
+        {'alternate', 'fasterpam', 'clara'}:
+
+            - If 'alternate', then medoids are updated as in
+              [Park et al., 2009], alternating between assigning trajectories
+              to their closest medoid and recomputing the medoid of each
+              cluster.
+            - If 'fasterpam', then medoids are optimized with the swap-based
+              FasterPAM algorithm [Schubert and Rousseeuw, 2021], which
+              evaluates each candidate swap in linear time.
+            - If 'clara', then FasterPAM is run over `n_samples` random
+              samples of the data [Kaufman and Rousseeuw, 1990] and all
+              trajectories are assigned to the best set of medoids found. Only
+              distances to the medoids are computed for the whole dataset, so
+              the full distance matrix is never built. In this case, `init`
+              must be either ``None`` or 'park'.
+    n_samples : int (default=5)
+        The number of samples drawn when `method='clara'`.
+    sample_size : int (default=None)
+        The size of the samples drawn when `method='clara'`. If ``None``,
+        then ``40 + 2 * n_clusters`` trajectories are drawn per sample.
     measure : SimilarityMeasure object or str (default='precomputed')
         The similarity measure to use for computing similarities (see
-        :mod:`trajminer.similarity`) or the string 'precomputed'.
+        :mod:`trajminer.similarity`) or the string 'precomputed'. If
+        'precomputed', the distance matrix given to `fit_predict` may be a
+        :class:`numpy.memmap`, in which case it is read blockwise and never
+        fully loaded into memory for initialization.
     n_jobs : int (default=1)
         The number of parallel jobs.
 
@@ -34,77 +70,275 @@ class KMedoids(Clustering):
     `Park, H. S., & Jun, C. H. (2009). A simple and fast algorithm for
     K-medoids clustering. Expert systems with applications, 36(2), 3336-3341.
     <https://www.sciencedirect.com/science/article/pii/S095741740800081X>`__
+
+    `Schubert, E., & Rousseeuw, P. J. (2021). Fast and eager k-medoids
+    clustering: O(k) runtime improvement of the PAM, CLARA, and CLARANS
+    algorithms. Information Systems, 101, 101804.
+    <https://doi.org/10.1016/j.is.2021.101804>`__
+
+    `Kaufman, L., & Rousseeuw, P. J. (1990). Clustering Large Applications
+    (Program CLARA). In Finding Groups in Data: An Introduction to Cluster
+    Analysis (pp. 126-163). John Wiley & Sons.
+    <https://doi.org/10.1002/9780470316801.ch3>`__
     """
 
-    def __init__(self, n_clusters, init=None, seed=None, max_iter=300,
-                 measure='precomputed', n_jobs=1):
+    def __init__(self, n_clusters, init=None, seed=None, n_init=1,
+                 max_iter=300, method='alternate', n_samples=5,
+                 sample_size=None, measure='precomputed', n_jobs=1):
         self.n_clusters = n_clusters
         self.init = init
         self.seed = seed
+        self.n_init = n_init
         self.max_iter = max_iter
+        self.method = method
+        self.n_samples = n_samples
+        self.sample_size = sample_size
         self.measure = measure
         self.n_jobs = n_jobs
 
+        if method not in ('alternate', 'fasterpam', 'clara'):
+            raise ValueError("'%s' is not a supported method" % method)
+
     def fit_predict(self, X):
+        if self.method == 'clara':
+            return self._fit_predict_clara(X)
+
         if self.measure != 'precomputed':
             self.distances = 1 - pairwise_similarity(X=X, measure=self.measure,
                                                      n_jobs=self.n_jobs)
         else:
-            self.distances = np.array(X)
+            self.distances = np.asarray(X)
 
-        if not self.init:
-            if self.seed is not None:
-                random.seed(self.seed)
+        random_state = np.random.RandomState(self.seed)
+        inits = [self._init_medoids(self.distances, random_state, i > 0)
+                 for i in range(self.n_init)]
 
-            idxs = np.r_[0:len(self.distances)]
-            random.shuffle(idxs)
-            self.medoids = idxs[:self.n_clusters]
-        elif self.init == 'park':
-            scores = np.zeros(len(self.distances))
+        func = delayed(_fit_medoids)
+        runs = Parallel(n_jobs=min(self.n_jobs, self.n_init), verbose=0)(
+            func(self.distances, medoids, self.method, self.max_iter)
+            for medoids in inits)
+        medoids, self.iter, self.cost = min(runs, key=lambda run: run[2])
 
-            for j in range(0, len(self.distances)):
-                scores[j] = 0
-                for i in range(0, len(self.distances)):
-                    scores[j] += self.distances[i][j] / \
-                        np.sum(self.distances[i])
+        self.medoids = np.sort(medoids)
+        d = _medoid_distances(self.distances, self.medoids)
+        self.labels = d.argmin(axis=1) + 1
+        return self.labels
 
-            self.medoids = scores.argsort()[0:self.n_clusters]
+    def _init_medoids(self, distances, random_state, restart=False):
+        if self.init is None or restart:
+            medoids = random_state.permutation(len(distances))
+            medoids = medoids[:self.n_clusters]
+        elif isinstance(self.init, str) and self.init == 'park':
+            scores = _park_scores(distances, self.n_jobs)
+            medoids = scores.argsort()[0:self.n_clusters]
         else:
-            self.medoids = self.init
+            medoids = self.init
 
-        self.medoids = np.sort(self.medoids).astype(int)
-        clusters = {}
+        return np.sort(medoids).astype(int)
 
-        for self.iter in range(1, self.max_iter + 1):
-            new_medoids = np.zeros(self.n_clusters)
+    def _fit_predict_clara(self, X):
+        if self.init is not None and not isinstance(self.init, str):
+            raise ValueError("Initial medoids cannot be given when " +
+                             "method='clara'!")
 
-            d = self.distances[:, self.medoids].argmin(axis=1)
-            clusters = dict(zip(np.r_[0:self.n_clusters],
-                                [np.where(d == k)[0]
-                                 for k in range(self.n_clusters)]))
+        n = len(X)
+        size = self.sample_size if self.sample_size is not None \
+            else 40 + 2 * self.n_clusters
+        size = min(n, max(size, self.n_clusters))
+        random_state = np.random.RandomState(self.seed)
+        best_cost, best_medoids, best_d = np.inf, None, None
 
-            for k in range(self.n_clusters):
-                d = self.distances[np.ix_(clusters[k],
-                                          clusters[k])].mean(axis=1)
-                j = d.argmin()
-                new_medoids[k] = clusters[k][j]
+        for _ in range(self.n_samples):
+            sample = random_state.choice(n, size, replace=False)
 
-            new_medoids = np.sort(new_medoids).astype(int)
+            if best_medoids is not None:
+                # Kept in random order (setdiff1d would sort it and always
+                # drop the highest indices)
+                rest = sample[~np.isin(sample, best_medoids)]
+                sample = np.r_[best_medoids, rest[:size - len(best_medoids)]]
 
-            if np.array_equal(self.medoids, new_medoids):
-                break
+            sample = np.sort(sample)
 
-            self.medoids = new_medoids.copy()
-        else:
-            d = self.distances[:, self.medoids].argmin(axis=1)
-            clusters = dict(zip(np.r_[0:self.n_clusters],
-                                [np.where(d == k)[0]
-                                 for k in range(self.n_clusters)]))
+            if self.measure != 'precomputed':
+                sample_distances = 1 - pairwise_similarity(
+                    X=[X[i] for i in sample], measure=self.measure,
+                    n_jobs=self.n_jobs)
+            else:
+                sample_distances = np.asarray(X)[np.ix_(sample, sample)]
+
+            medoids = self._init_medoids(sample_distances, random_state)
+            medoids, self.iter = _fasterpam(sample_distances, medoids,
+                                            self.max_iter)
+            medoids = np.sort(sample[medoids])
 
-        self.labels = np.zeros(len(self.distances))
+            if self.measure != 'precomputed':
+                d = 1 - pairwise_similarity(X=X, Y=[X[m] for m in medoids],
+                                            measure=self.measure,
+                                            n_jobs=self.n_jobs)
+            else:
+                d = _medoid_distances(np.asarray(X), medoids)
 
-        for key in clusters:
-            self.labels[clusters[key]] = key + 1
+            cost = d.min(axis=1).sum()
 
-        self.labels = self.labels.astype(int)
+            if cost < best_cost:
+                best_cost, best_medoids, best_d = cost, medoids, d
+
+        self.distances = None
+        self.cost = best_cost
+        self.medoids = best_medoids
+        self.labels = best_d.argmin(axis=1) + 1
         return self.labels
+
+
+def _medoid_distances(distances, medoids):
+    # Rows are contiguous (also when memmapped) and the matrix is symmetric
+    return np.asarray(distances[medoids], dtype=float).T
+
+
+def _fit_medoids(distances, medoids, method, max_iter):
+    if method == 'fasterpam':
+        medoids, n_iter = _fasterpam(distances, medoids, max_iter)
+    else:
+        medoids, n_iter = _alternate(distances, medoids, max_iter)
+
+    cost = _medoid_distances(distances, medoids).min(axis=1).sum()
+    return medoids, n_iter, cost
+
+
+def _alternate(distances, medoids, max_iter):
+    n_iter = 0
+
+    for n_iter in range(1, max_iter + 1):
+        labels = _medoid_distances(distances, medoids).argmin(axis=1)
+        costs = _cluster_costs(distances, labels)
+
+        # The new medoid of each cluster is the member with the lowest cost
+        order = np.lexsort((costs, labels))
+        _, first = np.unique(labels[order], return_index=True)
+        new_medoids = medoids.copy()
+        new_medoids[labels[order[first]]] = order[first]
+        new_medoids = np.sort(new_medoids)
+
+        if np.array_equal(medoids, new_medoids):
+            break
+
+        medoids = new_medoids
+
+    return medoids, n_iter
+
+
+def _cluster_costs(distances, labels):
+    # Sum of the distances of each object to the members of its own cluster,
+    # computed over blocks of rows so that no submatrix is ever copied
+    n = len(distances)
+    block_size = max(1, _BLOCK_ELEMENTS // n)
+    costs = np.zeros(n)
+
+    for start in range(0, n, block_size):
+        stop = min(start + block_size, n)
+        same = labels[start:stop, None] == labels[None, :]
+        costs[start:stop] = np.where(same, distances[start:stop], 0) \
+            .sum(axis=1)
+
+    return costs
+
+
+def _nearest_medoids(d):
+    order = np.argsort(d, axis=1)[:, :2]
+    rows = np.r_[0:len(d)]
+    nearest, second = order[:, 0], order[:, -1]
+    return nearest, second, d[rows, nearest], d[rows, second]
+
+
+def _fasterpam(distances, medoids, max_iter):
+    n = len(distances)
+    k = len(medoids)
+    medoids = np.array(medoids, dtype=int)
+
+    if k == 1:
+        return np.array([np.asarray(distances).sum(axis=1).argmin()]), 1
+
+    is_medoid = np.zeros(n, dtype=bool)
+    is_medoid[medoids] = True
+    nearest, second, dn, ds = \
+        _nearest_medoids(_medoid_distances(distances, medoids))
+    removal_loss = np.bincount(nearest, weights=ds - dn, minlength=k)
+    last_swap = -1
+    n_iter = 0
+
+    for n_iter in range(1, max_iter + 1):
+        for c in range(n):
+            if c == last_swap:
+                return medoids, n_iter
+            if is_medoid[c]:
+                continue
+
+            dc = np.asarray(distances[c], dtype=float)
+
+            # Points that would be reassigned to c regardless of the removed
+            # medoid, and points that would move to c only if their nearest
+            # medoid were removed (see Schubert and Rousseeuw, 2021)
+            closer = dc < dn
+            between = ~closer & (dc < ds)
+            shared = (dc[closer] - dn[closer]).sum()
+            delta = removal_loss + \
+                np.bincount(nearest[closer], weights=dn[closer] -
+                            ds[closer], minlength=k) + \
+                np.bincount(nearest[between], weights=dc[between] -
+                            ds[between], minlength=k)
+            m = delta.argmin()
+
+            if delta[m] + shared >= -1e-12:
+                continue
+
+            is_medoid[medoids[m]] = False
+            is_medoid[c] = True
+            medoids[m] = c
+            last_swap = c
+
+            # Only points whose nearest or second nearest medoid was swapped
+            # out need to be compared against all medoids again
+            stale = (nearest == m) | (second == m)
+            fresh = ~stale
+            first = fresh & (dc < dn)
+            runner_up = fresh & ~first & (dc < ds)
+            second[first], ds[first] = nearest[first], dn[first]
+            nearest[first], dn[first] = m, dc[first]
+            second[runner_up], ds[runner_up] = m, dc[runner_up]
+
+            if stale.any():
+                idxs = np.flatnonzero(stale)
+                d = np.asarray(distances[np.ix_(idxs, medoids)], dtype=float)
+                nearest[idxs], second[idxs], dn[idxs], ds[idxs] = \
+                    _nearest_medoids(d)
+
+            removal_loss = np.bincount(nearest, weights=ds - dn, minlength=k)
+
+        if last_swap == -1:
+            break
+
+    return medoids, n_iter
+
+
+def _park_scores(distances, n_jobs=1):
+    # v_j = sum_i (d_ij / sum_l d_il), accumulated over blocks of rows
+    func = delayed(_park_scores_slice)
+    scores = Parallel(n_jobs=n_jobs, verbose=0)(
+        func(distances, s) for s in gen_even_slices(len(distances), n_jobs))
+    return np.sum(scores, axis=0)
+
+
+def _park_scores_slice(distances, s):
+    n = distances.shape[1]
+    block_size = max(1, _BLOCK_ELEMENTS // n)
+    scores = np.zeros(n)
+
+    for start in range(s.start, s.stop, block_size):
+        block = np.asarray(distances[start:min(start + block_size, s.stop)],
+                           dtype=float)
+        sums = block.sum(axis=1)
+        weights = np.divide(1, sums, out=np.zeros_like(sums),
+                            where=sums != 0)
+        scores += np.dot(weights, block)
+
+    return scores
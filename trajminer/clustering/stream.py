@@ -0,0 +1,245 @@
+import numpy as np
+
+from .base import Clustering
+from .kmedoids import KMedoids
+from ..similarity.pairwise import pairwise_similarity
+
+
+class StreamClustering(Clustering):
+    """Online trajectory clustering with micro-clusters.
+
+    Trajectories arrive in batches through `partial_fit` and are summarized
+    by a bounded set of micro-clusters, each holding a representative
+    trajectory, a weight and the timestamp of its last update. Arriving
+    trajectories are only compared against the representatives: a trajectory
+    is absorbed by its nearest micro-cluster if their distance (i.e.
+    ``1 - similarity``) is at most `radius`, otherwise it becomes the
+    representative of a new micro-cluster. Weights fade exponentially over
+    time, micro-clusters whose weight drops below `min_weight` are discarded,
+    and the two closest micro-clusters are merged whenever there are more
+    than `max_clusters` of them.
+
+    The distances between representatives are maintained incrementally, so
+    the offline macro-clustering step (see :meth:`macro_cluster`) groups the
+    micro-clusters without computing any similarity.
+
+    Parameters
+    ----------
+    measure : SimilarityMeasure object
+        The similarity measure to use for computing similarities. See
+        :mod:`trajminer.similarity`.
+    radius : float (default=0.5)
+        The maximum distance between a trajectory and the representative of a
+        micro-cluster for it to be absorbed by the micro-cluster.
+    max_clusters : int (default=100)
+        The maximum number of micro-clusters kept.
+    decay : float (default=0)
+        The decay rate of micro-cluster weights: after ``dt`` time units
+        without updates, the weight of a micro-cluster is multiplied by
+        ``2 ** (-decay * dt)``. If 0, then weights never fade.
+    min_weight : float (default=0)
+        Micro-clusters whose (decayed) weight is lower than this value are
+        discarded at the end of each call to `partial_fit`.
+    clusterer : Clustering object (default=None)
+        The clustering algorithm used for grouping micro-clusters. It is
+        given the precomputed distance matrix of the representatives, so it
+        must be built with `measure='precomputed'`. If ``None``, then
+        :class:`trajminer.clustering.KMedoids` with `n_clusters` clusters and
+        Park initialization is used.
+    n_clusters : int (default=None)
+        The number of clusters of the default macro-clustering algorithm.
+        If there are at most `n_clusters` micro-clusters, then each one is
+        assigned to its own cluster. Ignored if `clusterer` is given.
+    n_jobs : int (default=1)
+        The number of parallel jobs.
+
+    References
+    ----------
+    `Aggarwal, C. C., Han, J., Wang, J., & Yu, P. S. (2003, September). A
+    framework for clustering evolving data streams. In Proceedings of the 29th
+    international conference on Very large data bases (pp. 81-92).
+    <https://doi.org/10.1016/B978-012722442-8/50016-1>`__
+
+    `Cao, F., Estert, M., Qian, W., & Zhou, A. (2006, April). Density-based
+    clustering over an evolving data stream with noise. In Proceedings of the
+    2006 SIAM international conference on data mining (pp. 328-339).
+    <https://doi.org/10.1137/1.9781611972764.29>`__
+    """
+
+    def __init__(self, measure, radius=0.5, max_clusters=100, decay=0,
+                 min_weight=0, clusterer=None, n_clusters=None, n_jobs=1):
+        self.measure = measure
+        self.radius = radius
+        self.max_clusters = max_clusters
+        self.decay = decay
+        self.min_weight = min_weight
+        self.clusterer = clusterer
+        self.n_clusters = n_clusters
+        self.n_jobs = n_jobs
+
+        if clusterer is None and n_clusters is None:
+            raise ValueError("Either 'clusterer' or 'n_clusters' must be " +
+                             "given!")
+        if max_clusters < 2:
+            raise ValueError("'max_clusters' must be at least 2!")
+
+        self.representatives = []
+        self.weights = np.zeros(0)
+        self.timestamps = np.zeros(0)
+        self.distances = np.zeros((0, 0))
+        self.macro_labels = None
+        self.time = 0
+
+    def partial_fit(self, X, timestamps=None):
+        """Updates the micro-clusters with a batch of trajectories.
+
+        Parameters
+        ----------
+        X : :class:`trajminer.TrajectoryData` or array-like, shape \
+                (n_samples, max_length, n_features)
+            Input data.
+        timestamps : array-like, shape (n_samples) (default=None)
+            The (non-decreasing) arrival time of each trajectory. If ``None``,
+            then time is measured in number of arrived trajectories.
+
+        Returns
+        -------
+        self : object
+            Returns self.
+        """
+        if hasattr(X, 'get_trajectories'):
+            X = X.get_trajectories()
+
+        if timestamps is None:
+            timestamps = self.time + np.r_[1:len(X) + 1]
+
+        # Distances to the representatives existing before the batch are
+        # computed at once (and in parallel); only representatives created
+        # within the batch are compared one by one
+        n_old = len(self.representatives)
+        old = np.zeros((len(X), 0))
+
+        if n_old > 0 and len(X) > 0:
+            old = 1 - pairwise_similarity(X=X, Y=self.representatives,
+                                          measure=self.measure,
+                                          n_jobs=self.n_jobs)
+
+        # Positions of the pre-batch representatives, which shift as
+        # micro-clusters are merged
+        position = np.r_[0:n_old]
+
+        for t, row, ts in zip(X, old, timestamps):
+            d = np.full(len(self.representatives), np.inf)
+            alive = position >= 0
+            d[position[alive]] = row[alive]
+
+            for i in np.flatnonzero(np.isinf(d)):
+                d[i] = 1 - self.measure.similarity(t,
+                                                   self.representatives[i])
+
+            self.time = ts
+            nearest = d.argmin() if len(d) > 0 else -1
+
+            if nearest >= 0 and d[nearest] <= self.radius:
+                self.weights[nearest] = self._decayed_weights(nearest) + 1
+                self.timestamps[nearest] = ts
+                continue
+
+            self.representatives.append(t)
+            self.weights = np.r_[self.weights, 1.]
+            self.timestamps = np.r_[self.timestamps, ts]
+            self.distances = np.block([[self.distances, d[:, None]],
+                                       [d[None], np.zeros((1, 1))]])
+
+            if len(self.representatives) > self.max_clusters:
+                removed = self._merge_closest()
+                position[position == removed] = -1
+                position[position > removed] -= 1
+
+        self._remove(np.flatnonzero(self._decayed_weights() <
+                                    self.min_weight))
+        self.macro_labels = None
+        return self
+
+    def macro_cluster(self):
+        """Groups the micro-clusters with the macro-clustering algorithm.
+
+        Returns
+        -------
+        labels : array-like, shape (n_micro_clusters)
+            Assigned cluster for each micro-cluster.
+        """
+        clusterer = self.clusterer
+        n_micro = len(self.distances)
+
+        # Early in a stream there may be fewer micro-clusters than clusters,
+        # in which case each one is a cluster of its own
+        if clusterer is None and n_micro <= self.n_clusters:
+            self.macro_labels = np.r_[0:n_micro]
+            return self.macro_labels
+
+        if clusterer is None:
+            clusterer = KMedoids(n_clusters=self.n_clusters, init='park',
+                                 measure='precomputed', n_jobs=self.n_jobs)
+
+        self.macro_labels = np.asarray(clusterer.fit_predict(self.distances))
+        return self.macro_labels
+
+    def predict(self, X):
+        """Assigns trajectories to the macro-cluster of their nearest
+        micro-cluster. The macro-clustering step is run if the micro-clusters
+        changed since it was last run.
+
+        Parameters
+        ----------
+        X : :class:`trajminer.TrajectoryData` or array-like, shape \
+                (n_samples, max_length, n_features)
+            Input data.
+
+        Returns
+        -------
+        predictions : array-like, shape (n_samples)
+            Assigned cluster for each input sample.
+        """
+        if hasattr(X, 'get_trajectories'):
+            X = X.get_trajectories()
+
+        if self.macro_labels is None:
+            self.macro_cluster()
+
+        d = 1 - pairwise_similarity(X=X, Y=self.representatives,
+                                    measure=self.measure, n_jobs=self.n_jobs)
+        return self.macro_labels[d.argmin(axis=1)]
+
+    def fit_predict(self, X):
+        self.partial_fit(X)
+        self.labels = self.predict(X)
+        return self.labels
+
+    def _decayed_weights(self, idxs=slice(None)):
+        elapsed = self.time - self.timestamps[idxs]
+        return self.weights[idxs] * 2 ** (-self.decay * elapsed)
+
+    def _merge_closest(self):
+        d = self.distances + np.diag(np.full(len(self.distances), np.inf))
+        i, j = np.unravel_index(d.argmin(), d.shape)
+        weights = self._decayed_weights([i, j])
+
+        # The heavier micro-cluster keeps its representative
+        keep, drop = (i, j) if weights[0] >= weights[1] else (j, i)
+        self.weights[keep] = weights.sum()
+        self.timestamps[keep] = self.time
+        self._remove([drop])
+        return drop
+
+    def _remove(self, idxs):
+        if len(idxs) == 0:
+            return
+
+        keep = np.ones(len(self.representatives), dtype=bool)
+        keep[idxs] = False
+        self.representatives = [r for r, k in zip(self.representatives, keep)
+                                if k]
+        self.weights = self.weights[keep]
+        self.timestamps = self.timestamps[keep]
+        self.distances = self.distances[np.ix_(keep, keep)]
@@ -1,11 +1,23 @@
 """Preprocessing tools.
 """
+from .bag_of_cells import BagOfCells
+from .features import FeatureExtractor
 from .filter import filter_trajectory_length
 from .filter import filter_label_size
 from .filter import filter_duplicate_points
+from .one_hot import OneHotEncoder
+from .pipeline import Pipeline
+from .resampling import TrajectoryResampler
 from .segmentation import TrajectorySegmenter
+from .simplification import TrajectorySimplifier
 
-__all__ = ['filter_trajectory_length',
+__all__ = ['BagOfCells',
+           'FeatureExtractor',
+           'filter_trajectory_length',
            'filter_label_size',
            'filter_duplicate_points',
-           'TrajectorySegmenter']
+           'OneHotEncoder',
+           'Pipeline',
+           'TrajectoryResampler',
+           'TrajectorySegmenter',
+           'TrajectorySimplifier']
@@ -0,0 +1,180 @@
+from joblib import Parallel, delayed
+from scipy.sparse import csr_matrix
+from sklearn.feature_extraction.text import TfidfTransformer
+from sklearn.utils import gen_even_slices
+import numpy as np
+
+from ..utils.geohash import Geohash
+
+
+class BagOfCells(object):
+    """Encodes trajectories as TF-IDF weighted bags of geohash cells.
+
+    Each point contributes one token per precision (the geohash cell it
+    falls into) and one token per categorical attribute (its value). Since
+    output rows are L2-normalized by default, the cosine similarity between
+    all trajectories is the sparse product ``X_out.dot(X_out.T)``, which can
+    be used as a standalone similarity or for pruning candidate pairs before
+    computing a measure from :mod:`trajminer.similarity`.
+
+    Parameters
+    ----------
+    lat_lon : str (default='lat_lon')
+        The attribute holding the ``[lat, lon]`` pair of trajectory points.
+    precision : int or array-like (default=7)
+        The geohash precision (or precisions) of the cell tokens.
+    categorical : array-like (default=None)
+        The categorical attributes whose values are included as tokens.
+    norm : str (default='l2')
+        The norm of output rows, one of {'l1', 'l2', None}.
+    use_idf : bool (default=True)
+        If `True`, then token counts are weighted by their inverse document
+        frequency.
+    sublinear_tf : bool (default=False)
+        If `True`, then token counts are replaced by ``1 + log(count)``.
+    n_jobs : int (default=1)
+        The number of parallel jobs.
+
+    Examples
+    --------
+    >>> from trajminer.preprocessing import BagOfCells
+    >>> bag = BagOfCells(precision=[5, 7], categorical=['poi'])
+    >>> vectors = bag.fit_transform(data)
+    >>> cosine = vectors.dot(vectors.T)
+    """
+
+    def __init__(self, lat_lon='lat_lon', precision=7, categorical=None,
+                 norm='l2', use_idf=True, sublinear_tf=False, n_jobs=1):
+        self.lat_lon = lat_lon
+        self.precision = precision
+        self.categorical = categorical if categorical is not None else []
+        self.norm = norm
+        self.use_idf = use_idf
+        self.sublinear_tf = sublinear_tf
+        self.n_jobs = n_jobs
+        self.precisions = np.sort(np.atleast_1d(precision)).astype(int)
+        self.tfidf = TfidfTransformer(norm=norm, use_idf=use_idf,
+                                      sublinear_tf=sublinear_tf)
+
+    def fit(self, X):
+        """Learns the token vocabulary and the inverse document frequencies.
+
+        Parameters
+        ----------
+        X : :class:`trajminer.TrajectoryData`
+            Input dataset.
+
+        Returns
+        -------
+        self : object
+            Returns self.
+        """
+        self.fit_transform(X)
+        return self
+
+    def fit_transform(self, X):
+        """Learns the token vocabulary and the inverse document frequencies,
+        then transforms X.
+
+        Parameters
+        ----------
+        X : :class:`trajminer.TrajectoryData`
+            Input dataset.
+
+        Returns
+        -------
+        X_out : scipy.sparse.csr_matrix, shape (n_trajectories, n_tokens)
+            The TF-IDF vector of each trajectory.
+        """
+        owner, tokens = self._tokens(X)
+        self.vocabularies = [np.unique(t) for t in tokens]
+        return self.tfidf.fit_transform(self._counts(X, owner, tokens))
+
+    def transform(self, X):
+        """Transforms X into TF-IDF vectors. Tokens not seen by `fit` are
+        ignored.
+
+        Parameters
+        ----------
+        X : :class:`trajminer.TrajectoryData`
+            Input dataset.
+
+        Returns
+        -------
+        X_out : scipy.sparse.csr_matrix, shape (n_trajectories, n_tokens)
+            The TF-IDF vector of each trajectory.
+        """
+        owner, tokens = self._tokens(X)
+        return self.tfidf.transform(self._counts(X, owner, tokens))
+
+    def get_feature_names(self):
+        """Retrieves the tokens of the output columns.
+
+        Returns
+        -------
+        names : list
+            Geohash cells (in Base32) followed by ``attribute=value`` tokens.
+        """
+        geohash = Geohash()
+        names = []
+
+        for precision, cells in zip(self.precisions, self.vocabularies):
+            names.extend(geohash.to_base32(cells, precision))
+
+        for attr, values in zip(self.categorical,
+                                self.vocabularies[len(self.precisions):]):
+            names.extend(attr + '=' + v for v in values)
+
+        return names
+
+    def _tokens(self, X):
+        # Trajectory index of every point and, for each precision and
+        # categorical attribute, the token of every point
+        attributes = list(X.get_attributes())
+        lat_lon = attributes.index(self.lat_lon)
+        categorical = [attributes.index(attr) for attr in self.categorical]
+        trajs = X.get_trajectories()
+
+        func = delayed(_point_tokens)
+        ret = Parallel(n_jobs=self.n_jobs, verbose=0)(
+            func(trajs[s], lat_lon, self.precisions, categorical)
+            for s in gen_even_slices(len(trajs), self.n_jobs))
+
+        owner = np.repeat(np.r_[0:len(trajs)],
+                          [len(t) for t in trajs])
+        n_tokens = len(self.precisions) + len(categorical)
+        tokens = [np.concatenate([job[k] for job in ret])
+                  for k in range(n_tokens)]
+        return owner, tokens
+
+    def _counts(self, X, owner, tokens):
+        rows, cols = [], []
+        offset = 0
+
+        for values, vocabulary in zip(tokens, self.vocabularies):
+            idxs = np.searchsorted(vocabulary, values)
+            idxs[idxs == len(vocabulary)] = 0
+            known = vocabulary[idxs] == values if len(vocabulary) > 0 \
+                else np.zeros(len(values), dtype=bool)
+            rows.append(owner[known])
+            cols.append(idxs[known] + offset)
+            offset += len(vocabulary)
+
+        rows, cols = np.concatenate(rows), np.concatenate(cols)
+        return csr_matrix((np.ones(len(rows)), (rows, cols)),
+                          shape=(X.length(), offset))
+
+
+def _point_tokens(trajs, lat_lon, precisions, categorical):
+    precision = precisions[-1]
+    points = [p for t in trajs for p in t]
+    coords = np.array([p[lat_lon] for p in points], dtype=float) \
+        .reshape(-1, 2)
+    cells = Geohash().encode_many(coords[:, 0], coords[:, 1], precision) \
+        .astype(np.int64)
+
+    # Cells at lower precisions are prefixes of the finest ones
+    tokens = [cells >> 5 * (precision - p) for p in precisions]
+    tokens.extend(np.array([str(p[k]) for p in points], dtype=object)
+                  .astype(str) for k in categorical)
+    return tokens
@@ -0,0 +1,251 @@
+from joblib import Parallel, delayed
+from sklearn.utils import gen_even_slices
+import numpy as np
+
+from ..utils.distance import haversine
+
+
+_STATISTICS = ['min', 'mean', 'std', 'max']
+
+
+class FeatureExtractor(object):
+    """Extracts fixed-length descriptors of trajectories.
+
+    The points of all trajectories are processed as flat arrays, so every
+    descriptor is computed with vectorized operations over the whole dataset
+    (or over one batch of trajectories per job). The following features are
+    computed for each trajectory:
+
+        - ``n_points``, ``distance`` (total traveled distance in meters) and
+          ``duration`` (total time span).
+        - The min, mean, std and max of the ``step`` (distance between
+          consecutive points), ``speed``, ``acceleration``, ``turn``
+          (absolute turning angle, in radians) and ``dwell`` (time spent
+          between consecutive points closer than `dwell_radius`) values.
+        - The bounding box (``min_lat``, ``min_lon``, ``max_lat``,
+          ``max_lon``) and the ``gyration`` radius in meters.
+        - The relative frequency of each value of the categorical
+          attributes.
+
+    Features depending on time are only computed if `time` is given.
+    Statistics of trajectories without the corresponding values (e.g. the
+    acceleration of trajectories with less than three points) are set to 0.
+
+    Parameters
+    ----------
+    lat_lon : str (default='lat_lon')
+        The attribute holding the ``[lat, lon]`` pair of trajectory points.
+    time : str (default=None)
+        The attribute holding the (numeric) timestamps of trajectory points.
+        Speeds are measured in meters per time unit.
+    categorical : array-like (default=None)
+        The categorical attributes to compute histograms for.
+    dwell_radius : float (default=50)
+        The maximum distance in meters between consecutive points for the
+        time between them to count as dwell time.
+    n_jobs : int (default=1)
+        The number of parallel jobs.
+
+    Examples
+    --------
+    >>> from trajminer.preprocessing import FeatureExtractor
+    >>> extractor = FeatureExtractor(time='time', categorical=['poi'])
+    >>> features = extractor.fit_transform(data)
+    >>> names = extractor.get_feature_names()
+    """
+
+    def __init__(self, lat_lon='lat_lon', time=None, categorical=None,
+                 dwell_radius=50, n_jobs=1):
+        self.lat_lon = lat_lon
+        self.time = time
+        self.categorical = categorical if categorical is not None else []
+        self.dwell_radius = dwell_radius
+        self.n_jobs = n_jobs
+
+    def fit(self, X):
+        """Learns the values of the categorical attributes.
+
+        Parameters
+        ----------
+        X : :class:`trajminer.TrajectoryData`
+            Input dataset.
+
+        Returns
+        -------
+        self : object
+            Returns self.
+        """
+        attributes = list(X.get_attributes())
+        self.vocabularies = {}
+
+        for attr in self.categorical:
+            k = attributes.index(attr)
+            self.vocabularies[attr] = np.unique(
+                [str(p[k]) for t in X.get_trajectories() for p in t])
+
+        return self
+
+    def fit_transform(self, X):
+        """Learns the values of the categorical attributes, then transforms
+        X.
+
+        Parameters
+        ----------
+        X : :class:`trajminer.TrajectoryData`
+            Input dataset.
+
+        Returns
+        -------
+        X_out : array, shape (n_trajectories, n_features)
+            The descriptors of each trajectory.
+        """
+        return self.fit(X).transform(X)
+
+    def transform(self, X):
+        """Computes the descriptors of trajectories in X.
+
+        Parameters
+        ----------
+        X : :class:`trajminer.TrajectoryData`
+            Input dataset.
+
+        Returns
+        -------
+        X_out : array, shape (n_trajectories, n_features)
+            The descriptors of each trajectory.
+        """
+        attributes = list(X.get_attributes())
+        lat_lon = attributes.index(self.lat_lon)
+        time = attributes.index(self.time) if self.time is not None else None
+        categorical = [(attributes.index(attr), self.vocabularies[attr])
+                       for attr in self.categorical]
+        trajs = X.get_trajectories()
+
+        func = delayed(_extract)
+        ret = Parallel(n_jobs=self.n_jobs, verbose=0)(
+            func(trajs[s], lat_lon, time, categorical, self.dwell_radius)
+            for s in gen_even_slices(len(trajs), self.n_jobs))
+        return np.vstack(ret)
+
+    def get_feature_names(self):
+        """Retrieves the names of the computed features.
+
+        Returns
+        -------
+        names : list
+            A list of length `n_features`.
+        """
+        names = ['n_points', 'distance']
+        measures = ['step']
+
+        if self.time is not None:
+            names.append('duration')
+            measures.extend(['speed', 'acceleration'])
+
+        measures.append('turn')
+
+        if self.time is not None:
+            measures.append('dwell')
+
+        names.extend(m + '_' + stat for m in measures for stat in _STATISTICS)
+        names.extend(['min_lat', 'min_lon', 'max_lat', 'max_lon', 'gyration'])
+
+        for attr in self.categorical:
+            names.extend(attr + '=' + v for v in self.vocabularies[attr])
+
+        return names
+
+
+def _extract(trajs, lat_lon, time, categorical, dwell_radius):
+    n = len(trajs)
+    lengths = np.array([len(t) for t in trajs], dtype=int)
+    owner = np.repeat(np.r_[0:n], lengths)
+    points = np.array([p[lat_lon] for t in trajs for p in t],
+                      dtype=float).reshape(-1, 2)
+
+    # Segments between consecutive points of the same trajectory
+    inner = owner[1:] == owner[:-1]
+    seg_owner = owner[1:][inner]
+    step = haversine(points[:-1], points[1:])[inner]
+    features = [lengths, np.bincount(seg_owner, weights=step, minlength=n)]
+    stats = [_group_stats(step, seg_owner, n)]
+
+    delta = np.diff(points, axis=0)[inner]
+    bearing = np.arctan2(delta[:, 1] * np.cos(np.radians(points[1:, 0]
+                                                         [inner])),
+                         delta[:, 0])
+    same = seg_owner[1:] == seg_owner[:-1]
+    turn = np.abs(np.angle(np.exp(1j * np.diff(bearing))))[same]
+    turn_stats = _group_stats(turn, seg_owner[1:][same], n)
+
+    if time is not None:
+        times = np.array([p[time] for t in trajs for p in t], dtype=float)
+        dt = np.diff(times)[inner]
+        first = np.searchsorted(owner, np.r_[0:n])
+        last = first + lengths - 1
+        present = lengths > 0
+        duration = np.zeros(n)
+        duration[present] = times[last[present]] - times[first[present]]
+        features.append(duration)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            speed = step / dt
+            acceleration = np.diff(speed)[same] / dt[1:][same]
+
+        stats.append(_group_stats(speed, seg_owner, n))
+        stats.append(_group_stats(acceleration, seg_owner[1:][same], n))
+        stats.append(turn_stats)
+        dwell = step <= dwell_radius
+        stats.append(_group_stats(dt[dwell], seg_owner[dwell], n))
+    else:
+        stats.append(turn_stats)
+
+    # Bounding box and radius of gyration around the centroid
+    counts = np.maximum(lengths, 1)
+    centroid = np.column_stack([np.bincount(owner, weights=points[:, k],
+                                            minlength=n) / counts
+                                for k in range(2)])
+    gyration = np.sqrt(np.bincount(
+        owner, weights=haversine(points, centroid[owner]) ** 2,
+        minlength=n) / counts)
+    box = [_group_stats(points[:, k], owner, n)[:, [0, 3]] for k in range(2)]
+    box = np.column_stack([box[0][:, 0], box[1][:, 0], box[0][:, 1],
+                           box[1][:, 1], gyration])
+
+    histograms = []
+
+    for k, vocabulary in categorical:
+        values = np.array([str(p[k]) for t in trajs for p in t])
+        idxs = np.searchsorted(vocabulary, values)
+        idxs[idxs == len(vocabulary)] = 0
+        known = vocabulary[idxs] == values if len(vocabulary) > 0 \
+            else np.zeros(len(values), dtype=bool)
+        hist = np.bincount(owner[known] * len(vocabulary) + idxs[known],
+                           minlength=n * len(vocabulary))
+        histograms.append(hist.reshape(n, len(vocabulary)) / counts[:, None])
+
+    return np.column_stack(features + stats + [box] + histograms)
+
+
+def _group_stats(values, groups, n):
+    # Min, mean, std and max of the (finite) values of each group, where
+    # groups are sorted; groups without values get zeros
+    valid = np.isfinite(values)
+    values, groups = values[valid], groups[valid]
+    counts = np.bincount(groups, minlength=n)
+    present = counts > 0
+    stats = np.zeros((n, 4))
+
+    if not present.any():
+        return stats
+
+    mean = np.bincount(groups, weights=values, minlength=n)[present] / \
+        counts[present]
+    sq = np.bincount(groups, weights=values ** 2, minlength=n)[present] / \
+        counts[present]
+    starts = np.searchsorted(groups, np.flatnonzero(present))
+    stats[present, 0] = np.minimum.reduceat(values, starts)
+    stats[present, 1] = mean
+    stats[present, 2] = np.sqrt(np.maximum(sq - mean ** 2, 0))
+    stats[present, 3] = np.maximum.reduceat(values, starts)
+    return stats
@@ -1,8 +1,13 @@
 from joblib import Parallel, delayed
 from sklearn.utils import gen_even_slices
 import numpy as np
+import pandas as pd
 
+from .segmentation import _breaks
 from ..trajectory_data import TrajectoryData
+from ..utils.arrays import object_array
+from ..utils.batches import TrajectoryBatches
+from ..utils.distance import haversine
 
 
 def filter_trajectory_length(data, min_length, max_length, inplace=True,
@@ -11,8 +16,9 @@ def filter_trajectory_length(data, min_length, max_length, inplace=True,
 
     Parameters
     ----------
-    data : :class:`trajminer.TrajectoryData`
-        The dataset to be filtered.
+    data : :class:`trajminer.TrajectoryData` or \
+            :class:`trajminer.utils.TrajectoryBatches`
+        The dataset to be filtered, or batches of it.
     min_length : int
         The minimum length required (inclusive) to keep trajectories in the
         dataset. If `None`, then no minimum length is enforced.
@@ -23,52 +29,23 @@ def filter_trajectory_length(data, min_length, max_length, inplace=True,
         If `True` modifies the current object, otherwise returns a new
         object.
     n_jobs : int (default=1)
-        The number of parallel jobs.
+        The number of parallel jobs. Unused, since trajectories are selected
+        with a single mask over their lengths.
 
     Returns
     -------
-    dataset : :class:`trajminer.TrajectoryData`
+    dataset : :class:`trajminer.TrajectoryData` or \
+            :class:`trajminer.utils.TrajectoryBatches`
         The filtered dataset. If `inplace=True`, then returns the modified
-        current object.
+        current object. If `data` are batches, then the lazily filtered
+        batches are returned.
     """
-    has_labels = data.get_labels() is not None
-    tids = data.get_tids()
-
-    def filter_slice(s):
-        n_tids, n_data, n_labels = [], [], []
-
-        for i in range(s.start, s.stop):
-            tid = tids[i]
-            traj = data.get_trajectory(tid)
-
-            if (min_length is not None and len(traj) < min_length) or \
-               (max_length is not None and len(traj) > max_length):
-                continue
-
-            n_tids.append(tid)
-            n_data.append(traj)
+    if not isinstance(data, TrajectoryData):
+        return _batches(data).map(lambda batch: filter_trajectory_length(
+            batch, min_length, max_length, inplace))
 
-            if has_labels:
-                n_labels.append(data.get_label(tid))
-
-        return n_tids, n_data, n_labels
-
-    func = delayed(filter_slice)
-    ret = Parallel(n_jobs=n_jobs, verbose=0)(
-        func(s) for s in gen_even_slices(len(tids), n_jobs))
-
-    n_tids, n_data, n_labels = [], [], []
-
-    for job in ret:
-        n_tids.extend(job[0])
-        n_data.extend(job[1])
-        n_labels.extend(job[2])
-
-    if inplace:
-        data._update(data.get_attributes(), n_data, n_tids, n_labels)
-        return data
-
-    return TrajectoryData(data.get_attributes(), n_data, n_tids, n_labels)
+    return _select(data, _within(data.get_lengths(), min_length, max_length),
+                   inplace)
 
 
 def filter_label_size(data, min_size, max_size, inplace=True, n_jobs=1):
@@ -77,8 +54,10 @@ def filter_label_size(data, min_size, max_size, inplace=True, n_jobs=1):
 
     Parameters
     ----------
-    data : :class:`trajminer.TrajectoryData`
-        The dataset to be filtered.
+    data : :class:`trajminer.TrajectoryData` or \
+            :class:`trajminer.utils.TrajectoryBatches`
+        The dataset to be filtered, or batches of it. Batches are iterated
+        twice: once for counting labels and once for filtering.
     min_size : int
         The minimum number of trajectories (inclusive) required of a certain
         label to keep it in the dataset. If `None`, then no minimum size is
@@ -91,59 +70,25 @@ def filter_label_size(data, min_size, max_size, inplace=True, n_jobs=1):
         If `True` modifies the current object, otherwise returns a new
         object.
     n_jobs : int (default=1)
-        The number of parallel jobs.
+        The number of parallel jobs. Unused, since trajectories are selected
+        with a single mask over label counts.
 
     Returns
     -------
-    dataset : :class:`trajminer.TrajectoryData`
+    dataset : :class:`trajminer.TrajectoryData` or \
+            :class:`trajminer.utils.TrajectoryBatches`
         The filtered dataset. If `inplace=True`, then returns the modified
-        current object.
+        current object. If `data` are batches, then the lazily filtered
+        batches are returned.
     """
-    labels = data.get_labels(unique=True)
-
-    def filter_slice(s):
-        labels_to_keep = []
-
-        for i in range(s.start, s.stop):
-            label = labels[i]
-            size = len(data.get_trajectories(label))
+    if not isinstance(data, TrajectoryData):
+        return _filter_label_size_batches(_batches(data), min_size, max_size,
+                                          inplace)
 
-            if (min_size is not None and size < min_size) or \
-               (max_size is not None and size > max_size):
-                continue
-            labels_to_keep.append(label)
-
-        n_tids, n_data, n_labels = [], [], []
-
-        for i, tid in enumerate(data.get_tids()):
-            traj = data.get_trajectory(tid)
-            label = data.get_label(tid)
-
-            if label not in labels_to_keep:
-                continue
-
-            n_tids.append(tid)
-            n_data.append(traj)
-            n_labels.append(label)
-
-        return n_tids, n_data, n_labels
-
-    func = delayed(filter_slice)
-    ret = Parallel(n_jobs=n_jobs, verbose=0)(
-        func(s) for s in gen_even_slices(len(labels), n_jobs))
-
-    n_tids, n_data, n_labels = [], [], []
-
-    for job in ret:
-        n_tids.extend(job[0])
-        n_data.extend(job[1])
-        n_labels.extend(job[2])
-
-    if inplace:
-        data._update(data.get_attributes(), n_data, n_tids, n_labels)
-        return data
-
-    return TrajectoryData(data.get_attributes(), n_data, n_tids, n_labels)
+    _, inverse, counts = np.unique(data.get_labels(), return_inverse=True,
+                                   return_counts=True)
+    return _select(data, _within(counts, min_size, max_size)[inverse],
+                   inplace)
 
 
 def filter_duplicate_points(data, criterium, remove_first=True, inplace=True,
@@ -152,16 +97,28 @@ def filter_duplicate_points(data, criterium, remove_first=True, inplace=True,
 
     Parameters
     ----------
-    data : :class:`trajminer.TrajectoryData`
-        The dataset to be filtered.
-    criterium : callable
-        A callable that takes two trajectory points and decides wheter or not
-        they are duplicates. If `True`, then one of the points is removed from
-        the dataset (the first or the last point, depending on the
-        `remove_first` parameter).
+    data : :class:`trajminer.TrajectoryData` or \
+            :class:`trajminer.utils.TrajectoryBatches`
+        The dataset to be filtered, or batches of it.
+    criterium : dict or callable
+        If a dictionary, then consecutive points are duplicates if, for every
+        attribute in the dictionary (e.g. dict['time'] is the tolerance for
+        attribute `time`), the absolute difference between their values is
+        at most the given tolerance. For ``[lat, lon]`` attributes, the
+        haversine distance (in meters) is used instead, and a tolerance of
+        ``None`` requires equal values. Dictionaries are evaluated for all
+        points at once, except that, with `remove_first=False` and non-zero
+        tolerances, the points following removed ones are compared with the
+        last kept point one step at a time (for all trajectories at once).
+
+        If a callable, then it takes two trajectory points and decides wheter
+        or not they are duplicates. If `True`, then one of the points is
+        removed from the dataset (the first or the last point, depending on
+        the `remove_first` parameter).
     remove_first : bool (default=True)
         If `True`, then whenever duplicates are found, the first point is
-        removed. Otherwise, the last one is removed from the dataset.
+        removed. Otherwise, the last one is removed from the dataset, and the
+        next point is compared with the kept one.
     inplace : bool (default=True)
         If `True` modifies the current object, otherwise returns a new
         object.
@@ -170,35 +127,29 @@ def filter_duplicate_points(data, criterium, remove_first=True, inplace=True,
 
     Returns
     -------
-    dataset : :class:`trajminer.TrajectoryData`
+    dataset : :class:`trajminer.TrajectoryData` or \
+            :class:`trajminer.utils.TrajectoryBatches`
         The filtered dataset. If `inplace=True`, then returns the modified
-        current object.
+        current object. If `data` are batches, then the lazily filtered
+        batches are returned.
     """
-    tids = data.get_tids()
+    if not isinstance(data, TrajectoryData):
+        return _batches(data).map(lambda batch: filter_duplicate_points(
+            batch, criterium, remove_first, inplace, n_jobs))
 
-    def filter_slice(s):
-        n_data = []
+    trajs = data.get_trajectories()
 
-        for t in range(s.start, s.stop):
-            traj = np.copy(data.get_trajectory(tids[t]))
-            i = 1
+    if isinstance(criterium, dict):
+        attributes = list(data.get_attributes())
+        criterium = [(attributes.index(attr), tolerance)
+                     for attr, tolerance in criterium.items()]
 
-            while i < len(traj):
-                if not criterium(traj[i-1], traj[i]):
-                    i += 1
-                elif remove_first:
-                    traj = np.delete(traj, i-1, axis=0)
-                else:
-                    traj = np.delete(traj, i, axis=0)
-            n_data.append(traj)
-
-        return n_data
-
-    func = delayed(filter_slice)
+    func = delayed(_filter_duplicates)
     ret = Parallel(n_jobs=n_jobs, verbose=0)(
-        func(s) for s in gen_even_slices(len(tids), n_jobs))
+        func(trajs[s], criterium, remove_first)
+        for s in gen_even_slices(len(trajs), n_jobs))
 
-    n_data = np.concatenate(ret)
+    n_data = object_array([t for job in ret for t in job])
 
     if inplace:
         data._update(data.get_attributes(), n_data, data.get_tids(),
@@ -207,3 +158,188 @@ def filter_duplicate_points(data, criterium, remove_first=True, inplace=True,
 
     return TrajectoryData(data.get_attributes(), n_data, data.get_tids(),
                           data.get_labels())
+
+
+def _filter_duplicates(trajs, criterium, remove_first):
+    lengths = np.array([len(t) for t in trajs], dtype=int)
+
+    if callable(criterium):
+        keep = np.concatenate([_keep_callable(t, criterium, remove_first)
+                               for t in trajs] + [np.zeros(0, dtype=bool)])
+    else:
+        # Consecutive points are duplicates where no tolerance is exceeded
+        duplicates = ~_breaks(trajs, criterium, 'any', False)
+        duplicates[np.cumsum(lengths)[lengths > 0] - lengths[lengths > 0]] = \
+            False
+
+        if remove_first:
+            keep = ~np.r_[duplicates[1:], False]
+        else:
+            keep = ~duplicates
+
+            # Points are compared with the last kept point, which is only
+            # the previous one up to the first duplicate. Since tolerances
+            # other than exact equality are not transitive, the points
+            # following removed ones are compared again
+            if any(tolerance for _, tolerance in criterium):
+                keep = _keep_last(trajs, criterium, duplicates, lengths)
+
+    # Each trajectory is compacted once
+    n_data = []
+
+    for t, mask in zip(trajs, np.split(keep, np.cumsum(lengths)[:-1])):
+        if isinstance(t, np.ndarray):
+            n_data.append(t[mask])
+        else:
+            n_data.append([p for p, k in zip(t, mask) if k])
+
+    return n_data
+
+
+def _keep_callable(traj, criterium, remove_first):
+    keep = np.ones(len(traj), dtype=bool)
+    last = 0
+
+    for i in range(1, len(traj)):
+        if not criterium(traj[last], traj[i]):
+            last = i
+        elif remove_first:
+            keep[last] = False
+            last = i
+        else:
+            keep[i] = False
+
+    return keep
+
+
+def _keep_last(trajs, criterium, duplicates, lengths):
+    # Points right after a kept point are decided by the comparison with the
+    # previous point, so the scan starts at the first duplicate of each
+    # trajectory and steps through the points following removed ones (for
+    # all trajectories at once), jumping to the next duplicate whenever a
+    # point is kept
+    n = len(duplicates)
+    keep = np.ones(n, dtype=bool)
+    columns = _columns(trajs, criterium)
+    idxs = np.where(duplicates, np.r_[0:n], n)
+    next_duplicate = np.r_[np.minimum.accumulate(idxs[::-1])[::-1], n]
+
+    ends = np.cumsum(lengths)
+    pos = next_duplicate[ends - lengths]
+    scanned = pos < ends
+    pos, ends = pos[scanned], ends[scanned]
+    anchor = pos - 1
+
+    while len(pos) > 0:
+        duplicate = _pairs_duplicate(columns, criterium, anchor, pos)
+        keep[pos[duplicate]] = False
+
+        pos = np.where(duplicate, pos + 1, next_duplicate[pos + 1])
+        anchor = np.where(duplicate, anchor, pos - 1)
+        scanned = pos < ends
+        pos, anchor, ends = pos[scanned], anchor[scanned], ends[scanned]
+
+    return keep
+
+
+def _columns(trajs, criterium):
+    # Values of each criterium attribute (as codes for exact comparisons)
+    # and the mask of missing values
+    columns = []
+
+    for k, tolerance in criterium:
+        values = np.array([p[k] for t in trajs for p in t] + [None],
+                          dtype=object)[:-1]
+        missing = pd.isnull(values)
+        present = np.array(list(values[~missing]))
+
+        if tolerance is None:
+            present = np.unique(present, axis=0 if present.ndim == 2
+                                else None, return_inverse=True)[1]
+            column = np.zeros(len(values), dtype=int)
+        elif present.ndim == 2:
+            column = np.zeros((len(values), 2))
+        else:
+            column = np.zeros(len(values))
+
+        column[~missing] = present
+        columns.append((column, missing))
+
+    return columns
+
+
+def _pairs_duplicate(columns, criterium, first, second):
+    # Dictionary criteria (as evaluated by _breaks) for pairs of points
+    duplicate = np.ones(len(first), dtype=bool)
+
+    for (column, missing), (_, tolerance) in zip(columns, criterium):
+        duplicate &= ~(missing[first] | missing[second])
+
+        if tolerance is None:
+            duplicate &= column[first] == column[second]
+        elif column.ndim == 2:
+            duplicate &= haversine(column[first], column[second]) <= tolerance
+        else:
+            duplicate &= np.abs(column[second] - column[first]) <= tolerance
+
+    return duplicate
+
+
+def _filter_label_size_batches(batches, min_size, max_size, inplace):
+    if not batches.is_reiterable():
+        raise ValueError("Batches must be re-iterable for counting labels!")
+
+    def transform(stream):
+        # First pass: label counts of each batch are merged
+        uniques, counts = [], []
+
+        for batch in batches:
+            u, c = np.unique(batch.get_labels(), return_counts=True)
+            uniques.append(u)
+            counts.append(c)
+
+        labels = np.zeros(0)
+
+        if len(uniques) > 0:
+            labels, inverse = np.unique(np.concatenate(uniques),
+                                        return_inverse=True)
+            counts = np.bincount(inverse, weights=np.concatenate(counts))
+            labels = labels[_within(counts, min_size, max_size)]
+
+        for batch in stream:
+            yield _select(batch, np.isin(batch.get_labels(), labels),
+                          inplace)
+
+    return TrajectoryBatches(batches, transform)
+
+
+def _batches(data):
+    if isinstance(data, TrajectoryBatches):
+        return data
+
+    return TrajectoryBatches(data)
+
+
+def _within(values, min_value, max_value):
+    mask = np.ones(len(values), dtype=bool)
+
+    if min_value is not None:
+        mask &= values >= min_value
+    if max_value is not None:
+        mask &= values <= max_value
+
+    return mask
+
+
+def _select(data, mask, inplace):
+    # Trajectories (and their points) are shared with the original dataset
+    labels = data.get_labels()
+    n_data = data.get_trajectories()[mask]
+    n_tids = data.get_tids()[mask]
+    n_labels = np.asarray(labels)[mask] if labels is not None else None
+
+    if inplace:
+        data._update(data.get_attributes(), n_data, n_tids, n_labels)
+        return data
+
+    return TrajectoryData(data.get_attributes(), n_data, n_tids, n_labels)
@@ -1,62 +1,324 @@
+from scipy.sparse import csr_matrix
+import numpy as np
+
+
 class OneHotEncoder(object):
     """Encode trajectory features as the concatenation of the one-hot numeric
     array for each feature.
+
+    The vocabulary of each feature is learned from value counts computed over
+    all points at once, and can be updated with batches of trajectories
+    through `partial_fit`. Values are matched by their string
+    representation, where integral floats are written as integers (so ``1``
+    and ``1.0`` are the same value, e.g. in batches where a column was made
+    float by missing values) and sequences such as ``[lat, lon]`` pairs are
+    written element by element. Encoded data is returned as a sparse CSR
+    matrix with one row per point or per trajectory.
+
+    Parameters
+    ----------
+    features : array-like (default=None)
+        The indices of the features to encode. If ``None``, then all features
+        are encoded.
+    min_frequency : int (default=1)
+        The minimum number of occurrences of a value for it to be included in
+        the vocabulary of its feature.
+    handle_unknown : str (default='bucket')
+        A string in {'bucket', 'ignore'}:
+
+            - If 'bucket', then each feature gets an additional column for
+              values not in its vocabulary (unknown or infrequent values).
+            - If 'ignore', then these values are encoded as all zeros.
+    output : str (default='points')
+        A string in {'points', 'trajectories'}:
+
+            - If 'points', then each point is encoded as a row, and the rows
+              of the points of each trajectory are consecutive.
+            - If 'trajectories', then each trajectory is encoded as a row,
+              holding the number of its points with each value.
+
+    Attributes
+    ----------
+    vocabularies : list
+        The sorted (string) values of the vocabulary of each feature.
+    values : list
+        An original value for each entry of `vocabularies`.
+    offsets : array, shape (n_encoded_features + 1)
+        The first column of each feature, followed by the number of
+        columns.
+
+    Examples
+    --------
+    >>> from trajminer.preprocessing import OneHotEncoder
+    >>> encoder = OneHotEncoder(features=[0, 1], min_frequency=5)
+    >>> X_out = encoder.fit_transform(data)
+    >>> X_out.shape
+    (n_points, n_columns)
+    >>> encoder.inverse_transform(X_out, lengths=data.get_lengths())
     """
 
-    def __init__(self):
-        pass
+    def __init__(self, features=None, min_frequency=1,
+                 handle_unknown='bucket', output='points'):
+        self.features = features
+        self.min_frequency = min_frequency
+        self.handle_unknown = handle_unknown
+        self.output = output
+        self._counts = None
+
+        if handle_unknown not in ['bucket', 'ignore']:
+            raise ValueError("'handle_unknown' must be one of {'bucket', " +
+                             "'ignore'}!")
+        if output not in ['points', 'trajectories']:
+            raise ValueError("'output' must be one of {'points', " +
+                             "'trajectories'}!")
 
     def fit(self, X):
         """Fit OneHotEncoder to X.
 
         Parameters
         ----------
-        X : array-like, shape (n_samples, max_length, n_features)
-            Input data for setting up the encoder.
+        X : array-like, shape (n_samples, max_length, n_features), \
+                :class:`trajminer.TrajectoryData` or \
+                :class:`trajminer.utils.TrajectoryBatches`
+            Input data for setting up the encoder. Batches are fed to
+            `partial_fit` one at a time.
+
+        Returns
+        -------
+        self : object
+            Returns self.
         """
-        pass
+        self._counts = None
+
+        if not hasattr(X, 'is_reiterable'):
+            return self.partial_fit(X)
+
+        for batch in X:
+            self.partial_fit(batch)
+
+        return self
+
+    def partial_fit(self, X):
+        """Updates the vocabularies with the values in X.
+
+        Parameters
+        ----------
+        X : array-like, shape (n_samples, max_length, n_features) or \
+                :class:`trajminer.TrajectoryData`
+            Input data (e.g. a batch of a larger dataset).
+
+        Returns
+        -------
+        self : object
+            Returns self.
+        """
+        points, _, _ = _points(X)
+
+        # Empty batches (e.g. batches left empty by filters) have nothing to
+        # learn, and the features are set by the first non-empty one
+        if len(points) == 0:
+            return self
+
+        if self._counts is None:
+            self._feature_idxs = list(range(len(points[0]))) \
+                if self.features is None else list(self.features)
+            self._counts = [(np.zeros(0, dtype=str), np.zeros(0, dtype=int),
+                             np.zeros(0, dtype=object))
+                            for _ in self._feature_idxs]
+
+        for k, (feature, state) in enumerate(zip(self._feature_idxs,
+                                                 self._counts)):
+            originals = _column(points, feature)
+            uniques, first, counts = np.unique(_keys(originals),
+                                               return_index=True,
+                                               return_counts=True)
+
+            # Counts are merged with the ones of previous batches
+            keys = np.concatenate([state[0], uniques])
+            originals = np.concatenate([state[2], originals[first]])
+            uniques, first, inverse = np.unique(keys, return_index=True,
+                                                return_inverse=True)
+            counts = np.bincount(inverse, minlength=len(uniques),
+                                 weights=np.r_[state[1], counts])
+            self._counts[k] = (uniques, counts.astype(int), originals[first])
+
+        self._update_vocabularies()
+        return self
 
     def fit_transform(self, X):
         """Fit OneHotEncoder to X, then transform X.
 
         Parameters
         ----------
-        X : array-like, shape (n_samples, max_length, n_features)
+        X : array-like, shape (n_samples, max_length, n_features) or \
+                :class:`trajminer.TrajectoryData`
             Input data to encode.
 
         Returns
         -------
-        X_out : array-like
+        X_out : scipy.sparse.csr_matrix, shape (n_points, n_columns) or \
+                (n_samples, n_columns)
             Transformed input.
         """
-        pass
+        _check_not_batches(X)
+        return self.fit(X).transform(X)
 
     def transform(self, X):
         """Transform X.
 
         Parameters
         ----------
-        X : array-like, shape (n_samples, max_length, n_features)
+        X : array-like, shape (n_samples, max_length, n_features) or \
+                :class:`trajminer.TrajectoryData`
             Input data to encode.
 
         Returns
         -------
-        X_out : array-like
-            Transformed input.
+        X_out : scipy.sparse.csr_matrix, shape (n_points, n_columns) or \
+                (n_samples, n_columns)
+            Transformed input. Rows hold points if `output='points'` and
+            trajectories otherwise.
         """
-        pass
+        _check_not_batches(X)
+        points, owner, n_trajs = _points(X)
+        rows, cols = [], []
+
+        for k, vocabulary in enumerate(self.vocabularies):
+            keys = _keys(_column(points, self._feature_idxs[k]))
+            idxs = np.searchsorted(vocabulary, keys)
+            idxs[idxs == len(vocabulary)] = 0
+            known = vocabulary[idxs] == keys if len(vocabulary) > 0 \
+                else np.zeros(len(keys), dtype=bool)
+            idxs[~known] = len(vocabulary)
+
+            if self.handle_unknown == 'ignore':
+                idxs, row = idxs[known], np.flatnonzero(known)
+            else:
+                row = np.r_[0:len(keys)]
 
-    def inverse_transform(self, X):
+            rows.append(row)
+            cols.append(idxs + self.offsets[k])
+
+        rows = np.concatenate(rows + [np.zeros(0, dtype=int)])
+        cols = np.concatenate(cols + [np.zeros(0, dtype=int)])
+
+        # Duplicate entries (points of a trajectory with the same value) are
+        # summed up by the CSR conversion
+        if self.output == 'trajectories':
+            rows, n_rows = owner[rows], n_trajs
+        else:
+            n_rows = len(points)
+
+        return csr_matrix((np.ones(len(rows)), (rows, cols)),
+                          shape=(n_rows, self.offsets[-1]))
+
+    def inverse_transform(self, X, lengths=None):
         """Convert X back to its original representation.
 
         Parameters
         ----------
-        X : array-like, shape (n_samples, max_length, ?)
-            Input data to decode.
+        X : scipy.sparse matrix, shape (n_points, n_columns)
+            Input data to decode, with one row per point.
+        lengths : array-like, shape (n_samples) (default=None)
+            The number of points of each trajectory. If ``None``, then the
+            decoded points are returned as a single array.
+
+        Returns
+        -------
+        X_out : array, shape (n_points, n_encoded_features) or list
+            The decoded values of the encoded features of each point, where
+            values in the unknown bucket (or ignored) are decoded as
+            ``None``. If `lengths` is given, then a list with the decoded
+            points of each trajectory is returned.
+        """
+        X = csr_matrix(X)
+        columns = np.concatenate(
+            [np.r_[values, None][:self.offsets[k + 1] - self.offsets[k]]
+             for k, values in enumerate(self.values)] +
+            [np.zeros(0, dtype=object)])
+        features = np.repeat(np.r_[0:len(self.values)], np.diff(self.offsets))
+
+        X_out = np.full((X.shape[0], len(self.values)), None, dtype=object)
+        rows = np.repeat(np.r_[0:X.shape[0]], np.diff(X.indptr))
+        nonzero = X.data != 0
+        X_out[rows[nonzero], features[X.indices[nonzero]]] = \
+            columns[X.indices[nonzero]]
+
+        if lengths is None:
+            return X_out
+
+        return np.split(X_out, np.cumsum(lengths)[:-1])
+
+    def get_feature_names(self):
+        """Retrieves the names of the output columns.
 
         Returns
         -------
-        X_out : array-like, shape (n_samples, max_length, n_features)
-            Original data.
+        names : list
+            The ``feature=value`` name of each column, where features are
+            named by their index and unknown buckets are named
+            ``feature=unknown``.
         """
-        pass
+        names = []
+
+        for feature, vocabulary in zip(self._feature_idxs,
+                                       self.vocabularies):
+            names.extend(str(feature) + '=' + v for v in vocabulary)
+
+            if self.handle_unknown == 'bucket':
+                names.append(str(feature) + '=unknown')
+
+        return names
+
+    def _update_vocabularies(self):
+        self.vocabularies, self.values = [], []
+
+        for uniques, counts, originals in self._counts:
+            frequent = counts >= self.min_frequency
+            self.vocabularies.append(uniques[frequent])
+            self.values.append(originals[frequent])
+
+        sizes = [len(v) + (self.handle_unknown == 'bucket')
+                 for v in self.vocabularies]
+        self.offsets = np.r_[0, np.cumsum(sizes)].astype(int)
+
+
+def _check_not_batches(X):
+    # Encoded batches would have to be stacked in memory, so batches are
+    # only accepted for fitting
+    if hasattr(X, 'is_reiterable'):
+        raise ValueError("'X' must be a single dataset, batches must be " +
+                         "transformed one at a time!")
+
+
+def _points(X):
+    # Points of all trajectories, the index of the trajectory of each one
+    # and the number of trajectories
+    if hasattr(X, 'get_trajectories'):
+        X = X.get_trajectories()
+
+    lengths = np.array([len(t) for t in X], dtype=int)
+    points = [p for t in X for p in t]
+    return points, np.repeat(np.r_[0:len(lengths)], lengths), len(lengths)
+
+
+def _column(points, feature):
+    # Values of a feature as an object array (one entry per point, even for
+    # sequences such as [lat, lon])
+    return np.array([p[feature] for p in points] + [None],
+                    dtype=object)[:-1]
+
+
+def _keys(values):
+    # String keys of values, built one by one since values may be sequences
+    return np.array([_key(v) for v in values], dtype=str)
+
+
+def _key(value):
+    if np.ndim(value) > 0:
+        return '[' + ', '.join(_key(v) for v in value) + ']'
+
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+
+    return str(value)
@@ -0,0 +1,215 @@
+from joblib import Parallel, delayed
+from sklearn.utils import gen_even_slices
+import time
+import numpy as np
+
+from .filter import filter_duplicate_points
+from .filter import filter_label_size
+from .filter import filter_trajectory_length
+from .filter import _filter_duplicates, _within
+from .segmentation import TrajectorySegmenter, _segments
+from ..trajectory_data import TrajectoryData
+from ..utils.arrays import object_array
+
+
+class Pipeline(object):
+    """Lazy chain of preprocessing steps.
+
+    Steps are only recorded by `add` and run by `transform`. Consecutive
+    per-trajectory steps (:func:`filter_trajectory_length`,
+    :func:`filter_duplicate_points` and :class:`TrajectorySegmenter`) are
+    fused: each batch of trajectories goes through all of them in a single
+    parallel job. Steps needing the whole dataset (:func:`filter_label_size`)
+    run between fused passes on the labels of the remaining trajectories.
+    Intermediate results are kept as plain arrays of trajectories, so a
+    single :class:`trajminer.TrajectoryData` (and its indexes) is built at
+    the end. The output is the same as the one of running the steps one
+    after the other.
+
+    Parameters
+    ----------
+    n_jobs : int (default=1)
+        The number of parallel jobs.
+
+    Attributes
+    ----------
+    timings : list
+        The ``(name, seconds)`` of each step of the last call to
+        `transform`, followed by the time for building the output dataset.
+        Times of fused steps are summed over all batches.
+
+    Examples
+    --------
+    >>> from trajminer.preprocessing import Pipeline, TrajectorySegmenter
+    >>> from trajminer.preprocessing import filter_trajectory_length
+    >>> from trajminer.preprocessing import filter_duplicate_points
+    >>> from trajminer.preprocessing import filter_label_size
+    >>> segmenter = TrajectorySegmenter(data.get_attributes(),
+    ...                                 thresholds={'time': 60})
+    >>> pipeline = Pipeline(n_jobs=4) \\
+    ...     .add(filter_trajectory_length, min_length=2, max_length=None) \\
+    ...     .add(filter_duplicate_points, criterium={'time': None}) \\
+    ...     .add(segmenter) \\
+    ...     .add(filter_label_size, min_size=10, max_size=None)
+    >>> preprocessed = pipeline.transform(data)
+    >>> pipeline.timings
+    """
+
+    def __init__(self, n_jobs=1):
+        self.n_jobs = n_jobs
+        self.steps = []
+        self.timings = []
+
+    def add(self, step, **params):
+        """Records a preprocessing step.
+
+        Parameters
+        ----------
+        step : callable or :class:`TrajectorySegmenter`
+            One of :func:`filter_trajectory_length`,
+            :func:`filter_duplicate_points`, :func:`filter_label_size` or a
+            :class:`TrajectorySegmenter` object.
+        **params
+            The parameters of filtering functions (except for `data`,
+            `inplace` and `n_jobs`).
+
+        Returns
+        -------
+        self : object
+            Returns self.
+        """
+        if not isinstance(step, TrajectorySegmenter) and \
+                step not in _FILTERS:
+            raise ValueError("'step' must be a filtering function of " +
+                             "trajminer.preprocessing or a " +
+                             "TrajectorySegmenter!")
+
+        self.steps.append((step, params))
+        return self
+
+    def transform(self, X):
+        """Runs the recorded steps over a dataset.
+
+        Parameters
+        ----------
+        X : :class:`trajminer.TrajectoryData`
+            Input dataset.
+
+        Returns
+        -------
+        X_out : :class:`trajminer.TrajectoryData`
+            The preprocessed dataset.
+        """
+        attributes = X.get_attributes()
+        labels = X.get_labels()
+        trajs = object_array(X.get_trajectories())
+        sources = np.r_[0:len(trajs)]
+        tids = np.asarray(X.get_tids())
+        self.timings = []
+        fused = []
+
+        for step, params in self.steps + [(None, None)]:
+            if step is filter_label_size or step is None:
+                trajs, sources, tids = self._run_fused(fused, trajs,
+                                                       sources, tids)
+                fused = []
+
+            if step is filter_label_size:
+                start = time.time()
+                _, inverse, counts = np.unique(
+                    np.asarray(labels)[sources], return_inverse=True,
+                    return_counts=True)
+                mask = _within(counts, params.get('min_size'),
+                               params.get('max_size'))[inverse]
+                trajs, sources, tids = trajs[mask], sources[mask], tids[mask]
+                self.timings.append((_name(step), time.time() - start))
+            elif step is not None:
+                fused.append((step, _resolve(step, params, attributes)))
+
+        start = time.time()
+        labels = np.asarray(labels)[sources] if labels is not None else None
+        X_out = TrajectoryData(attributes, trajs, tids, labels)
+        self.timings.append(('build', time.time() - start))
+        return X_out
+
+    def _run_fused(self, steps, trajs, sources, tids):
+        if len(steps) == 0:
+            return trajs, sources, tids
+
+        slices = list(gen_even_slices(len(trajs), self.n_jobs))
+        func = delayed(_run_batch)
+        ret = Parallel(n_jobs=self.n_jobs, verbose=0)(
+            func(trajs[s], sources[s], tids[s], [kind for _, kind in steps])
+            for s in slices)
+
+        trajs = object_array([t for job in ret for t in job[0]])
+        sources = np.concatenate([job[1] for job in ret] +
+                                 [np.zeros(0, dtype=int)])
+
+        # Segments are numbered within batches, so numbers are shifted by
+        # the segments of previous batches
+        shifts = np.cumsum([0] + [job[3] for job in ret[:-1]])
+        tids = np.concatenate([job[2] + shift if job[3] >= 0 else job[2]
+                               for job, shift in zip(ret, shifts)] +
+                              [tids[:0]])
+
+        timings = np.sum([job[4] for job in ret], axis=0)
+        self.timings.extend((_name(step), elapsed)
+                            for (step, _), elapsed in zip(steps, timings))
+        return trajs, sources, tids
+
+
+_FILTERS = [filter_trajectory_length, filter_duplicate_points,
+            filter_label_size]
+
+
+def _name(step):
+    if isinstance(step, TrajectorySegmenter):
+        return type(step).__name__
+
+    return step.__name__
+
+
+def _resolve(step, params, attributes):
+    # Kind and arguments of a per-trajectory step for batch jobs
+    if isinstance(step, TrajectorySegmenter):
+        return ('segment', step._criteria(attributes), step.mode,
+                step.ignore_missing)
+    elif step is filter_trajectory_length:
+        return ('length', params.get('min_length'), params.get('max_length'))
+
+    criterium = params['criterium']
+
+    if isinstance(criterium, dict):
+        criterium = [(list(attributes).index(attr), tolerance)
+                     for attr, tolerance in criterium.items()]
+
+    return ('duplicates', criterium, params.get('remove_first', True))
+
+
+def _run_batch(trajs, sources, tids, steps):
+    # The number of segments of the last segmentation step is -1 if there is
+    # no segmentation step
+    n_segments = -1
+    timings = []
+
+    for step in steps:
+        start = time.time()
+
+        if step[0] == 'length':
+            lengths = np.array([len(t) for t in trajs], dtype=int)
+            mask = _within(lengths, step[1], step[2])
+            trajs, sources, tids = trajs[mask], sources[mask], tids[mask]
+        elif step[0] == 'duplicates':
+            trajs = object_array(_filter_duplicates(trajs, step[1], step[2]))
+        else:
+            trajectories, starts, stops = _segments(trajs, *step[1:])
+            trajs = object_array([trajs[t][a:b] for t, a, b in
+                                  zip(trajectories, starts, stops)])
+            sources = sources[trajectories]
+            n_segments = len(trajectories)
+            tids = np.r_[1:n_segments + 1]
+
+        timings.append(time.time() - start)
+
+    return trajs, sources, tids, n_segments, timings
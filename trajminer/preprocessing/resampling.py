@@ -0,0 +1,206 @@
+from joblib import Parallel, delayed
+from sklearn.utils import gen_even_slices
+import numpy as np
+
+from ..trajectory_data import TrajectoryData
+from ..utils.arrays import object_array
+from ..utils.batches import TrajectoryBatches
+from ..utils.distance import haversine
+
+
+class TrajectoryResampler(object):
+    """Trajectory resampler.
+
+    Replaces the points of trajectories with points at fixed time intervals
+    or with a fixed number of points evenly spaced along the traveled
+    distance. New points are located over the points of all trajectories at
+    once (by sorting them together with the original points), and their
+    ``[lat, lon]`` pairs (and timestamps, for spatial resampling) are
+    linearly interpolated between the original points around them. Other
+    attributes take the values of the last original point at or before each
+    new point.
+
+    Parameters
+    ----------
+    lat_lon : str (default='lat_lon')
+        The attribute holding the ``[lat, lon]`` pair of trajectory points.
+    time : str (default=None)
+        The attribute holding the (numeric) timestamps of trajectory points.
+        Required for temporal resampling. The points of each trajectory must
+        be sorted by time.
+    interval : float (default=None)
+        The time between consecutive resampled points, starting at the first
+        point of each trajectory. The last resampled point is the last one
+        not after the end of the trajectory.
+    n_points : int (default=None)
+        The number of resampled points of each (non-empty) trajectory,
+        including its first and last points. Exactly one of `interval` and
+        `n_points` must be given.
+    n_jobs : int (default=1)
+        The number of parallel jobs.
+
+    Examples
+    --------
+    >>> from trajminer.preprocessing import TrajectoryResampler
+    >>> resampler = TrajectoryResampler(time='time', interval=60)
+    >>> resampled = resampler.fit_transform(data)
+    >>> resampler = TrajectoryResampler(n_points=50)
+    >>> resampled = resampler.fit_transform(data)
+    """
+
+    def __init__(self, lat_lon='lat_lon', time=None, interval=None,
+                 n_points=None, n_jobs=1):
+        self.lat_lon = lat_lon
+        self.time = time
+        self.interval = interval
+        self.n_points = n_points
+        self.n_jobs = n_jobs
+
+        if (interval is None) == (n_points is None):
+            raise ValueError("Exactly one of 'interval' and 'n_points' " +
+                             "must be given!")
+        if interval is not None and time is None:
+            raise ValueError("'time' must be given for temporal " +
+                             "resampling!")
+        if interval is not None and interval <= 0:
+            raise ValueError("'interval' must be greater than 0!")
+        if n_points is not None and n_points < 1:
+            raise ValueError("'n_points' must be greater than 0!")
+
+    def fit_transform(self, X):
+        """Fit and resample trajectories.
+
+        Parameters
+        ----------
+        X : :class:`trajminer.TrajectoryData` or \
+                :class:`trajminer.utils.TrajectoryBatches`
+            Input dataset to resample, or batches of it.
+
+        Returns
+        -------
+        X_out : :class:`trajminer.TrajectoryData` or \
+                :class:`trajminer.utils.TrajectoryBatches`
+            Resampled dataset, with the same IDs and labels. If `X` are
+            batches, then the lazily resampled batches are returned.
+        """
+        if not isinstance(X, TrajectoryData):
+            return TrajectoryBatches(X).map(self._fit_transform)
+
+        return self._fit_transform(X)
+
+    def _fit_transform(self, X):
+        attributes = list(X.get_attributes())
+        lat_lon = attributes.index(self.lat_lon)
+        time = attributes.index(self.time) if self.time is not None else None
+        trajs = X.get_trajectories()
+
+        if self.interval is not None:
+            lengths = np.array([len(t) for t in trajs], dtype=int)
+            owner = np.repeat(np.r_[0:len(lengths)], lengths)
+            inner = owner[1:] == owner[:-1]
+            times = np.array([p[time] for t in trajs for p in t])
+
+            if (times[1:][inner] < times[:-1][inner]).any():
+                raise ValueError("Points of each trajectory must be sorted " +
+                                 "by '" + self.time + "'!")
+
+        func = delayed(_resample)
+        ret = Parallel(n_jobs=self.n_jobs, verbose=0)(
+            func(trajs[s], len(attributes), lat_lon, time, self.interval,
+                 self.n_points)
+            for s in gen_even_slices(len(trajs), self.n_jobs))
+
+        return TrajectoryData(attributes=X.get_attributes(),
+                              data=object_array([t for job in ret
+                                                 for t in job]),
+                              tids=X.get_tids(),
+                              labels=X.get_labels())
+
+
+def _resample(trajs, n_attributes, lat_lon, time, interval, n_points):
+    n = len(trajs)
+    lengths = np.array([len(t) for t in trajs], dtype=int)
+    offsets = np.cumsum(lengths) - lengths
+    lasts = offsets + lengths - 1
+    owner = np.repeat(np.r_[0:n], lengths)
+    present = lengths > 0
+    points = np.array([p[lat_lon] for t in trajs for p in t],
+                      dtype=float).reshape(-1, 2)
+    times = np.array([p[time] for t in trajs for p in t]) \
+        if time is not None else None
+    inner = owner[1:] == owner[:-1]
+
+    # New points are placed by a key which increases along trajectories:
+    # the time or the traveled distance
+    if interval is not None:
+        keys = times.astype(float)
+        spans = np.zeros(n)
+        spans[present] = keys[lasts[present]] - keys[offsets[present]]
+        counts = np.where(present, np.floor(spans / interval) + 1, 0)
+        counts = counts.astype(int)
+    else:
+        steps = np.where(inner, haversine(points[:-1], points[1:]), 0) \
+            if len(owner) > 1 else np.zeros(0)
+        keys = np.cumsum(np.r_[0, steps])[:len(owner)]
+        keys -= np.repeat(keys[offsets[present]], lengths[present])
+        spans = np.zeros(n)
+        spans[present] = keys[lasts[present]]
+        counts = np.where(present, n_points, 0)
+
+    new_owner = np.repeat(np.r_[0:n], counts)
+    ranks = np.r_[0:counts.sum()] - np.repeat(np.cumsum(counts) - counts,
+                                              counts)
+    starts = np.zeros(n)
+    starts[present] = keys[offsets[present]]
+
+    if interval is not None:
+        targets = starts[new_owner] + ranks * interval
+    else:
+        targets = spans[new_owner] * ranks / max(n_points - 1, 1)
+
+    prev, frac = _locate(keys, owner, targets, new_owner)
+    after = np.minimum(prev + 1, lasts[new_owner])
+    columns = np.empty((len(targets), n_attributes), dtype=object)
+
+    for k in range(n_attributes):
+        if k == lat_lon:
+            pairs = points[prev] + frac[:, None] * (points[after] -
+                                                    points[prev])
+            columns[:, k] = object_array(pairs.tolist())
+        elif k == time and interval is not None:
+            firsts = np.zeros(n, dtype=np.result_type(times, interval))
+            firsts[present] = times[offsets[present]]
+            columns[:, k] = (firsts[new_owner] + ranks * interval).tolist()
+        elif k == time:
+            values = times.astype(float)
+            columns[:, k] = (values[prev] + frac *
+                             (values[after] - values[prev])).tolist()
+        else:
+            values = np.array([p[k] for t in trajs for p in t] + [None],
+                              dtype=object)[:-1]
+            columns[:, k] = values[prev]
+
+    rows = columns.tolist()
+    ends = np.cumsum(counts)
+    return [rows[end - count:end] for end, count in zip(ends, counts)]
+
+
+def _locate(keys, owner, targets, new_owner):
+    # Index of the last point at or before each target (within its
+    # trajectory) and the fraction of the way to the next point
+    n_points = len(keys)
+    order = np.lexsort((np.r_[np.zeros(n_points), np.ones(len(targets))],
+                        np.r_[keys, targets], np.r_[owner, new_owner]))
+    original = order < n_points
+    prev = np.empty(len(targets), dtype=int)
+    prev[order[~original] - n_points] = (np.cumsum(original) - 1)[~original]
+
+    after = np.minimum(prev + 1, max(n_points - 1, 0))
+    same = owner[after] == owner[prev] if n_points > 0 \
+        else np.zeros(0, dtype=bool)
+    span = np.where(same, keys[after] - keys[prev], 0)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        frac = np.where(span > 0, (targets - keys[prev]) / span, 0)
+
+    return prev, frac
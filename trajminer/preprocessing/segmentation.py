@@ -1,28 +1,49 @@
 from joblib import Parallel, delayed
 from sklearn.utils import gen_even_slices
 import numpy as np
+import pandas as pd
 
 from ..trajectory_data import TrajectoryData
+from ..utils.arrays import object_array
+from ..utils.batches import TrajectoryBatches
+from ..utils.distance import haversine
 
 
 class TrajectorySegmenter(object):
     """Trajectory segmenter.
 
+    Built-in criteria are evaluated over all consecutive point pairs at once,
+    as a break mask computed from whole-array differences. Segments are
+    described by position ranges over the points of the input trajectories,
+    so points are never copied.
+
     Parameters
     ----------
     attributes : array-like
         The attributes of a trajectory dataset.
     thresholds : dict (default=None)
-        A dictionary with callables for the attributes that will be used in
-        the segmentation (e.g. dict['time'] is the callable for attribute
-        `time`). A callable takes as input two attribute values and outputs
-        `True` if the trajectory should be segmented and `False` otherwise.
+        A dictionary with the criteria for the attributes that will be used in
+        the segmentation (e.g. dict['time'] is the criterion for attribute
+        `time`). Attributes missing from the dictionary are not used. A
+        criterion can be:
+
+            - A number, in which case trajectories are segmented when the
+              absolute difference between consecutive values is greater than
+              it. For ``[lat, lon]`` attributes, the haversine distance (in
+              meters) between consecutive points is used instead.
+            - ``None``, in which case trajectories are segmented whenever two
+              consecutive values are different.
+            - A callable, which takes as input two attribute values and
+              outputs `True` if the trajectory should be segmented and `False`
+              otherwise. Callables are evaluated for each pair of consecutive
+              points, so they are much slower than the other criteria.
 
         For instance, suppose we have a dataset with a `time` attribute which
         represents the minutes from midnight when a trajectory point was
         recorded. If we'd like to segment trajectories every time there is a
-        distance of more than 60 minutes between points, the callable for time
-        would be defined as::
+        distance of more than 60 minutes between points, the criterion for
+        time would be ``60``. If time wraps around midnight, then a callable
+        is needed::
 
             lambda x, y: abs(y - x) > 60 if y >= x else 60 * 24 - x + y > 60
 
@@ -37,8 +58,9 @@ class TrajectorySegmenter(object):
             - If 'any', then trajectories are segmented when at least one
               threshold is `True` for any attribute.
     ignore_missing : bool (default=False)
-        If `False`, then trajectories are segmented whenever a missing value is
-        found (this behavior changes according to the `mode` parameter).
+        If `False`, then trajectories are segmented whenever a missing value
+        (``None`` or NaN) is found by a built-in criterion (this behavior
+        changes according to the `mode` parameter).
     n_jobs : int (default=1)
         The number of parallel jobs.
     """
@@ -52,71 +74,164 @@ class TrajectorySegmenter(object):
         self.ignore_missing = ignore_missing
 
         if not thresholds:
-            self.thresholds = {}
-
-            for attr in attributes:
-                self.thresholds[attr] = \
-                    lambda x, y: not self.ignore_missing if not x or not y \
-                    else x != y
+            self.thresholds = dict((attr, None) for attr in attributes)
 
     def fit_transform(self, X):
         """Fit and segment trajectories.
 
         Parameters
         ----------
-        X : :class:`trajminer.TrajectoryData`
-            Input dataset to segment.
+        X : :class:`trajminer.TrajectoryData` or \
+                :class:`trajminer.utils.TrajectoryBatches`
+            Input dataset to segment, or batches of it.
 
         Returns
         -------
-        X_out : :class:`trajminer.TrajectoryData`
-            Segmented dataset.
+        X_out : :class:`trajminer.TrajectoryData` or \
+                :class:`trajminer.utils.TrajectoryBatches`
+            Segmented dataset. Each segment is a slice of the corresponding
+            input trajectory (a view, if trajectories are arrays). If `X`
+            are batches, then the lazily segmented batches are returned,
+            where segment IDs continue across batches.
         """
-        tids = X.get_tids()
-
-        def segment(X, s):
-            def check_segment(p1, p2):
-                b = []
-                for i, attr in enumerate(self.attributes):
-                    f = self.thresholds[attr]
-                    b.append(f(p1[i], p2[i]))
-                return np.any(b) if self.mode == 'any' else np.all(b)
-
-            ret = []
-
-            for t in range(s.start, s.stop):
-                subret = []
-                traj = X.get_trajectory(tids[t])
-                s = [traj[0]]
-
-                for i in range(1, len(traj)):
-                    if check_segment(traj[i - 1], traj[i]):
-                        subret.append(s)
-                        s = [traj[i]]
-                    else:
-                        s.append(traj[i])
-                subret.append(s)
-                ret.append(subret)
-
-            return ret
-
-        func = delayed(segment)
-        segments = Parallel(n_jobs=self.n_jobs, verbose=0)(
-            func(X, s) for s in gen_even_slices(len(X.get_trajectories()),
-                                                self.n_jobs))
+        if not isinstance(X, TrajectoryData):
+            return TrajectoryBatches(X, self._transform_batches)
+
+        return self._fit_transform(X)
+
+    def _transform_batches(self, batches):
+        first_tid = 1
+
+        for batch in batches:
+            segmented = self._fit_transform(batch, first_tid)
+            first_tid += segmented.length()
+            yield segmented
+
+    def _fit_transform(self, X, first_tid=1):
+        trajectories, starts, stops = self.segment(X)
+        trajs = X.get_trajectories()
+        segments = object_array([trajs[t][a:b] for t, a, b
+                                 in zip(trajectories, starts, stops)])
+
         labels = X.get_labels()
-        segments = np.squeeze(segments)
         new_labels = None
 
         if labels is not None:
-            new_labels = []
-
-            for idx, l in enumerate(labels):
-                new_labels.extend(np.full(len(segments[idx]), l))
+            new_labels = np.asarray(labels)[trajectories]
 
-        segments = np.squeeze(segments)
-        new_tids = np.r_[1:len(segments) + 1]
+        new_tids = np.r_[first_tid:first_tid + len(segments)]
         return TrajectoryData(attributes=X.get_attributes(),
                               data=segments,
                               tids=new_tids,
                               labels=new_labels)
+
+    def segment(self, X):
+        """Computes the segments of trajectories as position ranges.
+
+        Parameters
+        ----------
+        X : :class:`trajminer.TrajectoryData`
+            Input dataset to segment.
+
+        Returns
+        -------
+        trajectories : array, shape (n_segments)
+            The index of the trajectory of each segment.
+        starts : array, shape (n_segments)
+            The position (within its trajectory) of the first point of each
+            segment.
+        stops : array, shape (n_segments)
+            The position (within its trajectory) after the last point of each
+            segment.
+        """
+        trajs = X.get_trajectories()
+        criteria = self._criteria(X.get_attributes())
+
+        slices = list(gen_even_slices(len(trajs), self.n_jobs))
+        func = delayed(_segments)
+        ret = Parallel(n_jobs=self.n_jobs, verbose=0)(
+            func(trajs[s], criteria, self.mode, self.ignore_missing)
+            for s in slices)
+
+        empty = [np.zeros(0, dtype=int)]
+        trajectories = np.concatenate([job[0] + s.start
+                                       for job, s in zip(ret, slices)] +
+                                      empty)
+        starts = np.concatenate([job[1] for job in ret] + empty)
+        stops = np.concatenate([job[2] for job in ret] + empty)
+        return trajectories, starts, stops
+
+    def _criteria(self, attributes):
+        attributes = list(attributes)
+        return [(attributes.index(attr), threshold)
+                for attr, threshold in self.thresholds.items()]
+
+
+def _segments(trajs, criteria, mode, ignore_missing):
+    # Segments of a batch of trajectories (indexed within the batch)
+    lengths = np.array([len(t) for t in trajs], dtype=int)
+    breaks = _breaks(trajs, criteria, mode, ignore_missing)
+
+    # Segments start at the first point of trajectories and wherever a
+    # break is found
+    offsets = np.cumsum(lengths) - lengths
+    owner = np.repeat(np.r_[0:len(lengths)], lengths)
+    first = np.zeros(len(owner), dtype=bool)
+    first[offsets[lengths > 0]] = True
+    heads = np.flatnonzero(first | breaks)
+    trajectories = owner[heads]
+    starts = heads - offsets[trajectories]
+    stops = np.r_[heads[1:], len(owner)] - offsets[trajectories]
+    return trajectories, starts, stops
+
+
+def _breaks(trajs, criteria, mode, ignore_missing):
+    # Mask of the points where a new segment starts (ignoring trajectory
+    # boundaries), i.e. where the criteria hold for the previous point
+    lengths = np.array([len(t) for t in trajs], dtype=int)
+    owner = np.repeat(np.r_[0:len(trajs)], lengths)
+    inner = owner[1:] == owner[:-1]
+    masks = []
+
+    for k, threshold in criteria:
+        values = [p[k] for t in trajs for p in t]
+
+        if callable(threshold):
+            mask = np.array([threshold(values[i], values[i + 1])
+                             for i in np.flatnonzero(inner)], dtype=bool)
+            full = np.zeros(len(inner), dtype=bool)
+            full[inner] = mask
+            masks.append(full)
+            continue
+
+        # One object per value, even for sequences such as [lat, lon]
+        values = np.array(values + [None], dtype=object)[:-1]
+        missing = pd.isnull(values)
+        missing = missing[1:] | missing[:-1]
+        present = np.flatnonzero(~missing)
+        first = np.array(list(values[present]))
+        second = np.array(list(values[present + 1]))
+        mask = np.zeros(len(missing), dtype=bool)
+
+        if threshold is None:
+            change = first != second
+            mask[present] = change.any(axis=1) if change.ndim == 2 \
+                else change
+        elif first.ndim == 2:
+            mask[present] = haversine(first.astype(float),
+                                      second.astype(float)) > threshold
+        else:
+            mask[present] = np.abs(second.astype(float) -
+                                   first.astype(float)) > threshold
+
+        masks.append(np.where(missing, not ignore_missing, mask))
+
+    if len(masks) == 0:
+        breaks = np.zeros(len(inner), dtype=bool)
+    elif mode == 'any':
+        breaks = np.any(masks, axis=0)
+    else:
+        breaks = np.all(masks, axis=0)
+
+    return np.r_[False, breaks & inner] if len(owner) > 0 \
+        else np.zeros(0, dtype=bool)
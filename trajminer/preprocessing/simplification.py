@@ -0,0 +1,203 @@
+from joblib import Parallel, delayed
+from sklearn.utils import gen_even_slices
+import numpy as np
+
+from ..trajectory_data import TrajectoryData
+from ..utils.arrays import object_array
+from ..utils.batches import TrajectoryBatches
+
+
+_EARTH_RADIUS = 6371008.8
+
+
+class TrajectorySimplifier(object):
+    """Trajectory simplifier.
+
+    Removes points that can be approximated by the line between the points
+    around them, so similarity measures (whose cost grows with the product
+    of trajectory lengths) run on much shorter trajectories. Kept points are
+    left untouched, so all other attributes stay consistent.
+
+    The recursive splitting of the simplification algorithms is run level by
+    level: at each level, the distances of the inner points of all pending
+    sections of all trajectories are computed at once over the ``[lat, lon]``
+    column, and every section whose farthest point exceeds the tolerance is
+    split at that point. Distances are measured in meters on a local
+    equirectangular projection of each trajectory.
+
+    Parameters
+    ----------
+    lat_lon : str (default='lat_lon')
+        The attribute holding the ``[lat, lon]`` pair of trajectory points.
+    tolerance : float (default=10)
+        The maximum distance in meters between removed points and the
+        simplified trajectory.
+    method : str (default='douglas_peucker')
+        A string in {'douglas_peucker', 'time_ratio'}:
+
+            - If 'douglas_peucker', then the distance of a point is its
+              distance to the segment between the ends of its section.
+            - If 'time_ratio', then the distance of a point is its distance
+              to the position interpolated at its timestamp between the ends
+              of its section (synchronized euclidean distance), so changes of
+              speed are also preserved.
+    time : str (default=None)
+        The attribute holding the (numeric) timestamps of trajectory points.
+        Required for the 'time_ratio' method.
+    n_jobs : int (default=1)
+        The number of parallel jobs.
+
+    Examples
+    --------
+    >>> from trajminer.preprocessing import TrajectorySimplifier
+    >>> simplifier = TrajectorySimplifier(tolerance=20, method='time_ratio',
+    ...                                   time='time')
+    >>> simplified = simplifier.fit_transform(data)
+    """
+
+    def __init__(self, lat_lon='lat_lon', tolerance=10,
+                 method='douglas_peucker', time=None, n_jobs=1):
+        self.lat_lon = lat_lon
+        self.tolerance = tolerance
+        self.method = method
+        self.time = time
+        self.n_jobs = n_jobs
+
+        if method not in ['douglas_peucker', 'time_ratio']:
+            raise ValueError("'method' must be one of {'douglas_peucker', " +
+                             "'time_ratio'}!")
+        if method == 'time_ratio' and time is None:
+            raise ValueError("'time' must be given for the 'time_ratio' " +
+                             "method!")
+
+    def fit_transform(self, X):
+        """Fit and simplify trajectories.
+
+        Parameters
+        ----------
+        X : :class:`trajminer.TrajectoryData` or \
+                :class:`trajminer.utils.TrajectoryBatches`
+            Input dataset to simplify, or batches of it.
+
+        Returns
+        -------
+        X_out : :class:`trajminer.TrajectoryData` or \
+                :class:`trajminer.utils.TrajectoryBatches`
+            Simplified dataset, with the same IDs and labels. If `X` are
+            batches, then the lazily simplified batches are returned.
+        """
+        if not isinstance(X, TrajectoryData):
+            return TrajectoryBatches(X).map(self._fit_transform)
+
+        return self._fit_transform(X)
+
+    def _fit_transform(self, X):
+        keep = self.simplify(X)
+        trajs = X.get_trajectories()
+        lengths = np.array([len(t) for t in trajs], dtype=int)
+        kept = np.split(keep, np.cumsum(lengths)[:-1]) if len(trajs) > 0 \
+            else []
+        simplified = object_array([[p for p, k in zip(t, mask) if k]
+                                   for t, mask in zip(trajs, kept)])
+
+        return TrajectoryData(attributes=X.get_attributes(),
+                              data=simplified,
+                              tids=X.get_tids(),
+                              labels=X.get_labels())
+
+    def simplify(self, X):
+        """Computes the points kept by the simplification.
+
+        Parameters
+        ----------
+        X : :class:`trajminer.TrajectoryData`
+            Input dataset to simplify.
+
+        Returns
+        -------
+        keep : array, shape (n_points)
+            A mask over the points of all trajectories (in order) which is
+            `True` for the points kept.
+        """
+        attributes = list(X.get_attributes())
+        lat_lon = attributes.index(self.lat_lon)
+        time = attributes.index(self.time) \
+            if self.method == 'time_ratio' else None
+        trajs = X.get_trajectories()
+
+        func = delayed(_simplify)
+        ret = Parallel(n_jobs=self.n_jobs, verbose=0)(
+            func(trajs[s], lat_lon, time, self.tolerance)
+            for s in gen_even_slices(len(trajs), self.n_jobs))
+        return np.concatenate(ret + [np.zeros(0, dtype=bool)])
+
+
+def _simplify(trajs, lat_lon, time, tolerance):
+    lengths = np.array([len(t) for t in trajs], dtype=int)
+    offsets = np.cumsum(lengths) - lengths
+    owner = np.repeat(np.r_[0:len(lengths)], lengths)
+    x, y = _project(np.array([p[lat_lon] for t in trajs for p in t],
+                             dtype=float).reshape(-1, 2), owner)
+    times = np.array([p[time] for t in trajs for p in t], dtype=float) \
+        if time is not None else None
+
+    # The ends of trajectories are always kept, and sections between kept
+    # points are split until all their inner points are within tolerance
+    keep = np.zeros(len(owner), dtype=bool)
+    present = lengths > 0
+    keep[offsets[present]] = True
+    keep[(offsets + lengths - 1)[present]] = True
+    starts = offsets[lengths > 2]
+    stops = starts + lengths[lengths > 2] - 1
+
+    while len(starts) > 0:
+        sizes = stops - starts - 1
+        firsts = np.cumsum(sizes) - sizes
+        section = np.repeat(np.r_[0:len(starts)], sizes)
+        inner = np.r_[0:sizes.sum()] - firsts[section] + \
+            starts[section] + 1
+        dists = _distances(x, y, times, inner, section, starts, stops)
+
+        farthest = np.maximum.reduceat(dists, firsts)
+        candidates = np.flatnonzero(dists == farthest[section])
+        _, first = np.unique(section[candidates], return_index=True)
+        splits = inner[candidates[first]]
+
+        split = farthest > tolerance
+        keep[splits[split]] = True
+        starts = np.r_[starts[split], splits[split]]
+        stops = np.r_[splits[split], stops[split]]
+        pending = stops - starts > 1
+        starts, stops = starts[pending], stops[pending]
+
+    return keep
+
+
+def _project(points, owner):
+    # Local equirectangular projection (in meters) around the mean latitude
+    # of each trajectory
+    if len(points) == 0:
+        return np.zeros(0), np.zeros(0)
+
+    lat = np.bincount(owner, weights=points[:, 0]) / \
+        np.maximum(np.bincount(owner), 1)
+    scale = np.cos(np.radians(lat))[owner]
+    return np.radians(points[:, 1]) * scale * _EARTH_RADIUS, \
+        np.radians(points[:, 0]) * _EARTH_RADIUS
+
+
+def _distances(x, y, times, points, section, starts, stops):
+    # Distances between points and the segments (or the synchronized
+    # positions, if times are given) between the ends of their sections
+    dx, dy = (x[stops] - x[starts])[section], (y[stops] - y[starts])[section]
+    ox, oy = x[points] - x[starts][section], y[points] - y[starts][section]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if times is None:
+            ratio = np.clip((ox * dx + oy * dy) / (dx * dx + dy * dy), 0, 1)
+        else:
+            ratio = ((times[points] - times[starts][section]) /
+                     (times[stops] - times[starts])[section])
+
+    ratio[~np.isfinite(ratio)] = 0
+    return np.hypot(ox - ratio * dx, oy - ratio * dy)
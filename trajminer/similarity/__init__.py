@@ -1,10 +1,16 @@
 """Trajectory similarity measures.
 """
 from .classes import EDR, LCSS, MSM, MUITAS
+from .graph import kneighbors_graph
+from .graph import radius_neighbors_graph
+from .lsh import GeohashLSH
 from .pairwise import pairwise_similarity
 
 __all__ = ['EDR',
            'LCSS',
            'MSM',
            'MUITAS',
-           'pairwise_similarity']
+           'GeohashLSH',
+           'kneighbors_graph',
+           'pairwise_similarity',
+           'radius_neighbors_graph']
@@ -18,3 +18,49 @@ class SimilarityMeasure(object):
             Similarity score (between 0 and 1).
         """
         pass
+
+    def upper_bound(self, t1, t2):
+        """Computes an upper bound of the similarity score of the given
+        trajectories, which is cheaper to compute than the score itself.
+
+        Parameters
+        ----------
+        t1 : array-like, shape (n_points, n_features)
+            Input trajectory.
+        t2 : array-like, shape (n_points, n_features)
+            Input trajectory.
+
+        Returns
+        -------
+        bound : float
+            Upper bound of the similarity score (between 0 and 1).
+        """
+        return 1.0
+
+    def bounded_similarity(self, t1, t2, min_similarity):
+        """Computes the similarity score of the given trajectories, abandoning
+        the computation as soon as the score is known to be lower than
+        `min_similarity`.
+
+        Parameters
+        ----------
+        t1 : array-like, shape (n_points, n_features)
+            Input trajectory.
+        t2 : array-like, shape (n_points, n_features)
+            Input trajectory.
+        min_similarity : float
+            The minimum similarity score of interest.
+
+        Returns
+        -------
+        score : float
+            Similarity score (between 0 and 1). If the computation was
+            abandoned, then an upper bound of the score lower than
+            `min_similarity` is returned.
+        """
+        bound = self.upper_bound(t1, t2)
+
+        if bound < min_similarity:
+            return bound
+
+        return self.similarity(t1, t2)
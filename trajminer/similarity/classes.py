@@ -1,6 +1,7 @@
 import numpy as np
 
 from .base import SimilarityMeasure
+from ..utils.distance import euclidean, haversine
 
 
 class EDR(SimilarityMeasure):
@@ -27,6 +28,26 @@ class EDR(SimilarityMeasure):
         self.thresholds = thresholds
 
     def similarity(self, t1, t2):
+        return self._similarity(t1, t2, 0)
+
+    def upper_bound(self, t1, t2):
+        if _cannot_match(t1, t2, self.dist_functions, self.thresholds):
+            return 0.0
+
+        # The edit distance is at least the difference between lengths
+        return min(len(t1), len(t2)) / max(len(t1), len(t2))
+
+    def bounded_similarity(self, t1, t2, min_similarity):
+        bound = self.upper_bound(t1, t2)
+
+        if bound < min_similarity:
+            return bound
+
+        return self._similarity(t1, t2, min_similarity)
+
+    def _similarity(self, t1, t2, min_similarity):
+        length = max(len(t1), len(t2))
+        max_cost = (1 - min_similarity) * length
         matrix = np.zeros(shape=[len(t1) + 1, len(t2) + 1])
         matrix[:, 0] = np.r_[0:len(t1)+1]
         matrix[0] = np.r_[0:len(t2)+1]
@@ -38,7 +59,14 @@ class EDR(SimilarityMeasure):
                                        min(matrix[i+1][j] + 1,
                                            matrix[i][j+1] + 1))
 
-        return 1 - matrix[len(t1)][len(t2)] / max(len(t1), len(t2))
+            # Costs never decrease along a path, so the minimum of a row is a
+            # lower bound of the final cost
+            row_min = matrix[i+1].min()
+
+            if row_min > max_cost:
+                return 1 - row_min / length
+
+        return 1 - matrix[len(t1)][len(t2)] / length
 
     def _match_cost(self, p1, p2):
         for i, _ in enumerate(p1):
@@ -74,6 +102,24 @@ class LCSS(SimilarityMeasure):
         self.thresholds = thresholds
 
     def similarity(self, t1, t2):
+        return self._similarity(t1, t2, 0)
+
+    def upper_bound(self, t1, t2):
+        if _cannot_match(t1, t2, self.dist_functions, self.thresholds):
+            return 0.0
+
+        return 1.0
+
+    def bounded_similarity(self, t1, t2, min_similarity):
+        bound = self.upper_bound(t1, t2)
+
+        if bound < min_similarity:
+            return bound
+
+        return self._similarity(t1, t2, min_similarity)
+
+    def _similarity(self, t1, t2, min_similarity):
+        length = min(len(t1), len(t2))
         matrix = np.zeros(shape=[2, len(t2) + 1])
 
         for i, p1 in enumerate(t1):
@@ -85,7 +131,13 @@ class LCSS(SimilarityMeasure):
                 else:
                     matrix[ndx1][j+1] = max(matrix[ndx1][j], matrix[ndx][j+1])
 
-        return matrix[1][len(t2)] / min(len(t1), len(t2))
+            # Each remaining point of t1 adds at most one match
+            bound = min(matrix[ndx1][len(t2)] + len(t1) - i - 1, length)
+
+            if bound < min_similarity * length:
+                return bound / length
+
+        return matrix[len(t1) & 1][len(t2)] / length
 
     def _match(self, p1, p2):
         for i, _ in enumerate(p1):
@@ -199,3 +251,37 @@ class MUITAS(SimilarityMeasure):
 
         groups = [int(np.all(matches[g])) for g in self.features]
         return sum(groups * self.weights)
+
+
+def _cannot_match(t1, t2, dist_functions, thresholds):
+    # Checks whether, for some attribute, the bounding boxes of the
+    # trajectories are farther apart than the threshold, in which case no
+    # pair of points can match. Only attributes compared with the euclidean
+    # or haversine (in meters) distances are checked.
+    if len(t1) == 0 or len(t2) == 0:
+        return False
+
+    for i, dist in enumerate(dist_functions):
+        if dist is not euclidean and dist is not haversine:
+            continue
+
+        try:
+            v1 = np.array([p[i] for p in t1], dtype=float).reshape(len(t1), -1)
+            v2 = np.array([p[i] for p in t2], dtype=float).reshape(len(t2), -1)
+        except (TypeError, ValueError):
+            continue
+
+        scale = 1
+
+        if dist is haversine:
+            # The latitude difference alone bounds the haversine distance
+            v1, v2 = v1[:, :1], v2[:, :1]
+            scale = np.radians(1) * 6371000
+
+        gap = np.maximum(0, np.maximum(v2.min(axis=0) - v1.max(axis=0),
+                                       v1.min(axis=0) - v2.max(axis=0)))
+
+        if scale * np.sqrt(np.sum(np.square(gap))) > thresholds[i]:
+            return True
+
+    return False
@@ -0,0 +1,159 @@
+from joblib import Parallel, delayed
+from scipy.sparse import csr_matrix
+import heapq
+import numpy as np
+
+
+def radius_neighbors_graph(X, radius, measure, index=None, n_jobs=1):
+    """Computes the graph of trajectories in X whose distance (i.e.
+    ``1 - similarity``) is at most `radius`, without computing the full
+    similarity matrix.
+
+    Pairs of trajectories are pruned with the upper bound of the similarity
+    measure (see :meth:`SimilarityMeasure.upper_bound`) and the computation
+    of each similarity is abandoned as soon as it is known to be lower than
+    ``1 - radius`` (see :meth:`SimilarityMeasure.bounded_similarity`).
+
+    Parameters
+    ----------
+    X : array-like, shape: (n_trajectories, n_points, n_features)
+        Input data.
+    radius : float
+        The maximum distance between two trajectories for them to be
+        considered neighbors.
+    measure : SimilarityMeasure object
+        The similarity measure to use for computing similarities. See
+        :mod:`trajminer.similarity`.
+    index : object (default=None)
+        An index fitted on `X` that retrieves candidate neighbors through a
+        ``query(t)`` method returning trajectory indices (e.g.
+        :class:`trajminer.similarity.GeohashLSH`). Only candidates are
+        compared, so pairs missed by an approximate index are not included in
+        the graph. If ``None``, then all pairs are compared.
+    n_jobs : int (default=1)
+        The number of parallel jobs.
+
+    Returns
+    -------
+    graph : scipy.sparse.csr_matrix, shape (n_trajectories, n_trajectories)
+        A symmetric sparse matrix holding the distances between neighbor
+        trajectories. Trajectories are not neighbors of themselves.
+    """
+    n = len(X)
+    min_similarity = 1 - radius
+
+    def compute_rows(rows):
+        n_rows, n_cols, n_data = [], [], []
+
+        for i in rows:
+            if index is None:
+                candidates = range(i + 1, n)
+            else:
+                candidates = np.asarray(index.query(X[i]))
+                candidates = candidates[candidates > i]
+
+            for j in candidates:
+                score = measure.bounded_similarity(X[i], X[j], min_similarity)
+
+                if score >= min_similarity:
+                    n_rows.append(i)
+                    n_cols.append(j)
+                    n_data.append(1 - score)
+
+        return n_rows, n_cols, n_data
+
+    # Rows are interleaved across jobs to balance the triangular workload
+    func = delayed(compute_rows)
+    ret = Parallel(n_jobs=n_jobs, verbose=0)(
+        func(range(r, n, n_jobs)) for r in range(min(n_jobs, n)))
+
+    rows = np.concatenate([job[0] for job in ret] + [[]]).astype(int)
+    cols = np.concatenate([job[1] for job in ret] + [[]]).astype(int)
+    data = np.concatenate([job[2] for job in ret] + [[]])
+
+    return csr_matrix((np.r_[data, data], (np.r_[rows, cols],
+                                           np.r_[cols, rows])),
+                      shape=(n, n))
+
+
+def kneighbors_graph(X, n_neighbors, measure, index=None, n_jobs=1):
+    """Computes the graph of the `n_neighbors` nearest neighbors of each
+    trajectory in X (with distance ``1 - similarity``), without computing the
+    full similarity matrix.
+
+    Once `n_neighbors` candidates are known for a trajectory, the computation
+    of further similarities is abandoned as soon as they are known to be
+    farther than the current `n_neighbors`-th nearest neighbor (see
+    :meth:`SimilarityMeasure.bounded_similarity`).
+
+    Parameters
+    ----------
+    X : array-like, shape: (n_trajectories, n_points, n_features)
+        Input data.
+    n_neighbors : int
+        The number of neighbors of each trajectory.
+    measure : SimilarityMeasure object
+        The similarity measure to use for computing similarities. See
+        :mod:`trajminer.similarity`.
+    index : object (default=None)
+        An index fitted on `X` that retrieves candidate neighbors through a
+        ``query(t)`` method returning trajectory indices (e.g.
+        :class:`trajminer.similarity.GeohashLSH`). Only candidates are
+        compared, so trajectories may have less than `n_neighbors` neighbors
+        in the graph. If ``None``, then all pairs are compared.
+    n_jobs : int (default=1)
+        The number of parallel jobs.
+
+    Returns
+    -------
+    graph : scipy.sparse.csr_matrix, shape (n_trajectories, n_trajectories)
+        A sparse matrix whose i-th row holds the distances between the i-th
+        trajectory and its nearest neighbors. Trajectories are not neighbors
+        of themselves.
+    """
+    n = len(X)
+
+    def compute_rows(rows):
+        n_rows, n_cols, n_data = [], [], []
+
+        for i in rows:
+            if index is None:
+                candidates = range(n)
+            else:
+                candidates = np.asarray(index.query(X[i]))
+
+            # Max-heap (by negated distance) of the nearest neighbors so far
+            nearest = []
+
+            for j in candidates:
+                if j == i:
+                    continue
+
+                if len(nearest) < n_neighbors:
+                    score = measure.similarity(X[i], X[j])
+                    heapq.heappush(nearest, (score - 1, j))
+                    continue
+
+                min_similarity = 1 + nearest[0][0]
+                score = measure.bounded_similarity(X[i], X[j],
+                                                   min_similarity)
+
+                if score > min_similarity:
+                    heapq.heapreplace(nearest, (score - 1, j))
+
+            for d, j in nearest:
+                n_rows.append(i)
+                n_cols.append(j)
+                n_data.append(-d)
+
+        return n_rows, n_cols, n_data
+
+    func = delayed(compute_rows)
+    ret = Parallel(n_jobs=n_jobs, verbose=0)(
+        func(range(r, n, n_jobs)) for r in range(min(n_jobs, n)))
+
+    rows = np.concatenate([job[0] for job in ret] + [[]]).astype(int)
+    cols = np.concatenate([job[1] for job in ret] + [[]]).astype(int)
+    data = np.concatenate([job[2] for job in ret] + [[]])
+
+    return csr_matrix((data, (rows, cols)), shape=(n, n))
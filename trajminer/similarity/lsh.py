@@ -0,0 +1,220 @@
+from joblib import Parallel, delayed
+from sklearn.utils import gen_even_slices
+import numpy as np
+
+from ..utils.geohash import Geohash
+
+
+_PRIME = 2 ** 31 - 1
+_MAX_HASH = np.iinfo(np.int64).max
+
+
+class GeohashLSH(object):
+    """Approximate-neighbor index based on MinHash signatures of geohash
+    cells.
+
+    Each trajectory is represented by the set of geohash cells visited by its
+    points (at a given precision), which is summarized by a MinHash signature.
+    Signatures are split into bands and trajectories that fall into the same
+    bucket for at least one band are reported as candidate pairs. Two
+    trajectories whose cell sets have Jaccard similarity `s` become candidates
+    with probability ``1 - (1 - s ** band_size) ** n_bands``. Candidates can
+    then be re-ranked with any exact similarity measure from
+    :mod:`trajminer.similarity`.
+
+    Parameters
+    ----------
+    lat_lon : int (default=-1)
+        The index of the feature holding the ``[lat, lon]`` pair of
+        trajectory points.
+    precision : int (default=7)
+        The geohash precision (length of the Base32 geohash) used for
+        computing the cell sets.
+    n_bands : int (default=20)
+        The number of bands the signatures are split into.
+    band_size : int (default=5)
+        The number of hash values in each band. Signatures have
+        ``n_bands * band_size`` hash values.
+    seed : int (default=None)
+        The random seed used for generating the hash functions.
+    n_jobs : int (default=1)
+        The number of parallel jobs.
+
+    References
+    ----------
+    `Leskovec, J., Rajaraman, A., & Ullman, J. D. (2014). Finding Similar
+    Items. In Mining of Massive Datasets (pp. 68-122). Cambridge University
+    Press. <http://www.mmds.org/>`__
+
+    Examples
+    --------
+    >>> from trajminer.similarity import GeohashLSH, LCSS
+    >>> lsh = GeohashLSH(lat_lon=0, precision=6).fit(X)
+    >>> pairs = lsh.candidate_pairs()
+    >>> pairs, scores = lsh.similarity_join(X, measure=LCSS(...))
+    """
+
+    def __init__(self, lat_lon=-1, precision=7, n_bands=20, band_size=5,
+                 seed=None, n_jobs=1):
+        self.lat_lon = lat_lon
+        self.precision = precision
+        self.n_bands = n_bands
+        self.band_size = band_size
+        self.seed = seed
+        self.n_jobs = n_jobs
+        self.geohash = Geohash()
+
+        random_state = np.random.RandomState(seed)
+        n_hashes = n_bands * band_size
+        self._a = random_state.randint(1, _PRIME, size=n_hashes,
+                                       dtype=np.int64)
+        self._b = random_state.randint(0, _PRIME, size=n_hashes,
+                                       dtype=np.int64)
+        self._band_mult = random_state.randint(1, _PRIME, size=band_size,
+                                               dtype=np.int64) \
+            .astype(np.uint64) | np.uint64(1)
+
+    def fit(self, X):
+        """Computes the signatures of trajectories in X and builds the LSH
+        buckets.
+
+        Parameters
+        ----------
+        X : array-like, shape: (n_trajectories, n_points, n_features)
+            Input data.
+
+        Returns
+        -------
+        self : object
+            The fitted index.
+        """
+        func = delayed(self._signatures)
+        signatures = Parallel(n_jobs=self.n_jobs, verbose=0)(
+            func(X[s]) for s in gen_even_slices(len(X), self.n_jobs))
+        self.signatures = np.vstack(signatures)
+
+        keys = self._band_keys(self.signatures)
+        self._order = np.argsort(keys, axis=0, kind='mergesort')
+        self._keys = np.take_along_axis(keys, self._order, axis=0)
+        return self
+
+    def query(self, t):
+        """Retrieves the candidate neighbors of a trajectory.
+
+        Parameters
+        ----------
+        t : array-like, shape (n_points, n_features)
+            The query trajectory.
+
+        Returns
+        -------
+        candidates : array
+            The sorted indices of the indexed trajectories sharing at least
+            one LSH bucket with `t`.
+        """
+        keys = self._band_keys(self._signatures([t]))[0]
+        candidates = []
+
+        for b, key in enumerate(keys):
+            start = np.searchsorted(self._keys[:, b], key, side='left')
+            end = np.searchsorted(self._keys[:, b], key, side='right')
+            candidates.append(self._order[start:end, b])
+
+        return np.unique(np.concatenate(candidates))
+
+    def candidate_pairs(self):
+        """Retrieves all pairs of indexed trajectories that share at least one
+        LSH bucket.
+
+        Returns
+        -------
+        pairs : array, shape (n_pairs, 2)
+            The candidate pairs ``(i, j)``, with ``i < j``, sorted
+            lexicographically.
+        """
+        pairs = []
+
+        for b in range(self.n_bands):
+            keys = self._keys[:, b]
+            bounds = np.flatnonzero(np.diff(keys)) + 1
+            bounds = np.r_[0, bounds, len(keys)]
+
+            for start, end in zip(bounds[:-1], bounds[1:]):
+                if end - start < 2:
+                    continue
+                members = self._order[start:end, b]
+                i, j = np.triu_indices(len(members), k=1)
+                pairs.append(np.column_stack((members[i], members[j])))
+
+        if not pairs:
+            return np.zeros(shape=(0, 2), dtype=int)
+
+        pairs = np.sort(np.vstack(pairs), axis=1)
+        return np.unique(pairs, axis=0)
+
+    def similarity_join(self, X, measure, threshold=0, n_jobs=None):
+        """Computes the exact similarity of all candidate pairs.
+
+        Parameters
+        ----------
+        X : array-like, shape: (n_trajectories, n_points, n_features)
+            The data used for fitting the index.
+        measure : SimilarityMeasure object
+            The similarity measure used for re-ranking candidates. See
+            :mod:`trajminer.similarity`.
+        threshold : float (default=0)
+            Only pairs with similarity greater than or equal to `threshold`
+            are returned.
+        n_jobs : int (default=None)
+            The number of parallel jobs. If ``None``, then the value of
+            `n_jobs` given to the constructor is used.
+
+        Returns
+        -------
+        pairs : array, shape (n_pairs, 2)
+            The pairs of trajectory indices.
+        similarities : array, shape (n_pairs)
+            The similarity of each pair.
+        """
+        n_jobs = self.n_jobs if n_jobs is None else n_jobs
+        pairs = self.candidate_pairs()
+
+        def compute_slice(s):
+            return np.array([measure.similarity(X[i], X[j])
+                             for i, j in pairs[s]])
+
+        func = delayed(compute_slice)
+        similarities = Parallel(n_jobs=n_jobs, verbose=0)(
+            func(s) for s in gen_even_slices(len(pairs), n_jobs))
+        similarities = np.concatenate(similarities) if similarities \
+            else np.zeros(0)
+
+        keep = similarities >= threshold
+        return pairs[keep], similarities[keep]
+
+    def _cells(self, t):
+        points = np.array([p[self.lat_lon] for p in t], dtype=float) \
+            .reshape(-1, 2)
+        cells = self.geohash.encode_many(points[:, 0], points[:, 1],
+                                         self.precision)
+        return np.unique(cells.astype(np.int64))
+
+    def _signatures(self, X):
+        signatures = np.full((len(X), len(self._a)), _MAX_HASH,
+                             dtype=np.int64)
+
+        for i, t in enumerate(X):
+            cells = self._cells(t) % _PRIME
+
+            if len(cells) > 0:
+                hashes = (np.outer(self._a, cells) + self._b[:, None]) \
+                    % _PRIME
+                signatures[i] = hashes.min(axis=1)
+
+        return signatures
+
+    def _band_keys(self, signatures):
+        n = len(signatures)
+        bands = signatures.astype(np.uint64) \
+            .reshape(n, self.n_bands, self.band_size)
+        return (bands * self._band_mult).sum(axis=2, dtype=np.uint64)
@@ -3,7 +3,8 @@ from joblib import Parallel, delayed
 from sklearn.utils import gen_even_slices
 
 
-def pairwise_similarity(X, Y=None, measure=None, n_jobs=1):
+def pairwise_similarity(X, Y=None, measure=None, condensed=False,
+                        dtype=np.float64, n_jobs=1):
     """Computes the similarity between trajectories in X and Y.
 
     Parameters
@@ -16,31 +17,65 @@ def pairwise_similarity(X, Y=None, measure=None, n_jobs=1):
     measure : SimilarityMeasure object (default=None)
         The similarity measure to use for computing similarities. See
         :mod:`trajminer.similarity`.
+    condensed : bool (default=False)
+        If ``True`` and `Y` is ``None``, then only the upper triangle of the
+        similarity matrix (without the diagonal) is computed and returned as
+        a condensed 1-D array, as in :func:`scipy.spatial.distance.pdist`.
+    dtype : data-type (default=numpy.float64)
+        The data type of the output array (e.g. ``numpy.float32`` for halving
+        memory usage).
     n_jobs : int (default=1)
         The number of parallel jobs.
 
     Returns
     -------
     similarities : array
-        An array with shape (n_trajectories_X, n_trajectories_Y).
+        An array with shape (n_trajectories_X, n_trajectories_Y), or with
+        shape (n_trajectories_X * (n_trajectories_X - 1) / 2) if
+        `condensed=True`.
     """
-    def compute_slice(X, Y, s):
-        matrix = np.zeros(shape=(len(X), len(Y)))
+    if condensed and Y is None:
+        return _condensed_similarity(X, measure, dtype, n_jobs)
+
+    def compute_slice(X, Y, s, symmetric):
+        matrix = np.zeros(shape=(len(X), len(Y)), dtype=dtype)
+
+        if not symmetric:
+            for i in range(0, len(X)):
+                for j in range(0, len(Y)):
+                    matrix[i][j] = measure.similarity(X[i], Y[j])
+            return matrix
 
         for i in range(s.start + 1, len(X)):
             for j in range(0, min(len(Y), i - s.start)):
                 matrix[i][j] = measure.similarity(X[i], Y[j])
         return matrix
 
-    upper = Y is not None
-    Y = X if not Y else Y
+    symmetric = Y is None
+    Y = X if symmetric else Y
     func = delayed(compute_slice)
 
     similarity = Parallel(n_jobs=n_jobs, verbose=0)(
-        func(X, Y[s], s) for s in gen_even_slices(len(Y), n_jobs))
+        func(X, Y[s], s, symmetric) for s in gen_even_slices(len(Y), n_jobs))
     similarity = np.hstack(similarity)
 
-    if not upper:
+    if symmetric:
         similarity += similarity.transpose() + np.identity(len(X))
 
     return similarity
+
+
+def _condensed_similarity(X, measure, dtype, n_jobs):
+    def compute_slice(s):
+        rows = []
+
+        for i in range(s.start, s.stop):
+            rows.append(np.array([measure.similarity(X[i], X[j])
+                                  for j in range(i + 1, len(X))],
+                                 dtype=dtype))
+        return np.concatenate(rows)
+
+    func = delayed(compute_slice)
+    similarity = Parallel(n_jobs=n_jobs, verbose=0)(
+        func(s) for s in gen_even_slices(len(X), n_jobs))
+    return np.concatenate(similarity)
@@ -0,0 +1,52 @@
+from scipy.cluster.hierarchy import linkage
+from scipy.spatial.distance import pdist, squareform
+import numpy as np
+
+from trajminer.clustering import AgglomerativeClustering
+
+
+random_state = np.random.RandomState(0)
+points = np.vstack([random_state.rand(25, 2) + c
+                    for c in [(0, 0), (3, 0), (0, 3)]])
+condensed = pdist(points)
+
+
+class TestAgglomerativeClustering(object):
+
+    def test_linkage(self):
+        for method in ['ward', 'complete', 'average', 'single']:
+            clustering = AgglomerativeClustering(n_clusters=3,
+                                                 linkage=method)
+            clustering.fit_predict(condensed)
+            assert np.allclose(clustering.dendrogram,
+                               linkage(condensed, method))
+
+    def test_square_and_float32(self):
+        dense = AgglomerativeClustering(n_clusters=3, linkage='average')
+        lean = AgglomerativeClustering(n_clusters=3, linkage='average',
+                                       dtype=np.float32)
+        labels = dense.fit_predict(squareform(condensed))
+        assert np.array_equal(labels, lean.fit_predict(condensed))
+        assert sorted(np.bincount(labels)) == [25, 25, 25]
+
+    def test_cut(self):
+        clustering = AgglomerativeClustering(n_clusters=3, linkage='single')
+        clustering.fit_predict(condensed)
+        assert clustering.cut(n_clusters=5).max() == 4
+        assert clustering.cut(height=1.5).max() == 2
+        assert clustering.cut(height=5).max() == 0
+
+    def test_distances(self):
+        clustering = AgglomerativeClustering(n_clusters=3)
+        clustering.fit_predict(squareform(condensed))
+        assert np.allclose(clustering.distances, condensed)
+
+        lean = AgglomerativeClustering(n_clusters=3, copy=False)
+        lean.fit_predict(condensed.copy())
+        assert lean.distances is None
+
+    def test_single_sample(self):
+        for X in [np.zeros((1, 1)), np.zeros(0)]:
+            clustering = AgglomerativeClustering(n_clusters=2)
+            assert clustering.fit_predict(X).tolist() == [0]
+            assert clustering.cut(height=1).tolist() == [0]
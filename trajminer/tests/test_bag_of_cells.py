@@ -0,0 +1,44 @@
+import numpy as np
+
+from trajminer import TrajectoryData
+from trajminer.preprocessing import BagOfCells
+from trajminer.utils import Geohash
+
+
+data = TrajectoryData(attributes=['poi', 'lat_lon'],
+                      data=[[['Home', [-27.601759, -48.520894]],
+                             ['Work', [-27.601760, -48.520890]],
+                             ['Gym', [-27.689460, -48.484800]]],
+                            [['Home', [-27.601759, -48.520894]],
+                             ['Pub', [-23.550520, -46.633308]]],
+                            [['Bar', [-23.550520, -46.633308]]]],
+                      tids=[1, 2, 3],
+                      labels=[1, 1, 2])
+
+
+class TestBagOfCells(object):
+
+    def test_fit_transform(self):
+        bag = BagOfCells(precision=[3, 7], categorical=['poi'], n_jobs=2)
+        vectors = bag.fit_transform(data)
+        names = bag.get_feature_names()
+        assert vectors.shape == (3, len(names))
+        assert Geohash().encode(-27.601759, -48.520894, 7) in names
+        assert 'poi=Pub' in names
+
+        counts = BagOfCells(precision=[3, 7], categorical=['poi'],
+                            use_idf=False, norm=None).fit_transform(data)
+        first = dict(zip(names, counts.toarray()[0]))
+        assert first['6gj'] == 3
+        assert first[Geohash().encode(-27.601759, -48.520894, 7)] == 2
+        assert first['poi=Home'] == 1
+
+        cosine = vectors.dot(vectors.T).toarray()
+        assert np.allclose(np.diag(cosine), 1)
+        assert cosine[0, 1] > 0 and cosine[0, 2] == 0
+
+    def test_transform_unseen(self):
+        bag = BagOfCells(precision=5).fit(data)
+        unseen = TrajectoryData(['poi', 'lat_lon'], [[['Home', [10, 10]]]],
+                                [4])
+        assert bag.transform(unseen).nnz == 0
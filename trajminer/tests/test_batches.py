@@ -0,0 +1,79 @@
+import os
+import tempfile
+
+import numpy as np
+import pytest
+
+from trajminer import TrajectoryData
+from trajminer.preprocessing import TrajectorySegmenter
+from trajminer.preprocessing import filter_label_size
+from trajminer.preprocessing import filter_trajectory_length
+from trajminer.utils import CSVTrajectoryLoader, TrajectoryBatches
+
+
+random_state = np.random.RandomState(0)
+trajs = [[[int(t), round(lat, 4), round(lon, 4)] for t, lat, lon in zip(
+    np.sort(random_state.randint(0, 100, n)),
+    random_state.uniform(-28, -27, n), random_state.uniform(-49, -48, n))]
+    for n in random_state.randint(1, 15, 40)]
+data = TrajectoryData(attributes=['time', 'lat', 'lon'], data=trajs,
+                      tids=np.r_[1:41],
+                      labels=random_state.choice(['a', 'b', 'c'], 40,
+                                                 p=[.5, .45, .05]))
+
+
+def preprocess(dataset):
+    segmenter = TrajectorySegmenter(attributes=['time', 'lat_lon'],
+                                    thresholds={'time': 10})
+    dataset = filter_trajectory_length(dataset, 2, None, inplace=False)
+    dataset = filter_label_size(dataset, 3, None, inplace=False)
+    return segmenter.fit_transform(dataset)
+
+
+def as_lists(dataset):
+    return [[list(p[:1]) + list(p[1]) for p in t]
+            for t in dataset.get_trajectories()]
+
+
+class TestTrajectoryBatches(object):
+
+    def test_csv_batches(self):
+        folder = tempfile.mkdtemp()
+        data.to_file(os.path.join(folder, 'data.csv'))
+        loader = CSVTrajectoryLoader(os.path.join(folder, 'data.csv'))
+        expected = preprocess(loader.load())
+
+        batches = loader.load_batches(chunksize=25)
+        assert sum(b.length() for b in batches) == data.length()
+
+        batches = preprocess(batches)
+        assert isinstance(batches, TrajectoryBatches)
+        result = list(batches)
+        assert len(result) > 1
+        assert np.array_equal(np.concatenate([b.get_tids() for b in result]),
+                              expected.get_tids())
+        assert np.array_equal(
+            np.concatenate([b.get_labels() for b in result]),
+            expected.get_labels())
+        assert [t for b in result for t in as_lists(b)] == \
+            as_lists(expected)
+
+        batches.to_file(os.path.join(folder, 'out.csv'))
+        written = CSVTrajectoryLoader(os.path.join(folder, 'out.csv')).load()
+        assert np.array_equal(written.get_tids(), expected.get_tids())
+        assert np.allclose(np.concatenate(as_lists(written)),
+                           np.concatenate(as_lists(expected)))
+
+        batches.to_file(os.path.join(folder, 'out.bin'), file_type='binary')
+        loaded = list(TrajectoryBatches.load(os.path.join(folder,
+                                                          'out.bin')))
+        assert [t for b in loaded for t in as_lists(b)] == \
+            as_lists(expected)
+
+    def test_one_shot_iterator(self):
+        batches = (data for _ in range(2))
+        filtered = filter_trajectory_length(batches, 2, None)
+        assert not filtered.is_reiterable()
+
+        with pytest.raises(ValueError):
+            filter_label_size(filtered, 3, None)
@@ -0,0 +1,36 @@
+import numpy as np
+
+from trajminer.clustering import DBSCAN
+from trajminer.similarity import EDR, LCSS
+from trajminer.utils.distance import haversine
+
+
+random_state = np.random.RandomState(0)
+data = [[[np.array([-27.6, -48.5]) + (i % 3) * 0.3 +
+          random_state.rand(2) * 0.003]
+         for _ in range(random_state.randint(5, 10))] for i in range(30)]
+data.append([[np.array([10., 10.])]] * 6)
+
+
+class TestDBSCAN(object):
+
+    def test_bounded_similarity(self):
+        for measure in [EDR([haversine], [300]), LCSS([haversine], [300])]:
+            for t1 in data[:4] + data[-1:]:
+                for t2 in data[:4]:
+                    score = measure.similarity(t1, t2)
+                    for min_similarity in [0.2, 0.6, 0.9]:
+                        bounded = measure.bounded_similarity(t1, t2,
+                                                             min_similarity)
+                        assert (bounded >= min_similarity) == \
+                            (score >= min_similarity)
+
+    def test_region(self):
+        measure = LCSS(dist_functions=[haversine], thresholds=[300])
+        matrix = DBSCAN(eps=0.3, min_samples=3, measure=measure)
+        region = DBSCAN(eps=0.3, min_samples=3, measure=measure,
+                        algorithm='region', n_jobs=2)
+        labels = region.fit_predict(data)
+        assert np.array_equal(matrix.fit_predict(data), labels)
+        assert labels[-1] == -1
+        assert region.distances.nnz < len(data) ** 2
@@ -0,0 +1,39 @@
+import numpy as np
+
+from trajminer import TrajectoryData
+from trajminer.preprocessing import FeatureExtractor
+from trajminer.utils.distance import haversine
+
+
+data = TrajectoryData(attributes=['poi', 'time', 'lat_lon'],
+                      data=[[['Home', 0, [-27.60, -48.50]],
+                             ['Work', 10, [-27.61, -48.50]],
+                             ['Work', 30, [-27.61, -48.51]],
+                             ['Home', 40, [-27.60, -48.50]]],
+                            [['Home', 5, [-27.60, -48.50]]]],
+                      tids=[1, 2],
+                      labels=[1, 2])
+
+
+class TestFeatureExtractor(object):
+
+    def test_transform(self):
+        extractor = FeatureExtractor(time='time', categorical=['poi'],
+                                     n_jobs=2)
+        features = extractor.fit_transform(data)
+        names = extractor.get_feature_names()
+        assert features.shape == (2, len(names))
+
+        first = dict(zip(names, features[0]))
+        points = np.array([p[2] for p in data.get_trajectory(1)])
+        steps = haversine(points[:-1], points[1:])
+        assert np.isclose(first['distance'], steps.sum())
+        assert np.isclose(first['speed_max'], (steps / [10, 20, 10]).max())
+        assert first['duration'] == 40
+        assert first['poi=Work'] == 0.5
+        assert np.isclose(first['turn_min'], np.pi / 2)
+
+        second = dict(zip(names, features[1]))
+        assert second['n_points'] == 1
+        assert second['distance'] == second['speed_mean'] == 0
+        assert second['max_lat'] == -27.60
@@ -0,0 +1,115 @@
+import numpy as np
+
+from trajminer import TrajectoryData
+from trajminer.preprocessing import filter_duplicate_points
+from trajminer.preprocessing import filter_label_size
+from trajminer.preprocessing import filter_trajectory_length
+from trajminer.utils.distance import haversine
+
+
+data = TrajectoryData(attributes=['time', 'lat_lon'],
+                      data=[[[0, [0, 0]], [0, [0, 0.0001]], [1, [0, 0.0002]],
+                             [2, [0, 0.0003]], [3, [0, 1]]],
+                            [[5, [1, 1]], [5, [1, 1]], [5, [1, 1]]]],
+                      tids=[1, 2],
+                      labels=['a', 'b'])
+
+
+def times(dataset):
+    return [[p[0] for p in t] for t in dataset.get_trajectories()]
+
+
+class TestFilterDuplicatePoints(object):
+
+    def test_same_timestamp(self):
+        filtered = filter_duplicate_points(data, {'time': None},
+                                           inplace=False)
+        assert times(filtered) == [[0, 1, 2, 3], [5]]
+        assert filtered.get_trajectory(2)[0] is data.get_trajectory(2)[2]
+
+        filtered = filter_duplicate_points(data, {'time': 0},
+                                           remove_first=False, inplace=False)
+        assert filtered.get_trajectory(2)[0] is data.get_trajectory(2)[0]
+        assert times(filter_duplicate_points(
+            data, {'time': 0}, inplace=False, n_jobs=2)) == times(filtered)
+
+    def test_same_location(self):
+        filtered = filter_duplicate_points(data, {'lat_lon': 15},
+                                           inplace=False)
+        assert times(filtered) == [[2, 3], [5]]
+
+        filtered = filter_duplicate_points(data, {'lat_lon': 15,
+                                                  'time': 0},
+                                           remove_first=False, inplace=False)
+        assert times(filtered) == [[0, 1, 2, 3], [5]]
+
+    def test_callable(self):
+        def criterium(p1, p2):
+            return abs(p2[0] - p1[0]) <= 1
+
+        filtered = filter_duplicate_points(data, criterium, inplace=False)
+        assert times(filtered) == [[3], [5]]
+
+        # The following points are compared with the kept one
+        filtered = filter_duplicate_points(data, criterium,
+                                           remove_first=False, inplace=False)
+        assert times(filtered) == [[0, 2], [5]]
+
+    def test_dict_and_callable(self):
+        def criterium(p1, p2):
+            return haversine(p1[1], p2[1]) <= 15
+
+        for remove_first in [True, False]:
+            expected = filter_duplicate_points(data, criterium, remove_first,
+                                               inplace=False)
+            filtered = filter_duplicate_points(data, {'lat_lon': 15},
+                                               remove_first, inplace=False)
+            assert times(filtered) == times(expected)
+
+        # Points 11 meters apart are compared with the last kept point
+        assert times(filtered) == [[0, 1, 3], [5]]
+
+    def test_noisy_points(self):
+        rng = np.random.RandomState(0)
+        noisy = TrajectoryData(
+            attributes=['time', 'lat_lon'],
+            data=[[[float(i // 3), [0, 0.00005 * i + rng.uniform(0, 0.0002)]]
+                   for i in range(n)] for n in [0, 1, 30, 50]],
+            tids=[1, 2, 3, 4])
+
+        def criterium(p1, p2):
+            return abs(p2[0] - p1[0]) <= 2 and haversine(p1[1], p2[1]) <= 20
+
+        expected = filter_duplicate_points(noisy, criterium, False,
+                                           inplace=False)
+        filtered = filter_duplicate_points(noisy, {'time': 2, 'lat_lon': 20},
+                                           False, inplace=False)
+        assert times(filtered) == times(expected)
+
+
+sizes = TrajectoryData(attributes=['time'],
+                       data=[[[0]], [[0], [1]], [[0], [1], [2]], [[0]],
+                             [[0], [1]]],
+                       tids=[10, 11, 12, 13, 14],
+                       labels=['a', 'b', 'a', 'c', 'a'])
+
+
+class TestFilterSize(object):
+
+    def test_trajectory_length(self):
+        filtered = filter_trajectory_length(sizes, 2, None, inplace=False)
+        assert list(filtered.get_tids()) == [11, 12, 14]
+        assert list(filtered.get_labels()) == ['b', 'a', 'a']
+        assert filtered.get_trajectory(12) is sizes.get_trajectory(12)
+
+        filtered = filter_trajectory_length(sizes, 1, 2, inplace=False)
+        assert list(filtered.get_tids()) == [10, 11, 13, 14]
+
+    def test_label_size(self):
+        filtered = filter_label_size(sizes, 2, None, inplace=False)
+        assert list(filtered.get_tids()) == [10, 12, 14]
+        assert list(filtered.get_trajectories('a')[1]) == [[0], [1], [2]]
+
+        filtered = filter_label_size(sizes, None, 1, inplace=False)
+        assert list(filtered.get_tids()) == [11, 13]
+        assert filtered.get_label(13) == 'c'
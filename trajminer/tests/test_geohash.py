@@ -0,0 +1,81 @@
+import numpy as np
+
+from trajminer.utils import Geohash
+from trajminer.utils.distance import haversine
+
+
+geohash = Geohash()
+random_state = np.random.RandomState(0)
+lats = np.r_[random_state.uniform(-90, 90, 500), -90, 90, 0, 45]
+lons = np.r_[random_state.uniform(-180, 180, 500), -180, 180, 0, -90]
+
+
+class TestGeohash(object):
+
+    def test_encode_many(self):
+        for precision in [1, 6, 12]:
+            expected = [geohash.encode(lat, lon, precision)
+                        for lat, lon in zip(lats, lons)]
+            encoded = geohash.encode_many(lats, lons, precision,
+                                          output='base32')
+            assert np.array_equal(encoded, expected)
+
+            binary = geohash.encode_many(lats[:20], lons[:20], precision,
+                                         output='binary')
+            assert np.array_equal(binary, [
+                geohash.encode(lat, lon, precision, binary=True)
+                for lat, lon in zip(lats[:20], lons[:20])])
+
+    def test_decode_many(self):
+        cells = geohash.encode_many(lats, lons, 8)
+        decoded = geohash.decode_many(cells, precision=8)
+        assert np.array_equal(geohash.encode_many(*decoded, precision=8),
+                              cells)
+        assert np.allclose(decoded[0], lats, atol=180 / 2 ** 20)
+        assert np.array_equal(
+            geohash.decode_many(geohash.to_base32(cells, 8)), decoded)
+
+    def test_neighbours(self):
+        cells = geohash.encode_many(lats[:50], lons[:50], 6)
+        neighbours = geohash.neighbours(cells, 6)
+        box = geohash.bounds(cells, 6)
+        height, width = box[0, 2] - box[0, 0], box[0, 3] - box[0, 1]
+        centers = geohash.decode_many(cells, precision=6)
+        steps = [(1, 0), (1, 1), (0, 1), (-1, 1), (-1, 0), (-1, -1), (0, -1),
+                 (1, -1)]
+
+        for k, (dlat, dlon) in enumerate(steps):
+            lat = np.clip(centers[0] + dlat * height, -90, 90)
+            lon = (centers[1] + dlon * width + 180) % 360 - 180
+            assert np.array_equal(neighbours[:, k],
+                                  geohash.encode_many(lat, lon, 6))
+
+    def test_prefix_range(self):
+        fine = np.sort(geohash.encode_many(lats, lons, 7))
+        cells = fine[::50] >> np.uint64(10)
+        start, stop = geohash.prefix_range(cells, 5, 7)
+        counts = np.searchsorted(fine, stop) - np.searchsorted(fine, start)
+        assert np.array_equal(counts, [np.sum(fine >> np.uint64(10) == c)
+                                       for c in cells])
+
+    def test_cover(self):
+        inside = (lats >= -30) & (lats <= 30) & (lons >= 100) | \
+            (lats >= -30) & (lats <= 30) & (lons <= -120)
+        cells = geohash.cover_bbox(-30, 100, 30, -120, 3)
+        assert np.isin(geohash.encode_many(lats, lons, 3), cells).sum() >= \
+            inside.sum()
+        assert np.isin(geohash.encode_many(lats[inside], lons[inside], 3),
+                       cells).all()
+
+        points = np.column_stack([-27.6 + random_state.uniform(-.1, .1, 5000),
+                                  -48.5 + random_state.uniform(-.1, .1, 5000)])
+        near = haversine(points, [-27.6, -48.5]) <= 3000
+        cells = geohash.cover_radius(-27.6, -48.5, 3000, 6)
+        assert np.isin(geohash.encode_many(points[near, 0], points[near, 1],
+                                           6), cells).all()
+
+        # Corners of cells are within the circle expanded by their diagonal
+        box = geohash.bounds(cells, 6)
+        diagonal = haversine(box[0, :2], box[0, 2:])
+        assert (haversine(box[:, :2], [-27.6, -48.5]) <=
+                3000 + diagonal).all()
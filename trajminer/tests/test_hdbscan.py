@@ -0,0 +1,53 @@
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.spatial.distance import pdist, squareform
+
+from trajminer.clustering import DBSCAN, HDBSCAN
+from trajminer.similarity import LCSS, pairwise_similarity
+from trajminer.utils.distance import euclidean
+
+
+random_state = np.random.RandomState(0)
+points = np.vstack([random_state.randn(30, 2) * 0.3 + center
+                    for center in [(0, 0), (5, 5), (0, 6)]] +
+                   [random_state.rand(5, 2) * 20 - 5])
+distances = squareform(pdist(points))
+
+
+class TestHDBSCAN(object):
+
+    def test_extract_level(self):
+        hdbscan = HDBSCAN(min_samples=4)
+        hdbscan.fit_predict(distances)
+        for eps in [0.2, 0.5, 1.5]:
+            dbscan = DBSCAN(eps=eps, min_samples=4)
+            assert np.array_equal(hdbscan.extract(eps=eps),
+                                  dbscan.fit_predict(distances))
+
+    def test_extract_stable(self):
+        labels = HDBSCAN(min_samples=4, min_cluster_size=10) \
+            .fit_predict(distances)
+        assert len(np.unique(labels[labels >= 0])) == 3
+        for c in range(3):
+            assert len(np.unique(labels[c * 30:(c + 1) * 30])) == 1
+
+    def test_measure(self):
+        trajs = [[[p + noise] for noise in random_state.randn(4, 2) * 0.3]
+                 for p in points]
+        measure = LCSS(dist_functions=[euclidean], thresholds=[0.5])
+        hdbscan = HDBSCAN(min_samples=4, n_neighbors=len(trajs) - 1,
+                          eps=0.5, measure=measure)
+        expected = HDBSCAN(min_samples=4, eps=0.5).fit_predict(
+            1 - pairwise_similarity(trajs, measure=measure))
+        assert len(np.unique(expected[expected >= 0])) > 1
+        assert np.array_equal(hdbscan.fit_predict(trajs), expected)
+
+    def test_large_graph(self):
+        # Both edges have the same key if it is computed in 32 bits
+        n = 70000
+        graph = csr_matrix((np.ones(2), ([3644, 65000], [22703, 69999])),
+                           shape=(n, n))
+        labels = HDBSCAN(min_samples=1, min_cluster_size=2) \
+            .fit_predict(graph)
+        assert labels[3644] == labels[22703] != -1
+        assert labels[65000] == labels[69999] != -1
@@ -0,0 +1,113 @@
+import os
+import tempfile
+
+import numpy as np
+
+from trajminer import TrajectoryData
+from trajminer.utils.distance import haversine
+
+
+random_state = np.random.RandomState(0)
+trajs = [[['a', [lat, lon]]
+          for lat, lon in zip(random_state.uniform(-27.7, -27.5, n),
+                              random_state.uniform(-48.6, -48.4, n))]
+         for n in random_state.randint(1, 30, 200)]
+trajs[0] = [['a', [10., 179.99]], ['a', [10.01, -179.99]]]
+data = TrajectoryData(attributes=['poi', 'lat_lon'], data=trajs,
+                      tids=np.r_[0:len(trajs)])
+points = [np.array([p[1] for p in t]) for t in trajs]
+
+
+class TestSpatialIndex(object):
+
+    def test_range_query(self):
+        index = data.get_spatial_index(precision=7)
+        assert data.get_spatial_index(precision=7) is index
+
+        found = index.range_query(-27.62, -48.55, -27.58, -48.45)
+        expected = [i for i, p in enumerate(points)
+                    if ((p[:, 0] >= -27.62) & (p[:, 0] <= -27.58) &
+                        (p[:, 1] >= -48.55) & (p[:, 1] <= -48.45)).any()]
+        assert np.array_equal(found, expected)
+        assert np.array_equal(index.range_query(9, 179, 11, -179), [0])
+
+        trajectories, positions = index.range_query(
+            9, 179, 11, -179, return_points=True)
+        assert np.array_equal(positions, [0, 1])
+
+    def test_radius_query(self):
+        index = data.get_spatial_index(precision=8)
+        trajectories, positions = index.radius_query(-27.6, -48.5, 2000,
+                                                     return_points=True)
+        expected = [(i, j) for i, p in enumerate(points)
+                    for j in np.flatnonzero(
+                        haversine(p, [-27.6, -48.5]) <= 2000)]
+        assert list(zip(trajectories, positions)) == expected
+
+    def test_nearest(self):
+        index = data.get_spatial_index(precision=8)
+        trajectories, distances = index.nearest(-27.6, -48.5, k=5)
+        closest = np.array([haversine(p, [-27.6, -48.5]).min()
+                            for p in points])
+        assert np.allclose(distances, np.sort(closest)[:5])
+        assert np.array_equal(trajectories, np.argsort(closest)[:5])
+
+    def test_persistence(self):
+        file = os.path.join(tempfile.mkdtemp(), 'index.npz')
+        index = data.get_spatial_index(precision=6, file=file)
+        other = TrajectoryData(attributes=['poi', 'lat_lon'], data=trajs,
+                               tids=np.r_[0:len(trajs)])
+        loaded = other.get_spatial_index(precision=6, file=file)
+        assert np.array_equal(loaded.cells, index.cells)
+        assert np.array_equal(loaded.range_query(-27.62, -48.55, -27.58,
+                                                 -48.45),
+                              index.range_query(-27.62, -48.55, -27.58,
+                                                -48.45))
+
+        # Same lengths but different coordinates
+        moved = [[[poi, [lat + 1, lon]] for poi, (lat, lon) in t]
+                 for t in trajs]
+        moved = TrajectoryData(attributes=['poi', 'lat_lon'], data=moved,
+                               tids=np.r_[0:len(trajs)])
+        rebuilt = moved.get_spatial_index(precision=6, file=file)
+        assert np.allclose(np.sort(rebuilt.points[:, 0]),
+                           np.sort(index.points[:, 0]) + 1)
+
+
+times = [[0, 5, 10, 20], [3, 4], [30, 40, 50], [8, 12]]
+temporal_data = TrajectoryData(
+    attributes=['time', 'lat_lon'],
+    data=[[[t, [0., 0.]] for t in traj] for traj in times],
+    tids=[10, 11, 12, 13], labels=['a', 'b', 'a', 'b'])
+
+
+class TestTemporalIndex(object):
+
+    def test_slice_time(self):
+        index = temporal_data.get_temporal_index()
+        trajectories, starts, stops = index.slice_time(4, 12)
+        assert np.array_equal(trajectories, [0, 1, 3])
+        assert np.array_equal(starts, [1, 1, 0])
+        assert np.array_equal(stops, [3, 2, 2])
+
+        window = temporal_data.slice_time(4, 12)
+        assert np.array_equal(window.get_tids(), [10, 11, 13])
+        assert np.array_equal(window.get_labels(), ['a', 'b', 'b'])
+        assert [p[0] for p in window.get_trajectory(10)] == [5, 10]
+        assert window.get_trajectory(13)[0] is \
+            temporal_data.get_trajectory(13)[0]
+
+    def test_window_join(self):
+        index = temporal_data.get_temporal_index()
+        pairs = index.window_join(window=1)
+        n = len(times)
+        expected = [(i, a, j, b) for i in range(n) for j in range(i + 1, n)
+                    for a, s in enumerate(times[i])
+                    for b, t in enumerate(times[j]) if abs(s - t) <= 1]
+        assert sorted(expected) == [tuple(p) for p in pairs]
+
+        other = TrajectoryData(attributes=['time'], data=[[[9], [31]]],
+                               tids=[0]).get_temporal_index()
+        pairs = index.window_join(window=1, other=other)
+        assert [tuple(p) for p in pairs] == [(0, 2, 0, 0), (2, 0, 0, 1),
+                                             (3, 0, 0, 0)]
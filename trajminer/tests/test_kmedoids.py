@@ -0,0 +1,52 @@
+from itertools import combinations
+import numpy as np
+
+from trajminer.clustering import KMedoids
+
+
+random_state = np.random.RandomState(0)
+points = np.vstack([random_state.randn(20, 2) + c
+                    for c in [(0, 0), (6, 0), (0, 6)]])
+distances = np.sqrt(((points[:, None] - points[None]) ** 2).sum(axis=2))
+
+
+def cost(medoids):
+    return distances[:, medoids].min(axis=1).sum()
+
+
+class TestKMedoids(object):
+
+    def test_alternate(self):
+        kmedoids = KMedoids(n_clusters=3, init='park', method='alternate')
+        labels = kmedoids.fit_predict(distances)
+        assert sorted(np.bincount(labels)[1:]) == [20, 20, 20]
+
+    def test_fasterpam_optimal(self):
+        d = distances[:12, :12]
+        best = min(combinations(range(12), 3),
+                   key=lambda m: d[:, list(m)].min(axis=1).sum())
+        kmedoids = KMedoids(n_clusters=3, seed=1, method='fasterpam')
+        kmedoids.fit_predict(d)
+        assert np.array_equal(kmedoids.medoids, best)
+
+    def test_fasterpam_not_worse(self):
+        alternate = KMedoids(n_clusters=3, seed=2, method='alternate')
+        fasterpam = KMedoids(n_clusters=3, seed=2, method='fasterpam')
+        alternate.fit_predict(distances)
+        fasterpam.fit_predict(distances)
+        assert cost(fasterpam.medoids) <= cost(alternate.medoids) + 1e-9
+
+    def test_clara(self):
+        kmedoids = KMedoids(n_clusters=3, method='clara', sample_size=15,
+                            seed=0)
+        labels = kmedoids.fit_predict(distances)
+        assert len(labels) == len(distances)
+        assert sorted(np.bincount(labels)[1:]) == [20, 20, 20]
+
+    def test_n_init(self):
+        single = KMedoids(n_clusters=3, seed=0, n_init=1)
+        multiple = KMedoids(n_clusters=3, seed=0, n_init=8, n_jobs=2)
+        single.fit_predict(distances)
+        multiple.fit_predict(distances)
+        assert multiple.cost <= single.cost
+        assert np.isclose(multiple.cost, cost(multiple.medoids))
@@ -0,0 +1,34 @@
+import numpy as np
+
+from trajminer.similarity import GeohashLSH, LCSS
+from trajminer.utils.distance import haversine
+
+
+random_state = np.random.RandomState(0)
+data = [[[np.array([-27.6 + g * 0.5, -48.5 + g * 0.5]) +
+          random_state.rand(2) * 0.01] for _ in range(20)]
+        for g in range(3) for _ in range(5)]
+
+
+class TestGeohashLSH(object):
+
+    def test_candidate_pairs(self):
+        lsh = GeohashLSH(lat_lon=0, precision=5, n_bands=10, band_size=3,
+                         seed=1).fit(data)
+        pairs = lsh.candidate_pairs()
+        assert len(pairs) == 30
+        assert np.all(pairs[:, 0] < pairs[:, 1])
+        assert np.all(pairs[:, 0] // 5 == pairs[:, 1] // 5)
+
+    def test_query(self):
+        lsh = GeohashLSH(lat_lon=0, precision=5, n_bands=10, band_size=3,
+                         seed=1).fit(data)
+        assert np.array_equal(lsh.query(data[7]), np.r_[5:10])
+
+    def test_similarity_join(self):
+        lsh = GeohashLSH(lat_lon=0, precision=5, n_bands=10, band_size=3,
+                         seed=1, n_jobs=2).fit(data)
+        measure = LCSS(dist_functions=[haversine], thresholds=[2000])
+        pairs, similarities = lsh.similarity_join(data, measure)
+        assert len(pairs) == len(similarities) == 30
+        assert np.all((similarities >= 0) & (similarities <= 1))
@@ -0,0 +1,58 @@
+import numpy as np
+
+from trajminer.classification import Movelets
+from trajminer.utils.distance import discrete, euclidean, haversine
+
+
+random_state = np.random.RandomState(0)
+dist_functions = [haversine, euclidean, discrete]
+
+
+def trajectory(length):
+    return [[np.array([-27.6, -48.5]) + random_state.rand(2) * 0.01,
+             random_state.rand() * 10, random_state.choice(['a', 'b'])]
+            for _ in range(length)]
+
+
+def naive_alignment(subtraj, traj):
+    costs = [sum(sum(f(p[k], q[k]) for k, f in enumerate(dist_functions)) ** 2
+                 for p, q in zip(subtraj, traj[i:i + len(subtraj)]))
+             for i in range(len(traj) - len(subtraj) + 1)]
+    return np.sqrt(min(costs) / len(subtraj)), int(np.argmin(costs))
+
+
+class TestMovelets(object):
+
+    def test_best_alignment(self):
+        movelets = Movelets(dist_functions)
+
+        for length in range(1, 6):
+            subtraj, traj = trajectory(length), trajectory(12)
+            distance, position = movelets._best_alignment(subtraj, traj)
+            expected, start = naive_alignment(subtraj, traj)
+            assert np.isclose(distance, expected)
+            assert position == [start, start + length]
+
+    def test_fit_predict(self):
+        def labeled(label):
+            return [[np.array([random_state.rand(), label * 5 * (k == 2)]),
+                     random_state.rand(), random_state.choice(['a', 'b'])]
+                    for k in range(random_state.randint(4, 7))]
+
+        y = np.array([0, 1] * 8)
+        X = [labeled(label) for label in y]
+        movelets = Movelets([euclidean, euclidean, discrete], max_length=2,
+                            n_jobs=2)
+        movelets.fit(X, y)
+        assert movelets.qualities.max() == 1
+        assert movelets.transform(X).shape == (16, len(movelets.movelets))
+        assert movelets.score([labeled(label) for label in y], y) == 1
+
+    def test_max_memory(self):
+        y = np.array([0, 1] * 5)
+        X = [trajectory(random_state.randint(2, 9)) for _ in y]
+        movelets = [Movelets(dist_functions, min_length=2, max_memory=m)
+                    .fit(X, y) for m in [0, 1024]]
+        assert np.allclose(movelets[0].qualities, movelets[1].qualities)
+        assert np.allclose(movelets[0].transform(X),
+                           movelets[1].transform(X))
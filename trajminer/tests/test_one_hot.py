@@ -0,0 +1,93 @@
+import numpy as np
+import pytest
+
+from trajminer import TrajectoryData
+from trajminer.preprocessing import OneHotEncoder
+from trajminer.preprocessing import filter_trajectory_length
+from trajminer.utils import TrajectoryBatches
+
+
+trajs = [[[1, 'a'], [2, 'b'], [2, 'a']],
+         [[3, 'a']],
+         [[1, 'c'], [1, 'a']]]
+
+
+def dataset():
+    return TrajectoryData(attributes=['time', 'poi'], data=trajs,
+                          tids=[1, 2, 3], labels=['x', 'y', 'x'])
+
+
+class TestOneHotEncoder(object):
+
+    def test_points(self):
+        encoder = OneHotEncoder(min_frequency=2)
+        X_out = encoder.fit_transform(dataset())
+        assert encoder.get_feature_names() == \
+            ['0=1', '0=2', '0=unknown', '1=a', '1=unknown']
+        assert X_out.shape == (6, 5)
+        assert X_out.toarray().tolist() == [[1, 0, 0, 1, 0],
+                                            [0, 1, 0, 0, 1],
+                                            [0, 1, 0, 1, 0],
+                                            [0, 0, 1, 1, 0],
+                                            [1, 0, 0, 0, 1],
+                                            [1, 0, 0, 1, 0]]
+
+    def test_trajectories(self):
+        encoder = OneHotEncoder(features=[1], handle_unknown='ignore',
+                                output='trajectories')
+        X_out = encoder.fit(trajs[:1]).transform(trajs)
+        assert X_out.toarray().tolist() == [[2, 1], [1, 0], [1, 0]]
+
+    def test_partial_fit(self):
+        encoder = OneHotEncoder(min_frequency=2)
+        batches = TrajectoryBatches([TrajectoryData(['time', 'poi'], [t],
+                                                    [i], None)
+                                     for i, t in enumerate(trajs)])
+        encoder.fit(batches)
+        expected = OneHotEncoder(min_frequency=2).fit(trajs)
+
+        for vocabulary, other in zip(encoder.vocabularies,
+                                     expected.vocabularies):
+            assert vocabulary.tolist() == other.tolist()
+        assert encoder.offsets.tolist() == expected.offsets.tolist()
+
+    def test_inverse_transform(self):
+        encoder = OneHotEncoder(min_frequency=2)
+        X_out = encoder.fit_transform(trajs)
+        decoded = encoder.inverse_transform(X_out, lengths=[3, 1, 2])
+        assert [t.tolist() for t in decoded] == \
+            [[[1, 'a'], [2, None], [2, 'a']],
+             [[None, 'a']],
+             [[1, None], [1, 'a']]]
+
+    def test_filtered_batches(self):
+        # The second batch is left empty by the filter
+        batches = TrajectoryBatches([
+            dataset(), TrajectoryData(['time', 'poi'], trajs[1:], [4, 5])])
+        batches = filter_trajectory_length(batches, 3, None)
+        encoder = OneHotEncoder().fit(batches)
+        expected = OneHotEncoder().fit(trajs[:1])
+        assert encoder.get_feature_names() == expected.get_feature_names()
+        assert (encoder.transform(trajs) !=
+                expected.transform(trajs)).nnz == 0
+
+        with pytest.raises(ValueError):
+            encoder.fit_transform(batches)
+
+    def test_lat_lon(self):
+        data = TrajectoryData(['poi', 'lat_lon'],
+                              [[['a', np.array([-27.5, -48.5])],
+                                ['b', np.array([-27.5, -48.5])]],
+                               [['a', [-27.6, -48.4]], ['a', [-27.5, -48.5]]]],
+                              [1, 2])
+        encoder = OneHotEncoder(features=[1], handle_unknown='ignore')
+        X_out = encoder.fit_transform(data)
+        assert encoder.get_feature_names() == ['1=[-27.5, -48.5]',
+                                               '1=[-27.6, -48.4]']
+        assert X_out.toarray().tolist() == [[1, 0], [1, 0], [0, 1], [1, 0]]
+
+    def test_integral_floats(self):
+        encoder = OneHotEncoder().partial_fit([[[1]]]).partial_fit([[[1.0]]])
+        assert encoder.get_feature_names() == ['0=1', '0=unknown']
+        assert encoder.transform([[[1.0], [2.5]]]).toarray().tolist() == \
+            [[1, 0], [0, 1]]
@@ -0,0 +1,58 @@
+import numpy as np
+
+from trajminer import TrajectoryData
+from trajminer.preprocessing import Pipeline, TrajectorySegmenter
+from trajminer.preprocessing import filter_duplicate_points
+from trajminer.preprocessing import filter_label_size
+from trajminer.preprocessing import filter_trajectory_length
+
+
+random_state = np.random.RandomState(0)
+trajs = [[[int(t), random_state.choice(['a', 'b'])]
+          for t in np.sort(random_state.randint(0, 100, n))]
+         for n in random_state.randint(1, 20, 60)]
+labels = random_state.choice(['x', 'y', 'z'], 60, p=[.5, .45, .05])
+
+
+def dataset():
+    return TrajectoryData(attributes=['time', 'poi'], data=trajs,
+                          tids=np.r_[100:160], labels=labels)
+
+
+class TestPipeline(object):
+
+    def test_transform(self):
+        segmenter = TrajectorySegmenter(attributes=['time', 'poi'],
+                                        thresholds={'time': 10})
+        pipeline = Pipeline(n_jobs=2) \
+            .add(filter_trajectory_length, min_length=3, max_length=None) \
+            .add(filter_duplicate_points, criterium={'time': None}) \
+            .add(filter_label_size, min_size=5, max_size=None) \
+            .add(segmenter) \
+            .add(filter_trajectory_length, min_length=2, max_length=None)
+        result = pipeline.transform(dataset())
+
+        expected = filter_trajectory_length(dataset(), 3, None)
+        expected = filter_duplicate_points(expected, {'time': None})
+        expected = filter_label_size(expected, 5, None)
+        expected = segmenter.fit_transform(expected)
+        expected = filter_trajectory_length(expected, 2, None)
+
+        assert np.array_equal(result.get_tids(), expected.get_tids())
+        assert np.array_equal(result.get_labels(), expected.get_labels())
+        assert [list(t) for t in result.get_trajectories()] == \
+            [list(t) for t in expected.get_trajectories()]
+        assert [name for name, _ in pipeline.timings] == [
+            'filter_trajectory_length', 'filter_duplicate_points',
+            'filter_label_size', 'TrajectorySegmenter',
+            'filter_trajectory_length', 'build']
+
+    def test_without_segmentation(self):
+        pipeline = Pipeline().add(filter_trajectory_length, min_length=5,
+                                  max_length=10)
+        result = pipeline.transform(dataset())
+        lengths = np.array([len(t) for t in trajs])
+        keep = (lengths >= 5) & (lengths <= 10)
+        assert np.array_equal(result.get_tids(), np.r_[100:160][keep])
+        assert result.get_trajectory(result.get_tids()[0]) is \
+            trajs[np.flatnonzero(keep)[0]]
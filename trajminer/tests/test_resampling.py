@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from trajminer import TrajectoryData
+from trajminer.preprocessing import TrajectoryResampler
+from trajminer.utils.arrays import object_array
+
+
+trajs = [[[[0, 0], 0, 'a'], [[0, 1], 10, 'b'], [[0, 3], 20, 'c']],
+         [],
+         [[[1, 1], 5, 'x']]]
+
+
+def dataset():
+    return TrajectoryData(attributes=['lat_lon', 'time', 'poi'],
+                          data=object_array(trajs),
+                          tids=[1, 2, 3], labels=['u', 'v', 'u'])
+
+
+class TestTrajectoryResampler(object):
+
+    def test_interval(self):
+        resampler = TrajectoryResampler(time='time', interval=8, n_jobs=2)
+        result = resampler.fit_transform(dataset()).get_trajectories()
+        assert result[0] == [[[0, 0], 0, 'a'], [[0, .8], 8, 'a'],
+                             [[0, 2.2], 16, 'b']]
+        assert result[1] == []
+        assert result[2] == [[[1, 1], 5, 'x']]
+
+    def test_n_points(self):
+        resampler = TrajectoryResampler(time='time', n_points=4)
+        result = resampler.fit_transform(dataset()).get_trajectories()
+        assert [p[2] for p in result[0]] == ['a', 'b', 'b', 'c']
+        assert np.allclose([p[0] for p in result[0]],
+                           [[0, 0], [0, 1], [0, 2], [0, 3]])
+        assert np.allclose([p[1] for p in result[0]], [0, 10, 15, 20])
+        assert len(result[2]) == 4
+
+    def test_unsorted(self):
+        data = TrajectoryData(['lat_lon', 'time'],
+                              [[[[0, 0], 1], [[0, 1], 0]]], [1])
+
+        with pytest.raises(ValueError):
+            TrajectoryResampler(time='time', interval=1).fit_transform(data)
+
+    def test_params(self):
+        with pytest.raises(ValueError):
+            TrajectoryResampler(interval=1, n_points=2)
+        with pytest.raises(ValueError):
+            TrajectoryResampler(interval=1)
@@ -11,39 +11,69 @@ data = TrajectoryData(attributes=['poi', 'hour', 'rating'],
                       tids=[20, 24],
                       labels=[1, 2])
 
+missing = TrajectoryData(attributes=['poi', 'lat_lon'],
+                         data=[[['Home', [0, 0]], [None, [0, 0.001]],
+                                ['Home', [0, 0.002]], ['Home', [0, 0.1]]]],
+                         tids=[1],
+                         labels=[1])
+
+
+def segment_values(segmenter, dataset, k=0):
+    segmented = segmenter.fit_transform(dataset)
+    return [[p[k] for p in t] for t in segmented.get_trajectories()]
+
 
 class TestTrajectorySegmenter(object):
 
     def test_missing(self):
-        assert True
+        segmenter = TrajectorySegmenter(attributes=missing.get_attributes(),
+                                        thresholds={'poi': None})
+        assert segment_values(segmenter, missing) == [['Home'], [None],
+                                                      ['Home', 'Home']]
 
     def test_ignore_missing(self):
-        assert True
+        segmenter = TrajectorySegmenter(attributes=missing.get_attributes(),
+                                        thresholds={'poi': None,
+                                                    'lat_lon': 1000},
+                                        mode='any', ignore_missing=True)
+        assert segment_values(segmenter, missing) == [
+            ['Home', None, 'Home'], ['Home']]
 
     def test_strict_no_thresholds(self):
         segmenter = TrajectorySegmenter(attributes=data.get_attributes(),
                                         thresholds=None, mode='strict',
                                         n_jobs=1)
-        print(segmenter.fit_transform(data))
-        assert True  # TO-DO
+        segmented = segmenter.fit_transform(data)
+        assert list(segmented.get_labels()) == [1] * 5 + [2] * 4
+        assert segment_values(segmenter, data) == [
+            ['Bakery'], ['Work'], ['Restaurant', 'Bank'], ['Work'],
+            ['Home'], ['Home'], ['Mall'], ['Home'], ['Pub']]
 
     def test_strict_subset_thresholds(self):
         segmenter = TrajectorySegmenter(attributes=data.get_attributes(),
-                                        thresholds=None, mode='strict',
-                                        n_jobs=1)
-        print(segmenter.fit_transform(data))
-        assert True  # TO-DO
+                                        thresholds={'hour': 2},
+                                        mode='strict', n_jobs=2)
+        assert segment_values(segmenter, data, k=1) == [
+            [8, 9], [12, 12, 13], [19], [8, 10], [19, 21]]
 
     def test_any_no_thresholds(self):
         segmenter = TrajectorySegmenter(attributes=data.get_attributes(),
                                         thresholds=None, mode='any',
                                         n_jobs=1)
-        print(segmenter.fit_transform(data))
-        assert True  # TO-DO
+        assert len(segmenter.fit_transform(data).get_trajectories()) == 10
 
     def test_any_subset_thresholds(self):
         segmenter = TrajectorySegmenter(attributes=data.get_attributes(),
-                                        thresholds=None, mode='any',
-                                        n_jobs=1)
-        print(segmenter.fit_transform(data))
-        assert True  # TO-DO
+                                        thresholds={'hour': 2, 'rating': 3},
+                                        mode='any', n_jobs=1)
+        assert segment_values(segmenter, data, k=1) == [
+            [8, 9], [12, 12], [13], [19], [8], [10], [19], [21]]
+
+    def test_callable_thresholds(self):
+        segmenter = TrajectorySegmenter(
+            attributes=data.get_attributes(),
+            thresholds={'hour': lambda x, y: y - x > 2}, n_jobs=2)
+        trajectories, starts, stops = segmenter.segment(data)
+        assert list(trajectories) == [0, 0, 0, 1, 1]
+        assert list(starts) == [0, 2, 5, 0, 2]
+        assert list(stops) == [2, 5, 6, 2, 4]
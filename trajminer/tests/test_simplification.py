@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+
+from trajminer import TrajectoryData
+from trajminer.preprocessing import TrajectorySimplifier
+from trajminer.utils.arrays import object_array
+from trajminer.utils import TrajectoryBatches
+
+
+random_state = np.random.RandomState(0)
+trajs = [[[list(p), i, 'abc'[i % 3]] for i, p in enumerate(
+          np.cumsum(random_state.normal(0, 1e-4, (n, 2)), axis=0))]
+         for n in [0, 1, 2, 3, 50, 200]]
+
+
+def dataset():
+    return TrajectoryData(attributes=['lat_lon', 'time', 'poi'],
+                          data=object_array(trajs),
+                          tids=np.r_[1:len(trajs) + 1],
+                          labels=['a', 'b'] * (len(trajs) // 2))
+
+
+def project(traj):
+    points = np.array([p[0] for p in traj]).reshape(-1, 2)
+    lat = points[:, 0].mean() if len(traj) > 0 else 0
+    return np.radians(np.c_[points[:, 1] * np.cos(np.radians(lat)),
+                            points[:, 0]]) * 6371008.8
+
+
+def douglas_peucker(xy, tolerance):
+    # Recursive reference implementation
+    if len(xy) < 3:
+        return list(range(len(xy)))
+
+    a, b = xy[0], xy[-1]
+    delta = b - a
+    ratio = np.clip(((xy[1:-1] - a) @ delta) / (delta @ delta), 0, 1)
+    dists = np.linalg.norm(xy[1:-1] - a - ratio[:, None] * delta, axis=1)
+    farthest = np.argmax(dists) + 1
+
+    if dists[farthest - 1] <= tolerance:
+        return [0, len(xy) - 1]
+
+    left = douglas_peucker(xy[:farthest + 1], tolerance)
+    right = douglas_peucker(xy[farthest:], tolerance)
+    return left[:-1] + [farthest + i for i in right]
+
+
+class TestTrajectorySimplifier(object):
+
+    def test_douglas_peucker(self):
+        simplifier = TrajectorySimplifier(tolerance=5, n_jobs=2)
+        result = simplifier.fit_transform(dataset())
+        assert result.get_tids().tolist() == dataset().get_tids().tolist()
+
+        for t, simplified in zip(trajs, result.get_trajectories()):
+            expected = douglas_peucker(project(t), 5)
+            assert simplified == [t[i] for i in expected]
+
+    def test_time_ratio(self):
+        simplifier = TrajectorySimplifier(tolerance=5, method='time_ratio',
+                                          time='time')
+        result = simplifier.fit_transform(dataset())
+
+        # Removed points are within tolerance of the position interpolated
+        # at their timestamps
+        for t, simplified in zip(trajs, result.get_trajectories()):
+            xy = project(t)
+            kept = [p[1] for p in simplified]
+            assert kept[:1] == [p[1] for p in t[:1]]
+            assert kept[-1:] == [p[1] for p in t[-1:]]
+
+            for a, b in zip(kept[:-1], kept[1:]):
+                for i in range(a + 1, b):
+                    position = xy[a] + (i - a) / (b - a) * (xy[b] - xy[a])
+                    assert np.linalg.norm(xy[i] - position) <= 5
+
+    def test_batches(self):
+        simplifier = TrajectorySimplifier(tolerance=5)
+        batches = simplifier.fit_transform(TrajectoryBatches([dataset()]))
+        expected = simplifier.fit_transform(dataset())
+        result = list(batches)[0]
+        assert result.get_trajectories().tolist() == \
+            expected.get_trajectories().tolist()
+
+    def test_params(self):
+        with pytest.raises(ValueError):
+            TrajectorySimplifier(method='time_ratio')
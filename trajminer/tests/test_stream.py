@@ -0,0 +1,50 @@
+import numpy as np
+
+from trajminer import TrajectoryData
+from trajminer.clustering import StreamClustering
+from trajminer.similarity import LCSS, pairwise_similarity
+from trajminer.utils.distance import euclidean
+
+
+random_state = np.random.RandomState(0)
+centers = [(0, 0), (10, 0), (0, 10)]
+data = [[[np.array(centers[i % 3]) + random_state.rand(2)]
+         for _ in range(random_state.randint(4, 8))] for i in range(60)]
+measure = LCSS(dist_functions=[euclidean], thresholds=[2])
+
+
+class TestStreamClustering(object):
+
+    def test_partial_fit(self):
+        stream = StreamClustering(measure=measure, radius=0.5, n_clusters=3)
+
+        for start in range(0, 60, 20):
+            batch = TrajectoryData(['xy'], data[start:start + 20],
+                                   np.r_[start:start + 20])
+            stream.partial_fit(batch)
+
+        assert len(stream.representatives) == 3
+        assert stream.weights.sum() == 60
+        labels = stream.predict(data)
+        assert len(np.unique(labels)) == 3
+        for c in range(3):
+            assert len(np.unique(labels[c::3])) == 1
+
+    def test_merge_and_decay(self):
+        narrow = LCSS(dist_functions=[euclidean], thresholds=[0.3])
+        stream = StreamClustering(measure=narrow, radius=0.1, max_clusters=4,
+                                  decay=1, min_weight=0.1, n_clusters=2)
+        stream.partial_fit(data[:30])
+        assert len(stream.representatives) == 4
+        assert np.allclose(stream.distances, 1 - pairwise_similarity(
+            stream.representatives, measure=narrow))
+        stream.partial_fit(data[30:31], timestamps=[100])
+        assert len(stream.representatives) == 1
+        assert np.allclose(stream.distances, 0)
+
+    def test_few_micro_clusters(self):
+        stream = StreamClustering(measure=measure, radius=0.5, n_clusters=5)
+        stream.partial_fit(data[:2])
+        assert len(stream.representatives) == 2
+        assert stream.macro_cluster().tolist() == [0, 1]
+        assert len(np.unique(stream.predict(data[:6]))) == 2
@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+from trajminer.classification import TraClass
+from trajminer.utils.arrays import object_array
+
+
+random_state = np.random.RandomState(0)
+
+
+def trajectory(label):
+    start = np.array([-27.6, -48.5]) + random_state.rand(2) * 0.5
+    step = np.array([0.01, 0]) if label == 0 else np.array([0, 0.01])
+    return [[start + step * k + random_state.rand(2) * 0.002]
+            for k in range(random_state.randint(5, 20))]
+
+
+def dataset(n):
+    y = np.array([0, 1, 2] * n)
+    X = object_array([trajectory(label % 2) if label < 2 else
+                      [[p[0] + 1] for p in trajectory(0)] for label in y])
+    return X, y
+
+
+class TestTraClass(object):
+
+    def test_fit_predict(self):
+        X, y = dataset(30)
+        traclass = TraClass(lat_lon=0, min_precision=2, max_precision=4,
+                            min_density=5, n_jobs=2)
+        traclass.fit(X, y)
+        assert len(traclass.regions[3]) > 0
+        assert len(traclass.clusters) > 0
+
+        X_test, y_test = dataset(10)
+        features = traclass.transform(X_test)
+        assert features.shape[0] == 30
+        assert traclass.score(X_test, y_test) > 0.9
+
+    def test_key_bits(self):
+        TraClass(max_precision=12, n_directions=8)
+
+        with pytest.raises(ValueError):
+            TraClass(max_precision=12, n_directions=16)
@@ -1,5 +1,7 @@
 from joblib import Parallel, delayed
 from sklearn.utils import gen_even_slices
+import os
+import pickle
 import numpy as np
 
 
@@ -25,6 +27,8 @@ class TrajectoryData(object):
         self.labels = np.array(labels) if labels is not None else None
         self.data = np.array(data)
         self._stats = None
+        self._spatial_index = None
+        self._temporal_index = None
         self.tidToIdx = dict(zip(tids, np.r_[0:len(tids)]))
         self.labelToIdx = TrajectoryData._get_label_to_idx(labels)
 
@@ -130,6 +134,138 @@ class TrajectoryData(object):
         idxs = self.labelToIdx[label]
         return self.data[idxs]
 
+    def get_lengths(self):
+        """Retrieves the number of points of each trajectory in the dataset.
+
+        Returns
+        -------
+        lengths : array
+            An array of length `n_trajectories`.
+        """
+        return np.array([len(t) for t in self.data], dtype=int)
+
+    def get_spatial_index(self, lat_lon='lat_lon', precision=8, file=None):
+        """Retrieves a spatial index over the points of the dataset. The index
+        is built on the first call and kept until the dataset is modified.
+
+        Parameters
+        ----------
+        lat_lon : str (default='lat_lon')
+            The attribute holding the ``[lat, lon]`` pair of trajectory
+            points.
+        precision : int (default=8)
+            The geohash precision of the index grid.
+        file : str (default=None)
+            A ``.npz`` file for persisting the index alongside the data. If
+            the file holds an index with the same parameters built over the
+            same points (i.e. the same ``[lat, lon]`` pairs at the same
+            positions of the same trajectories), then it is loaded instead
+            of being built. Otherwise, the built index is saved to the
+            file.
+
+        Returns
+        -------
+        index : :class:`trajminer.utils.SpatialIndex`
+            The spatial index.
+        """
+        from .utils.index import SpatialIndex
+
+        index = self._spatial_index
+
+        if index is not None and index.lat_lon == lat_lon and \
+                index.precision == precision:
+            return index
+
+        index = None
+
+        if file is not None and os.path.isfile(file):
+            index = SpatialIndex.load(file)
+
+            if index.lat_lon != lat_lon or index.precision != precision or \
+                    not self._same_points(index):
+                index = None
+
+        if index is None:
+            index = SpatialIndex(lat_lon=lat_lon, precision=precision) \
+                .fit(self)
+
+            if file is not None:
+                index.save(file)
+
+        self._spatial_index = index
+        return index
+
+    def _same_points(self, index):
+        # Whether an index holds exactly the points of this dataset
+        lengths = self.get_lengths()
+
+        if len(index.boxes) != len(lengths) or \
+                len(index.points) != lengths.sum():
+            return False
+
+        k = list(self.attributes).index(index.lat_lon)
+        points = np.array([p[k] for t in self.data for p in t],
+                          dtype=float).reshape(-1, 2)
+        offsets = np.cumsum(lengths) - lengths
+        stored = points[offsets[index.trajectories] + index.positions]
+        return np.array_equal(stored, index.points)
+
+    def get_temporal_index(self, time='time'):
+        """Retrieves a temporal index over the points of the dataset. The
+        index is built on the first call and kept until the dataset is
+        modified.
+
+        Parameters
+        ----------
+        time : str (default='time')
+            The attribute holding the timestamps of trajectory points.
+
+        Returns
+        -------
+        index : :class:`trajminer.utils.TemporalIndex`
+            The temporal index.
+        """
+        from .utils.index import TemporalIndex
+
+        if self._temporal_index is None or \
+                self._temporal_index.time != time:
+            self._temporal_index = TemporalIndex(time=time).fit(self)
+
+        return self._temporal_index
+
+    def slice_time(self, start, end, time='time'):
+        """Retrieves the points of trajectories within a time window. Points
+        are not copied: each resulting trajectory is a slice of the
+        corresponding trajectory in the dataset (a view, if trajectories are
+        arrays).
+
+        Parameters
+        ----------
+        start : int, float or datetime
+            The start of the window (inclusive).
+        end : int, float or datetime
+            The end of the window (inclusive).
+        time : str (default='time')
+            The attribute holding the timestamps of trajectory points.
+
+        Returns
+        -------
+        dataset : :class:`trajminer.TrajectoryData`
+            A dataset with the trajectories having at least one point within
+            the window, restricted to these points.
+        """
+        from .utils.arrays import object_array
+
+        trajectories, starts, stops = \
+            self.get_temporal_index(time).slice_time(start, end)
+        data = object_array([self.data[t][a:b] for t, a, b
+                             in zip(trajectories, starts, stops)])
+
+        labels = self.labels[trajectories] if self.labels is not None \
+            else None
+        return TrajectoryData(self.attributes, data, self.tids[trajectories],
+                              labels)
+
     def length(self):
         """Returns the number of trajectories in the dataset.
 
@@ -196,12 +332,21 @@ class TrajectoryData(object):
         file : str
             The output file.
         file_type : str (default='csv')
-            The file type. Must be one of `{csv}`.
+            The file type. Must be one of `{csv, binary}`. Binary files hold
+            the pickled dataset and can be read with
+            :meth:`trajminer.utils.TrajectoryBatches.load`.
         n_jobs : int (default=1)
             The number of parallel jobs.
         """
         if file_type == 'csv':
             self._to_csv(file, n_jobs)
+        elif file_type == 'binary':
+            with open(file, 'wb') as out:
+                self._to_binary(out)
+
+    def _to_binary(self, out):
+        pickle.dump((self.attributes, self.data, self.tids, self.labels),
+                    out, protocol=pickle.HIGHEST_PROTOCOL)
 
     def stats(self, print_stats=False):
         """Computes statistics for the dataset.
@@ -266,25 +411,44 @@ class TrajectoryData(object):
         return self._stats
 
     def _update(self, attributes, data, tids, labels):
-        self.tids = np.array(tids)
-        self.labels = np.array(labels)
-        self.data = np.array(data)
+        self.tids = np.asarray(tids)
+        self.labels = np.asarray(labels) if labels is not None else None
+        self.data = np.asarray(data)
         self.tidToIdx = dict(zip(tids, np.r_[0:len(tids)]))
         self.labelToIdx = TrajectoryData._get_label_to_idx(labels)
         self._stats = None
+        self._spatial_index = None
+        self._temporal_index = None
 
     def _to_csv(self, file, n_jobs):
-        lat_lon = -1
+        with open(file, 'w') as out:
+            out.write(self._csv_header() + '\n')
+            out.write('\n'.join(self._csv_lines(n_jobs)))
+
+    def _csv_header(self):
+        header = 'tid,label'
+
+        for attr in self.get_attributes():
+            header += ',lat,lon' if attr == 'lat_lon' else ',' + attr
+
+        return header
+
+    def _csv_lines(self, n_jobs):
+        attributes = list(self.get_attributes())
+        lat_lon = attributes.index('lat_lon') if 'lat_lon' in attributes \
+            else -1
         tids = self.get_tids()
+        labels = self.get_labels()
 
         def build_lines(s):
             lines = []
             for i in range(s.start, s.stop):
                 tid = tids[i]
-                label = self.get_label(tid)
-                traj = self.get_trajectory(tid)
+                label = labels[i] if labels is not None else ''
+                traj = self.data[i]
 
                 for p in traj:
+                    p = list(p)
                     if lat_lon > -1:
                         p[lat_lon] = str(p[lat_lon][0]) + \
                             ',' + str(p[lat_lon][1])
@@ -292,25 +456,10 @@ class TrajectoryData(object):
                     lines.append(str(tid) + ',' + str(label) + ',' + fmt)
             return lines
 
-        with open(file, 'w') as out:
-            header = 'tid,label'
-
-            for i, attr in enumerate(self.get_attributes()):
-                if attr == 'lat_lon':
-                    header += ',lat,lon'
-                    lat_lon = i
-                else:
-                    header += ',' + attr
-
-            out.write(header + '\n')
-            func = delayed(build_lines)
-            lines = Parallel(n_jobs=n_jobs, verbose=0)(
-                func(s) for s in gen_even_slices(len(tids), n_jobs))
-
-            lines = np.concatenate(lines)
-            lines = '\n'.join(lines)
-            out.write(lines)
-            out.close()
+        func = delayed(build_lines)
+        lines = Parallel(n_jobs=n_jobs, verbose=0)(
+            func(s) for s in gen_even_slices(len(tids), n_jobs))
+        return [line for job in lines for line in job]
 
     def _print_stats(self):
         print('==========================================================')
@@ -3,7 +3,13 @@
 from .loader import TrajectoryLoader
 from .loader import CSVTrajectoryLoader
 from .geohash import Geohash
+from .index import SpatialIndex
+from .index import TemporalIndex
+from .batches import TrajectoryBatches
 
 __all__ = ['TrajectoryLoader',
            'CSVTrajectoryLoader',
-           'Geohash']
+           'Geohash',
+           'SpatialIndex',
+           'TemporalIndex',
+           'TrajectoryBatches']
@@ -0,0 +1,25 @@
+import numpy as np
+
+
+def object_array(values):
+    """Builds a one-dimensional array holding each value in an entry.
+
+    Unlike ``np.array``, sequences of equal length (e.g. trajectories or
+    ``[lat, lon]`` pairs) are not turned into additional dimensions.
+
+    Parameters
+    ----------
+    values : sequence
+        The values of the array.
+
+    Returns
+    -------
+    array : array, shape (n_values)
+        An array with ``dtype=object``.
+    """
+    array = np.empty(len(values), dtype=object)
+
+    for i, v in enumerate(values):
+        array[i] = v
+
+    return array
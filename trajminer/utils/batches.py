@@ -0,0 +1,142 @@
+import pickle
+
+from ..trajectory_data import TrajectoryData
+
+
+class TrajectoryBatches(object):
+    """Lazy sequence of :class:`trajminer.TrajectoryData` batches.
+
+    Batches are produced one at a time whenever the object is iterated, so
+    datasets larger than memory can be processed batch by batch. Iterating
+    again re-reads the source (and re-applies the transformation), which
+    allows steps needing global state (e.g.
+    :func:`trajminer.preprocessing.filter_label_size`) to make a first pass
+    over the stream. The filtering functions and
+    :class:`trajminer.preprocessing.TrajectorySegmenter` accept these objects
+    in place of a dataset and return new (lazy) batches.
+
+    Parameters
+    ----------
+    source : iterable or callable
+        The input batches. Either an iterable of
+        :class:`trajminer.TrajectoryData` (which must be re-iterable, e.g. a
+        list or another :class:`TrajectoryBatches`, if the batches are
+        iterated more than once) or a callable returning a new iterator of
+        batches for each pass.
+    transform : callable (default=None)
+        A callable taking an iterator of input batches and returning an
+        iterator of output batches. If ``None``, then input batches are
+        returned as they are.
+
+    Examples
+    --------
+    >>> from trajminer.utils import CSVTrajectoryLoader
+    >>> from trajminer.preprocessing import filter_label_size
+    >>> from trajminer.preprocessing import filter_trajectory_length
+    >>> batches = CSVTrajectoryLoader('fleet.csv').load_batches(100000)
+    >>> batches = filter_trajectory_length(batches, 10, None)
+    >>> batches = filter_label_size(batches, 5, None)
+    >>> batches.to_file('preprocessed.csv')
+    """
+
+    def __init__(self, source, transform=None):
+        self.source = source
+        self.transform = transform
+
+    def __iter__(self):
+        batches = self.source() if callable(self.source) \
+            else iter(self.source)
+
+        if self.transform is not None:
+            batches = self.transform(batches)
+
+        return iter(batches)
+
+    def map(self, func):
+        """Lazily applies a function to each batch.
+
+        Parameters
+        ----------
+        func : callable
+            A callable taking a :class:`trajminer.TrajectoryData` batch and
+            returning the processed batch.
+
+        Returns
+        -------
+        batches : :class:`trajminer.utils.TrajectoryBatches`
+            The processed batches.
+        """
+        return TrajectoryBatches(self, lambda batches: map(func, batches))
+
+    def is_reiterable(self):
+        """Checks whether the batches can be iterated more than once.
+
+        Returns
+        -------
+        reiterable : bool
+            `False` if the source is a one-shot iterator, `True` otherwise.
+        """
+        if isinstance(self.source, TrajectoryBatches):
+            return self.source.is_reiterable()
+
+        return callable(self.source) or iter(self.source) is not self.source
+
+    def to_file(self, file, file_type='csv', n_jobs=1):
+        """Writes the batches to a file, one batch at a time.
+
+        Parameters
+        ----------
+        file : str
+            The output file.
+        file_type : str (default='csv')
+            The file type. Must be one of `{csv, binary}`. Binary files hold
+            a sequence of pickled batches and can be read back with
+            :meth:`load`.
+        n_jobs : int (default=1)
+            The number of parallel jobs.
+        """
+        if file_type == 'binary':
+            with open(file, 'wb') as out:
+                for batch in self:
+                    batch._to_binary(out)
+            return
+
+        with open(file, 'w') as out:
+            header = False
+
+            for batch in self:
+                if not header:
+                    out.write(batch._csv_header())
+                    header = True
+
+                lines = batch._csv_lines(n_jobs)
+
+                if len(lines) > 0:
+                    out.write('\n' + '\n'.join(lines))
+
+    @staticmethod
+    def load(file):
+        """Reads batches from a binary file written by `to_file`. The file is
+        read lazily, one batch at a time.
+
+        Parameters
+        ----------
+        file : str
+            The input file.
+
+        Returns
+        -------
+        batches : :class:`trajminer.utils.TrajectoryBatches`
+            The batches in the file.
+        """
+        def read():
+            with open(file, 'rb') as f:
+                while True:
+                    try:
+                        attributes, data, tids, labels = pickle.load(f)
+                    except EOFError:
+                        return
+
+                    yield TrajectoryData(attributes, data, tids, labels)
+
+        return TrajectoryBatches(read)
@@ -52,9 +52,11 @@ def haversine(x, y, unit='meters'):
 
     Parameters
     ----------
-    x : array-like, shape (2)
+    x : array-like, shape (..., 2)
         An array like ``[lat, lon]``. ``lat`` and ``lon`` must be floats.
-    y : array-like, shape (2)
+        Arrays of pairs are also accepted, in which case the distances are
+        computed elementwise (with broadcasting).
+    y : array-like, shape (..., 2)
         An array like ``[lat, lon]``. ``lat`` and ``lon`` must be floats.
     unit : str (default='meters')
         The unit to use for measuring the distance. It must be one of
@@ -62,7 +64,7 @@ def haversine(x, y, unit='meters'):
 
     Returns
     -------
-    distance : float
+    distance : float or array
         The haversine distance between ``x`` and ``y`` in the specified unit.
 
     Examples
@@ -75,7 +77,9 @@ def haversine(x, y, unit='meters'):
     >>> haversine([-27.601759, -48.5208], [-27.6894608,-48.4848], unit='mi')
     6.447789383168045
     """
-    lon1, lat1, lon2, lat2 = np.radians([x[1], x[0], y[1], y[0]])
+    x, y = np.radians(np.asarray(x, dtype=float)), \
+        np.radians(np.asarray(y, dtype=float))
+    lat1, lon1, lat2, lon2 = x[..., 0], x[..., 1], y[..., 0], y[..., 1]
     dlon, dlat = (lon2 - lon1), (lat2 - lat1)
 
     a = np.sin(dlat/2)**2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon/2)**2
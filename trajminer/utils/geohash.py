@@ -1,6 +1,13 @@
 import numpy as np
 import geohash2 as gh
 
+from .distance import haversine
+
+
+_EARTH_RADIUS = 6371000
+_LAT_STEPS = np.array([1, 1, 0, -1, -1, -1, 0, 1])
+_LON_STEPS = np.array([0, 1, 1, 1, 0, -1, -1, -1])
+
 
 class Geohash(object):
     """Utility for encoding latitute and longitude coordinates using Geohash.
@@ -21,6 +28,9 @@ class Geohash(object):
            1, 0, 0, 1, 0, 1])
     >>> g.encode(lat=-27.601759, lon=-48.520894, precision=15)
     '6gj6zzk0j5pnhu8'
+    >>> g.encode_many([-27.601759, 40.7128], [-48.520894, -74.006],
+    ...               precision=5, output='base32')
+    array(['6gj6z', 'dr5re'], dtype='<U5')
     """
 
     def __init__(self):
@@ -58,3 +68,397 @@ class Geohash(object):
             return np.concatenate([self.base32toBin[x] for x in hashed])
 
         return hashed
+
+    def encode_many(self, lats, lons, precision=10, output='packed'):
+        """Encodes arrays of latitudes and longitudes with Geohash.
+
+        Bits are interleaved with NumPy integer operations over whole arrays,
+        so no Python call is made per point.
+
+        Parameters
+        ----------
+        lats : array-like, shape (n_points)
+            The latitudes.
+        lons : array-like, shape (n_points)
+            The longitudes.
+        precision : int (default=10)
+            The length of the encoded locations in Base32. Must be at most 12.
+        output : str (default='packed')
+            A string in {'packed', 'base32', 'binary'}:
+
+                - If 'packed', then the ``5 * precision`` bits of each geohash
+                  are packed into an unsigned integer (cell id). The cell ids
+                  at a lower precision ``q`` are the ids at `precision`
+                  shifted right by ``5 * (precision - q)`` bits.
+                - If 'base32', then the Base32 geohashes are returned.
+                - If 'binary', then the binary codifications are returned.
+
+        Returns
+        -------
+        geohashes : array
+            An array of type `uint64` with shape (n_points) if
+            `output='packed'`, of strings with shape (n_points) if
+            `output='base32'` or of bits with shape
+            (n_points, 5 * precision) if `output='binary'`.
+        """
+        if precision > 12:
+            raise ValueError("'precision' must be at most 12!")
+
+        lat_bits, lon_bits = _bits(precision)
+        lat_idx = _quantize(np.asarray(lats, dtype=float), -90., 90.,
+                            lat_bits)
+        lon_idx = _quantize(np.asarray(lons, dtype=float), -180., 180.,
+                            lon_bits)
+        cells = _interleave(lat_idx, lon_idx, precision)
+
+        if output == 'base32':
+            return self.to_base32(cells, precision)
+        elif output == 'binary':
+            return self.to_binary(cells, precision)
+
+        return cells
+
+    def decode_many(self, geohashes, precision=None):
+        """Decodes arrays of geohashes into the centers of their cells.
+
+        Parameters
+        ----------
+        geohashes : array-like, shape (n_points)
+            Packed cell ids (as returned by `encode_many`) or Base32
+            geohashes of the same length.
+        precision : int (default=None)
+            The precision of packed cell ids. Ignored for Base32 geohashes.
+
+        Returns
+        -------
+        lats : array, shape (n_points)
+            The latitudes of the cell centers.
+        lons : array, shape (n_points)
+            The longitudes of the cell centers.
+        """
+        geohashes = np.asarray(geohashes)
+
+        if geohashes.dtype.kind in ('U', 'S', 'O'):
+            geohashes = geohashes.astype(str)
+            precision = geohashes.dtype.itemsize // 4
+            geohashes = self.from_base32(geohashes)
+        elif precision is None:
+            raise ValueError("'precision' must be given for packed cell " +
+                             "ids!")
+
+        lat_bits, lon_bits = _bits(precision)
+        lat_idx, lon_idx = _deinterleave(geohashes.astype(np.uint64),
+                                         precision)
+        lats = -90 + (lat_idx + .5) * 180 / 2 ** lat_bits
+        lons = -180 + (lon_idx + .5) * 360 / 2 ** lon_bits
+        return lats, lons
+
+    def to_base32(self, cells, precision):
+        """Converts packed cell ids into Base32 geohashes.
+
+        Parameters
+        ----------
+        cells : array-like, shape (n_points)
+            The packed cell ids.
+        precision : int
+            The precision of the cell ids.
+
+        Returns
+        -------
+        geohashes : array, shape (n_points)
+            The Base32 geohashes.
+        """
+        shifts = np.arange(5 * (precision - 1), -1, -5, dtype=np.uint64)
+        chars = np.array(self.base32)[
+            (np.asarray(cells, dtype=np.uint64)[:, None] >> shifts) &
+            np.uint64(31)]
+        return np.ascontiguousarray(chars).view('<U%d' % precision) \
+            .reshape(-1)
+
+    def from_base32(self, geohashes):
+        """Converts Base32 geohashes of the same length into packed cell ids.
+
+        Parameters
+        ----------
+        geohashes : array-like, shape (n_points)
+            The Base32 geohashes.
+
+        Returns
+        -------
+        cells : array, shape (n_points)
+            The packed cell ids.
+        """
+        geohashes = np.asarray(geohashes, dtype=str)
+        precision = geohashes.dtype.itemsize // 4
+        codes = np.ascontiguousarray(geohashes).view(np.uint32) \
+            .reshape(len(geohashes), precision)
+        lookup = np.zeros(128, dtype=np.uint64)
+        lookup[[ord(c) for c in self.base32]] = np.r_[0:32]
+        shifts = np.arange(5 * (precision - 1), -1, -5, dtype=np.uint64)
+        return np.bitwise_or.reduce(lookup[codes] << shifts, axis=1) \
+            .astype(np.uint64)
+
+    def to_binary(self, cells, precision):
+        """Converts packed cell ids into their binary codifications.
+
+        Parameters
+        ----------
+        cells : array-like, shape (n_points)
+            The packed cell ids.
+        precision : int
+            The precision of the cell ids.
+
+        Returns
+        -------
+        binary : array, shape (n_points, 5 * precision)
+            The bits of each geohash.
+        """
+        octets = np.asarray(cells, dtype='>u8').view(np.uint8)
+        bits = np.unpackbits(octets.reshape(-1, 8), axis=1)
+        return bits[:, 64 - 5 * precision:].astype(int)
+
+    def bounds(self, cells, precision):
+        """Computes the bounding boxes of packed cell ids.
+
+        Parameters
+        ----------
+        cells : array-like, shape (n_cells)
+            The packed cell ids.
+        precision : int
+            The precision of the cell ids.
+
+        Returns
+        -------
+        bounds : array, shape (n_cells, 4)
+            The ``[min_lat, min_lon, max_lat, max_lon]`` of each cell.
+        """
+        lat_bits, lon_bits = _bits(precision)
+        lat_idx, lon_idx = _deinterleave(
+            np.asarray(cells, dtype=np.uint64).reshape(-1), precision)
+        lat_size, lon_size = 180 / 2 ** lat_bits, 360 / 2 ** lon_bits
+        min_lat = -90 + lat_idx * lat_size
+        min_lon = -180 + lon_idx * lon_size
+        return np.column_stack([min_lat, min_lon, min_lat + lat_size,
+                                min_lon + lon_size])
+
+    def neighbours(self, cells, precision):
+        """Computes the eight neighbours of packed cell ids.
+
+        Longitudes wrap around the antimeridian. Cells touching a pole have
+        no neighbours beyond it, so the cell itself (or its east or west
+        neighbour) is repeated in their place.
+
+        Parameters
+        ----------
+        cells : array-like, shape (n_cells)
+            The packed cell ids.
+        precision : int
+            The precision of the cell ids.
+
+        Returns
+        -------
+        neighbours : array, shape (n_cells, 8)
+            The packed ids of the north, northeast, east, southeast, south,
+            southwest, west and northwest neighbours of each cell.
+        """
+        lat_bits, lon_bits = _bits(precision)
+        lat_idx, lon_idx = _deinterleave(
+            np.asarray(cells, dtype=np.uint64).reshape(-1), precision)
+        lat_idx = lat_idx.astype(np.int64)[:, None] + _LAT_STEPS
+        lon_idx = lon_idx.astype(np.int64)[:, None] + _LON_STEPS
+        lat_idx = np.clip(lat_idx, 0, 2 ** lat_bits - 1)
+        lon_idx %= 2 ** lon_bits
+        return _interleave(lat_idx.astype(np.uint64),
+                           lon_idx.astype(np.uint64), precision)
+
+    def prefix_range(self, cells, precision, target_precision):
+        """Computes the ranges of packed cell ids at `target_precision` that
+        lie within cells at a lower `precision`.
+
+        Since packed ids preserve the order of Base32 geohashes, the points
+        of a cell are found with a range scan (e.g. ``np.searchsorted``) over
+        the sorted ids of points at `target_precision`.
+
+        Parameters
+        ----------
+        cells : array-like, shape (n_cells)
+            The packed cell ids.
+        precision : int
+            The precision of the cell ids.
+        target_precision : int
+            The precision of the range bounds. Must be at least `precision`.
+
+        Returns
+        -------
+        start : array, shape (n_cells)
+            The first cell id within each cell.
+        stop : array, shape (n_cells)
+            The first cell id after each cell (exclusive bound).
+        """
+        if target_precision < precision:
+            raise ValueError("'target_precision' cannot be lower than " +
+                             "'precision'!")
+
+        shift = np.uint64(5 * (target_precision - precision))
+        cells = np.asarray(cells, dtype=np.uint64)
+        return cells << shift, (cells + np.uint64(1)) << shift
+
+    def cover_bbox(self, min_lat, min_lon, max_lat, max_lon, precision):
+        """Computes the cells intersecting a bounding box.
+
+        Parameters
+        ----------
+        min_lat : float
+            The southern bound of the box.
+        min_lon : float
+            The western bound of the box. If greater than `max_lon`, then the
+            box crosses the antimeridian.
+        max_lat : float
+            The northern bound of the box.
+        max_lon : float
+            The eastern bound of the box.
+        precision : int
+            The precision of the cells.
+
+        Returns
+        -------
+        cells : array
+            The sorted packed ids of the cells intersecting the box.
+        """
+        lat_bits, lon_bits = _bits(precision)
+        n_lons = 2 ** lon_bits
+        lat_lo, lat_hi = _quantize(np.array([min_lat, max_lat], dtype=float),
+                                   -90., 90., lat_bits).astype(np.int64)
+
+        if max_lon - min_lon >= 360:
+            lon_idx = np.r_[0:n_lons]
+        else:
+            lon_lo, lon_hi = _quantize(
+                (np.array([min_lon, max_lon], dtype=float) + 180) % 360 - 180,
+                -180., 180., lon_bits).astype(np.int64)
+
+            if lon_hi < lon_lo or (lon_hi == lon_lo and max_lon < min_lon):
+                lon_hi += n_lons
+
+            lon_idx = np.r_[lon_lo:lon_hi + 1] % n_lons
+
+        lat_idx = np.r_[lat_lo:lat_hi + 1]
+        lat_idx, lon_idx = np.meshgrid(lat_idx, lon_idx, indexing='ij')
+        return np.sort(_interleave(lat_idx.reshape(-1).astype(np.uint64),
+                                   lon_idx.reshape(-1).astype(np.uint64),
+                                   precision))
+
+    def cover_radius(self, lat, lon, radius, precision):
+        """Computes the cells with at least one location within `radius`
+        meters (haversine distance) of a given location.
+
+        A point can only be within `radius` of the location if its cell is
+        returned, so spatial joins with a distance threshold only need to
+        compare points whose cells match.
+
+        Parameters
+        ----------
+        lat : float
+            The latitude of the location.
+        lon : float
+            The longitude of the location.
+        radius : float
+            The maximum distance in meters.
+        precision : int
+            The precision of the cells.
+
+        Returns
+        -------
+        cells : array
+            The sorted packed ids of the cells within `radius`.
+        """
+        angle = radius / _EARTH_RADIUS
+        min_lat = max(lat - np.degrees(angle), -90.)
+        max_lat = min(lat + np.degrees(angle), 90.)
+        cos_lat = np.cos(np.radians(lat))
+
+        if min_lat == -90 or max_lat == 90 or np.sin(angle) >= cos_lat:
+            # The circle contains a pole, so it spans all longitudes
+            min_lon, max_lon = -180., 180.
+        else:
+            width = np.degrees(np.arcsin(np.sin(angle) / cos_lat))
+            min_lon, max_lon = lon - width, lon + width
+
+        cells = self.cover_bbox(min_lat, min_lon, max_lat, max_lon,
+                                precision)
+        box = self.bounds(cells, precision)
+
+        # Nearest location of each cell: the latitude of the location is
+        # clamped for cells spanning its longitude, otherwise the nearest
+        # location lies on the closest meridian edge
+        inside = (lon - box[:, 1]) % 360 <= box[:, 3] - box[:, 1]
+        to_min = np.abs((box[:, 1] - lon + 180) % 360 - 180)
+        to_max = np.abs((box[:, 3] - lon + 180) % 360 - 180)
+        nearest_lon = np.where(inside, lon, np.where(to_min <= to_max,
+                                                     box[:, 1], box[:, 3]))
+        cos_dlon = np.cos(np.radians(nearest_lon - lon))
+
+        with np.errstate(divide='ignore'):
+            nearest_lat = np.where(
+                inside, lat, np.where(
+                    cos_dlon > 0,
+                    np.degrees(np.arctan(np.tan(np.radians(lat)) / cos_dlon)),
+                    np.sign(lat) * 90))
+
+        nearest_lat = np.clip(nearest_lat, box[:, 0], box[:, 2])
+        nearest = np.column_stack([nearest_lat, nearest_lon])
+        return cells[haversine([lat, lon], nearest) <= radius]
+
+
+def _quantize(values, lo, hi, n_bits):
+    # Index of the cell of each value among 2 ** n_bits equal intervals
+    scale = 2 ** n_bits
+    idx = np.floor((values - lo) / (hi - lo) * scale)
+    idx = np.clip(idx, 0, scale - 1)
+
+    # Geohash bisects intervals with strict comparisons, so values on (or
+    # rounded across) a cell boundary are checked against the exact one
+    idx -= (values <= lo + (hi - lo) * idx / scale) & (idx > 0)
+    idx += (values > lo + (hi - lo) * (idx + 1) / scale) & (idx < scale - 1)
+    return idx.astype(np.uint64)
+
+
+def _bits(precision):
+    # Numbers of latitude and longitude bits of geohashes
+    n_bits = 5 * precision
+    return n_bits // 2, (n_bits + 1) // 2
+
+
+def _interleave(lat_idx, lon_idx, precision):
+    # Longitude bits go to even positions (from the most significant bit)
+    # and latitude bits to odd positions
+    lat_bits, lon_bits = _bits(precision)
+    n_bits = lat_bits + lon_bits
+    cells = np.zeros(lat_idx.shape, dtype=np.uint64)
+
+    for j in range(lon_bits):
+        bit = (lon_idx >> np.uint64(lon_bits - 1 - j)) & np.uint64(1)
+        cells |= bit << np.uint64(n_bits - 1 - 2 * j)
+
+    for j in range(lat_bits):
+        bit = (lat_idx >> np.uint64(lat_bits - 1 - j)) & np.uint64(1)
+        cells |= bit << np.uint64(n_bits - 2 - 2 * j)
+
+    return cells
+
+
+def _deinterleave(cells, precision):
+    lat_bits, lon_bits = _bits(precision)
+    n_bits = lat_bits + lon_bits
+    lat_idx = np.zeros(cells.shape, dtype=np.uint64)
+    lon_idx = np.zeros(cells.shape, dtype=np.uint64)
+
+    for j in range(lon_bits):
+        bit = (cells >> np.uint64(n_bits - 1 - 2 * j)) & np.uint64(1)
+        lon_idx |= bit << np.uint64(lon_bits - 1 - j)
+
+    for j in range(lat_bits):
+        bit = (cells >> np.uint64(n_bits - 2 - 2 * j)) & np.uint64(1)
+        lat_idx |= bit << np.uint64(lat_bits - 1 - j)
+
+    return lat_idx, lon_idx
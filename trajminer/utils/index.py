@@ -0,0 +1,438 @@
+import numpy as np
+
+from .distance import haversine
+from .geohash import Geohash
+
+
+_EARTH_RADIUS = 6371000
+
+
+class SpatialIndex(object):
+    """Grid index over the points of a trajectory dataset.
+
+    Points are indexed by their geohash cell at `precision`, packed into
+    integers (see :meth:`trajminer.utils.Geohash.encode_many`) and kept in
+    sorted order. Since a cell at a lower precision covers a contiguous range
+    of cell ids, queries are answered by covering the query region with
+    cells (at the finest precision keeping the cover small) and scanning the
+    corresponding ranges with binary search. Only points in these ranges are
+    compared against the exact query region.
+
+    Parameters
+    ----------
+    lat_lon : str (default='lat_lon')
+        The attribute holding the ``[lat, lon]`` pair of trajectory points.
+    precision : int (default=8)
+        The geohash precision of the grid. Must be at most 12.
+    max_cells : int (default=1024)
+        The maximum number of cells used for covering a query region.
+
+    Attributes
+    ----------
+    cells : array, shape (n_points)
+        The sorted cell ids of all points.
+    points : array, shape (n_points, 2)
+        The ``[lat, lon]`` of all points, in the order of `cells`.
+    trajectories : array, shape (n_points)
+        The index of the trajectory of each point, in the order of `cells`.
+    positions : array, shape (n_points)
+        The position of each point within its trajectory, in the order of
+        `cells`.
+    boxes : array, shape (n_trajectories, 4)
+        The ``[min_lat, min_lon, max_lat, max_lon]`` bounding box of each
+        trajectory.
+
+    Examples
+    --------
+    >>> index = data.get_spatial_index(precision=8)
+    >>> index.range_query(-27.7, -48.6, -27.5, -48.4)
+    >>> index.radius_query(-27.6, -48.5, radius=500, return_points=True)
+    >>> index.nearest(-27.6, -48.5, k=5)
+    """
+
+    def __init__(self, lat_lon='lat_lon', precision=8, max_cells=1024):
+        self.lat_lon = lat_lon
+        self.precision = precision
+        self.max_cells = max_cells
+        self.geohash = Geohash()
+
+        if precision > 12:
+            raise ValueError("'precision' must be at most 12!")
+
+    def fit(self, X):
+        """Builds the index.
+
+        Parameters
+        ----------
+        X : :class:`trajminer.TrajectoryData`
+            Input dataset.
+
+        Returns
+        -------
+        self : object
+            Returns self.
+        """
+        lat_lon = list(X.get_attributes()).index(self.lat_lon)
+        lengths = X.get_lengths()
+        points = np.array([p[lat_lon] for t in X.get_trajectories()
+                           for p in t], dtype=float).reshape(-1, 2)
+        trajectories = np.repeat(np.r_[0:len(lengths)], lengths)
+        positions = np.r_[0:len(points)] - \
+            np.repeat(np.cumsum(lengths) - lengths, lengths)
+        cells = self.geohash.encode_many(points[:, 0], points[:, 1],
+                                         self.precision)
+
+        order = np.argsort(cells, kind='stable')
+        self.cells = cells[order]
+        self.points = points[order]
+        self.trajectories = trajectories[order]
+        self.positions = positions[order]
+
+        self.boxes = np.full((len(lengths), 4), np.nan)
+        present = lengths > 0
+
+        if present.any():
+            starts = (np.cumsum(lengths) - lengths)[present]
+            self.boxes[present, :2] = np.minimum.reduceat(points, starts)
+            self.boxes[present, 2:] = np.maximum.reduceat(points, starts)
+
+        return self
+
+    def range_query(self, min_lat, min_lon, max_lat, max_lon,
+                    return_points=False):
+        """Retrieves the trajectories (or points) within a bounding box.
+
+        Parameters
+        ----------
+        min_lat : float
+            The southern bound of the box.
+        min_lon : float
+            The western bound of the box. If greater than `max_lon`, then the
+            box crosses the antimeridian.
+        max_lat : float
+            The northern bound of the box.
+        max_lon : float
+            The eastern bound of the box.
+        return_points : bool (default=False)
+            If `True`, then the points within the box are returned instead of
+            the trajectories.
+
+        Returns
+        -------
+        trajectories : array
+            The sorted indices of the trajectories with at least one point
+            within the box. Only returned if `return_points=False`.
+        points : tuple of arrays
+            The trajectory indices and the positions (within trajectories) of
+            the points within the box, sorted by trajectory and position.
+            Only returned if `return_points=True`.
+        """
+        width = (max_lon - min_lon) % 360 if max_lon - min_lon < 360 else 360
+        precision = self._query_precision(max_lat - min_lat, width)
+        cells = self.geohash.cover_bbox(min_lat, min_lon, max_lat, max_lon,
+                                        precision)
+        idxs = self._candidates(cells, precision)
+        lat, lon = self.points[idxs, 0], self.points[idxs, 1]
+        found = (lat >= min_lat) & (lat <= max_lat)
+
+        if width < 360:
+            found &= (lon - min_lon) % 360 <= width
+
+        return self._results(idxs[found], return_points)
+
+    def radius_query(self, lat, lon, radius, return_points=False):
+        """Retrieves the trajectories (or points) within `radius` meters
+        (haversine distance) of a location.
+
+        Parameters
+        ----------
+        lat : float
+            The latitude of the location.
+        lon : float
+            The longitude of the location.
+        radius : float
+            The maximum distance in meters.
+        return_points : bool (default=False)
+            If `True`, then the points within `radius` are returned instead
+            of the trajectories.
+
+        Returns
+        -------
+        trajectories : array
+            The sorted indices of the trajectories with at least one point
+            within `radius`. Only returned if `return_points=False`.
+        points : tuple of arrays
+            The trajectory indices and the positions (within trajectories) of
+            the points within `radius`, sorted by trajectory and position.
+            Only returned if `return_points=True`.
+        """
+        idxs = self._radius_candidates(lat, lon, radius)
+        near = haversine(self.points[idxs], [lat, lon]) <= radius
+        return self._results(idxs[near], return_points)
+
+    def nearest(self, lat, lon, k=1):
+        """Retrieves the `k` trajectories closest to a location, where the
+        distance of a trajectory is the distance of its closest point.
+
+        The search radius starts at the size of a grid cell and is doubled
+        until `k` trajectories are found within it.
+
+        Parameters
+        ----------
+        lat : float
+            The latitude of the location.
+        lon : float
+            The longitude of the location.
+        k : int (default=1)
+            The number of trajectories to retrieve.
+
+        Returns
+        -------
+        trajectories : array, shape (k)
+            The indices of the closest trajectories, sorted by distance.
+        distances : array, shape (k)
+            The distances in meters of the closest trajectories.
+        """
+        k = min(k, np.count_nonzero(~np.isnan(self.boxes[:, 0])))
+        box = self.geohash.bounds([0], self.precision)[0]
+        radius = haversine(box[:2], box[2:])
+
+        while True:
+            idxs = self._radius_candidates(lat, lon, radius)
+            dist = haversine(self.points[idxs], [lat, lon])
+            within = dist <= radius
+            idxs, dist = idxs[within], dist[within]
+
+            if len(np.unique(self.trajectories[idxs])) >= k or \
+                    radius > np.pi * _EARTH_RADIUS:
+                break
+
+            radius *= 2
+
+        # Closest point of each trajectory
+        order = np.lexsort((dist, self.trajectories[idxs]))
+        trajectories, first = np.unique(self.trajectories[idxs][order],
+                                        return_index=True)
+        distances = dist[order][first]
+        best = np.argsort(distances, kind='stable')[:k]
+        return trajectories[best], distances[best]
+
+    def save(self, file):
+        """Persists the index to a NumPy ``.npz`` file.
+
+        Parameters
+        ----------
+        file : str
+            The output file.
+        """
+        np.savez(file, lat_lon=self.lat_lon, precision=self.precision,
+                 max_cells=self.max_cells, cells=self.cells,
+                 points=self.points, trajectories=self.trajectories,
+                 positions=self.positions, boxes=self.boxes)
+
+    @staticmethod
+    def load(file):
+        """Loads an index persisted with `save`.
+
+        Parameters
+        ----------
+        file : str
+            The input file.
+
+        Returns
+        -------
+        index : :class:`trajminer.utils.SpatialIndex`
+            The loaded index.
+        """
+        with np.load(file) as stored:
+            index = SpatialIndex(lat_lon=str(stored['lat_lon']),
+                                 precision=int(stored['precision']),
+                                 max_cells=int(stored['max_cells']))
+
+            for attr in ['cells', 'points', 'trajectories', 'positions',
+                         'boxes']:
+                setattr(index, attr, stored[attr])
+
+        return index
+
+    def _query_precision(self, height, width):
+        # Finest precision (up to the index precision) whose cover of a
+        # height x width region (in degrees) has at most max_cells cells
+        for precision in range(self.precision, 0, -1):
+            box = self.geohash.bounds([0], precision)[0]
+            cell_height, cell_width = box[2] - box[0], box[3] - box[1]
+            n_cells = min(height / cell_height + 2, 180 / cell_height) * \
+                min(width / cell_width + 2, 360 / cell_width)
+
+            if n_cells <= self.max_cells:
+                return precision
+
+        return 1
+
+    def _radius_candidates(self, lat, lon, radius):
+        height = 2 * np.degrees(radius / _EARTH_RADIUS)
+        cos_lat = max(np.cos(np.radians(lat)), 1e-12)
+        precision = self._query_precision(height, min(height / cos_lat, 360))
+        cells = self.geohash.cover_radius(lat, lon, radius, precision)
+        return self._candidates(cells, precision)
+
+    def _candidates(self, cells, precision):
+        # Positions of the points within the given cells
+        start, stop = self.geohash.prefix_range(cells, precision,
+                                                self.precision)
+        lo = np.searchsorted(self.cells, start)
+        hi = np.searchsorted(self.cells, stop)
+        counts = hi - lo
+        return np.r_[0:counts.sum()] + np.repeat(lo - np.cumsum(counts) +
+                                                 counts, counts)
+
+    def _results(self, idxs, return_points):
+        if not return_points:
+            return np.unique(self.trajectories[idxs])
+
+        order = np.lexsort((self.positions[idxs], self.trajectories[idxs]))
+        idxs = idxs[order]
+        return self.trajectories[idxs], self.positions[idxs]
+
+
+class TemporalIndex(object):
+    """Index over the timestamps of the points of a trajectory dataset.
+
+    The timestamps of all points are kept both in trajectory order (as one
+    flat array, where each trajectory is a contiguous and chronologically
+    sorted block) and in global chronological order. Time windows are found
+    with binary search over the global order, and the points of a trajectory
+    within a window form a contiguous range of positions, so queries return
+    position ranges (or views) instead of copies of trajectories.
+
+    Parameters
+    ----------
+    time : str (default='time')
+        The attribute holding the (numeric or datetime) timestamps of
+        trajectory points. The points of each trajectory must be sorted by
+        time.
+
+    Attributes
+    ----------
+    times : array, shape (n_points)
+        The timestamps of all points, in trajectory order.
+    offsets : array, shape (n_trajectories + 1)
+        The position in `times` where each trajectory starts, followed by the
+        number of points.
+    order : array, shape (n_points)
+        The positions in `times` sorted chronologically.
+
+    Examples
+    --------
+    >>> index = data.get_temporal_index(time='time')
+    >>> trajectories, starts, stops = index.slice_time(480, 720)
+    >>> pairs = index.window_join(window=5)
+    """
+
+    def __init__(self, time='time'):
+        self.time = time
+
+    def fit(self, X):
+        """Builds the index.
+
+        Parameters
+        ----------
+        X : :class:`trajminer.TrajectoryData`
+            Input dataset.
+
+        Returns
+        -------
+        self : object
+            Returns self.
+        """
+        time = list(X.get_attributes()).index(self.time)
+        lengths = X.get_lengths()
+        times = np.array([p[time] for t in X.get_trajectories() for p in t])
+        owner = np.repeat(np.r_[0:len(lengths)], lengths)
+        inner = owner[1:] == owner[:-1]
+
+        if (times[1:][inner] < times[:-1][inner]).any():
+            raise ValueError("Points of each trajectory must be sorted by " +
+                             "'" + self.time + "'!")
+
+        self.times = times
+        self.offsets = np.r_[0, np.cumsum(lengths)]
+        self.order = np.argsort(times, kind='stable')
+        self._sorted_times = times[self.order]
+        self._owner = owner
+        return self
+
+    def slice_time(self, start, end):
+        """Retrieves the points of each trajectory within a time window.
+
+        Parameters
+        ----------
+        start : int, float or datetime
+            The start of the window (inclusive).
+        end : int, float or datetime
+            The end of the window (inclusive).
+
+        Returns
+        -------
+        trajectories : array
+            The sorted indices of the trajectories with at least one point
+            within the window.
+        starts : array
+            The position (within its trajectory) of the first point of each
+            trajectory within the window.
+        stops : array
+            The position (within its trajectory) after the last point of
+            each trajectory within the window, so that
+            ``trajectory[start:stop]`` holds the points within the window.
+        """
+        lo = np.searchsorted(self._sorted_times, start, side='left')
+        hi = np.searchsorted(self._sorted_times, end, side='right')
+        idxs = np.sort(self.order[lo:hi])
+        trajectories, first, counts = np.unique(
+            self._owner[idxs], return_index=True, return_counts=True)
+        starts = idxs[first] - self.offsets[trajectories]
+        return trajectories, starts, starts + counts
+
+    def window_join(self, window, other=None):
+        """Retrieves the pairs of points whose timestamps differ by at most
+        `window`.
+
+        Parameters
+        ----------
+        window : int, float or timedelta
+            The maximum time difference.
+        other : :class:`trajminer.utils.TemporalIndex` (default=None)
+            The index of the dataset to join with. If ``None``, then the
+            dataset is joined with itself and only pairs of points from
+            different trajectories (with the first trajectory index lower
+            than the second) are retrieved.
+
+        Returns
+        -------
+        pairs : array, shape (n_pairs, 4)
+            The trajectory index and position of the point in this dataset,
+            followed by the trajectory index and position of the point in
+            `other`, for each pair.
+        """
+        self_join = other is None
+        other = self if self_join else other
+        # Range of the chronological order of other within the window of
+        # each point
+        lo = np.searchsorted(other._sorted_times, self.times - window,
+                             side='left')
+        hi = np.searchsorted(other._sorted_times, self.times + window,
+                             side='right')
+        counts = hi - lo
+        left = np.repeat(np.r_[0:len(self.times)], counts)
+        right = other.order[np.r_[0:counts.sum()] +
+                            np.repeat(lo - np.cumsum(counts) + counts,
+                                      counts)]
+
+        if self_join:
+            keep = self._owner[left] < self._owner[right]
+            left, right = left[keep], right[keep]
+
+        pairs = np.column_stack([
+            self._owner[left], left - self.offsets[self._owner[left]],
+            other._owner[right], right - other.offsets[other._owner[right]]])
+        return pairs[np.lexsort(pairs.T[::-1])]
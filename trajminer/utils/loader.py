@@ -1,8 +1,9 @@
 from joblib import Parallel, delayed
 from sklearn.utils import gen_even_slices
 import pandas as pd
-import numpy as np
 
+from .arrays import object_array
+from .batches import TrajectoryBatches
 from ..trajectory_data import TrajectoryData
 
 
@@ -71,6 +72,49 @@ class CSVTrajectoryLoader(TrajectoryLoader):
         self.n_jobs = n_jobs
 
     def load(self):
+        df = pd.read_csv(self.file, sep=self.sep, usecols=self._columns())
+        return self._build(df)
+
+    def load_batches(self, chunksize=100000):
+        """Lazily loads trajectories in batches, reading the file in chunks
+        of rows. The rows (points) of each trajectory must be contiguous in
+        the file.
+
+        Parameters
+        ----------
+        chunksize : int (default=100000)
+            The number of rows read at a time. Each batch holds the
+            trajectories completed within a chunk, so a batch can be larger
+            than `chunksize` only if a trajectory is.
+
+        Returns
+        -------
+        batches : :class:`trajminer.utils.TrajectoryBatches`
+            The batches of trajectories. The file is read again whenever the
+            batches are iterated.
+        """
+        def read():
+            pending = None
+
+            for chunk in pd.read_csv(self.file, sep=self.sep,
+                                     usecols=self._columns(),
+                                     chunksize=chunksize):
+                if pending is not None:
+                    chunk = pd.concat([pending, chunk])
+
+                # The last trajectory may continue in the next chunk
+                tail = chunk[self.tid_col] == chunk[self.tid_col].iloc[-1]
+                pending = chunk[tail]
+
+                if not tail.all():
+                    yield self._build(chunk[~tail])
+
+            if pending is not None:
+                yield self._build(pending)
+
+        return TrajectoryBatches(read)
+
+    def _columns(self):
         cols = []
         with open(self.file, 'r') as f:
             cols = f.readline().replace('\n', '').split(self.sep)
@@ -79,7 +123,9 @@ class CSVTrajectoryLoader(TrajectoryLoader):
             if col in cols:
                 cols.remove(col)
 
-        df = pd.read_csv(self.file, sep=self.sep, usecols=cols)
+        return cols
+
+    def _build(self, df):
         attributes = list(df.keys())
         attributes.remove(self.tid_col)
 
@@ -120,7 +166,7 @@ class CSVTrajectoryLoader(TrajectoryLoader):
 
         data = Parallel(n_jobs=self.n_jobs, verbose=0)(
             func(s) for s in gen_even_slices(len(tids), self.n_jobs))
-        data = np.concatenate(data)
+        data = object_array([t for job in data for t in job])
 
         if self.label_col:
             labels = df \